@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""QuickJax benchmark suite.
+
+Measures renderer start-up, per-category render latency percentiles,
+sustained throughput and peak memory on the ``demo.py`` corpus plus a set of
+synthetic large formulas, writes the results as JSON, and optionally
+compares them with a saved baseline.
+
+Usage::
+
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --baseline results.json   # exit 1 on regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import quickjax  # noqa: E402
+from demo import CATEGORIES, INLINE_CATEGORIES  # noqa: E402
+from quickjax import MathJaxRenderer  # noqa: E402
+from quickjax.backend import bundle_fingerprint  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# ====================================================================== #
+# Corpus
+# ====================================================================== #
+
+def _matrix(n: int) -> str:
+    rows = [" & ".join(f"a_{{{i}{j}}}" for j in range(n)) for i in range(n)]
+    return r"\begin{bmatrix}" + r" \\ ".join(rows) + r"\end{bmatrix}"
+
+
+def _aligned(lines: int) -> str:
+    body = r" \\ ".join(
+        rf"f_{{{i}}}(x) &= \sum_{{k=0}}^{{{i}}} \binom{{{i}}}{{k}} x^k"
+        for i in range(lines)
+    )
+    return r"\begin{aligned}" + body + r"\end{aligned}"
+
+
+def _nested_fraction(depth: int) -> str:
+    latex = "x"
+    for i in range(depth):
+        latex = rf"\frac{{{i + 1}}}{{1 + {latex}}}"
+    return latex
+
+
+SYNTHETIC = {
+    "10x10 矩阵": _matrix(10),
+    "30x30 矩阵": _matrix(30),
+    "50 行 aligned": _aligned(50),
+    "长求和链": " + ".join(
+        rf"\frac{{x_{{{i}}}}}{{y_{{{i}}}}}" for i in range(200)
+    ),
+    "20 层嵌套分数": _nested_fraction(20),
+}
+
+
+def corpus() -> dict[str, list[tuple[str, bool]]]:
+    """Return category -> [(latex, display)] for the whole benchmark."""
+    result = {
+        title: [
+            (latex, title not in INLINE_CATEGORIES)
+            for latex in expressions.values()
+        ]
+        for title, expressions in CATEGORIES.items()
+    }
+    result["synthetic"] = [(latex, True) for latex in SYNTHETIC.values()]
+    return result
+
+
+# ====================================================================== #
+# Measurements
+# ====================================================================== #
+
+def percentile(values: list[float], p: float) -> float:
+    """Linearly interpolated *p*-th percentile of *values*."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    return {
+        "n": len(samples),
+        "mean": statistics.fmean(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+    }
+
+
+def peak_rss() -> int | None:
+    """Peak resident set size of this process in bytes, if known."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def bench_init(runs: int) -> dict[str, float]:
+    """Time ``MathJaxRenderer()`` plus bundle evaluation, in ms."""
+    construct, total = [], []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        renderer = MathJaxRenderer()
+        t1 = time.perf_counter()
+        renderer.warm_up()
+        t2 = time.perf_counter()
+        construct.append((t1 - t0) * 1000)
+        total.append((t2 - t0) * 1000)
+    return {
+        "construct_ms": statistics.median(construct),
+        "warm_up_ms": statistics.median(total),
+        "warm_up_min_ms": min(total),
+    }
+
+
+def bench_latency(
+    renderer: MathJaxRenderer,
+    categories: dict[str, list[tuple[str, bool]]],
+    repeat: int,
+) -> tuple[dict[str, dict[str, float]], int]:
+    """Per-category render latency in ms; also returns peak QuickJS heap."""
+    results = {}
+    every = []
+    peak_heap = 0
+    for title, items in categories.items():
+        # One untimed pass so first-use costs (fonts, JIT-less warm paths)
+        # are not attributed to a single sample.
+        for latex, display in items:
+            renderer.render(latex, display=display)
+        samples = []
+        for _ in range(repeat):
+            for latex, display in items:
+                t0 = time.perf_counter()
+                renderer.render(latex, display=display)
+                samples.append((time.perf_counter() - t0) * 1000)
+        results[title] = summarize(samples)
+        every.extend(samples)
+        peak_heap = max(
+            peak_heap, renderer.memory_usage().get("malloc_size", 0)
+        )
+    results["all"] = summarize(every)
+    return results, peak_heap
+
+
+def bench_throughput(
+    renderer: MathJaxRenderer,
+    items: list[tuple[str, bool]],
+    seconds: float,
+) -> dict[str, float]:
+    """Formulas per second for ``render()``, ``render_batch()`` and
+    ``to_mathml_batch()``."""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for latex, display in items:
+            renderer.render(latex, display=display)
+        count += len(items)
+    sequential = count / (time.perf_counter() - start)
+
+    displayed = [latex for latex, display in items if display]
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        renderer.render_batch(displayed)
+        count += len(displayed)
+    batch = count / (time.perf_counter() - start)
+
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        renderer.to_mathml_batch(displayed)
+        count += len(displayed)
+    mathml = count / (time.perf_counter() - start)
+    return {
+        "render_per_s": sequential,
+        "render_batch_per_s": batch,
+        "mathml_batch_per_s": mathml,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    categories = corpus()
+    init = bench_init(args.init_runs)
+    renderer = MathJaxRenderer()
+    renderer.warm_up()
+    latency, peak_heap = bench_latency(renderer, categories, args.repeat)
+    throughput = bench_throughput(
+        renderer,
+        [item for items in categories.values() for item in items],
+        args.seconds,
+    )
+    return {
+        "meta": {
+            "quickjax": quickjax.__version__,
+            "bundle": bundle_fingerprint(MathJaxRenderer._JS_BUNDLE),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": args.repeat,
+        },
+        "init": init,
+        "latency_ms": latency,
+        "throughput": throughput,
+        "memory": {
+            "quickjs_peak_bytes": peak_heap,
+            "process_peak_rss_bytes": peak_rss(),
+        },
+    }
+
+
+# ====================================================================== #
+# Reporting and baseline comparison
+# ====================================================================== #
+
+# (path in the results, higher is better)
+KEY_METRICS = [
+    (("init", "warm_up_ms"), False),
+    (("latency_ms", "all", "p50"), False),
+    (("latency_ms", "all", "p95"), False),
+    (("latency_ms", "all", "p99"), False),
+    (("latency_ms", "synthetic", "p50"), False),
+    (("throughput", "render_per_s"), True),
+    (("throughput", "render_batch_per_s"), True),
+    (("throughput", "mathml_batch_per_s"), True),
+    (("memory", "quickjs_peak_bytes"), False),
+    (("memory", "process_peak_rss_bytes"), False),
+]
+
+
+def _get(results: dict, path: tuple[str, ...]):
+    for key in path:
+        if not isinstance(results, dict) or key not in results:
+            return None
+        results = results[key]
+    return results
+
+
+def report(results: dict) -> None:
+    init = results["init"]
+    print(f"init: construct {init['construct_ms']:.2f} ms, "
+          f"warm-up {init['warm_up_ms']:.1f} ms")
+    print(f"\n{'category':<24} {'n':>5} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for title, stats in results["latency_ms"].items():
+        print(f"{title:<24} {stats['n']:>5} {stats['p50']:>8.2f} "
+              f"{stats['p95']:>8.2f} {stats['p99']:>8.2f}")
+    tp = results["throughput"]
+    print(f"\nthroughput: render {tp['render_per_s']:.0f}/s, "
+          f"render_batch {tp['render_batch_per_s']:.0f}/s, "
+          f"to_mathml_batch {tp['mathml_batch_per_s']:.0f}/s")
+    mem = results["memory"]
+    rss = mem["process_peak_rss_bytes"]
+    print(f"memory: QuickJS peak {mem['quickjs_peak_bytes'] / 2**20:.1f} MiB"
+          + (f", process peak RSS {rss / 2**20:.1f} MiB" if rss else ""))
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print changes against *baseline*; return *False* on a regression."""
+    if _get(baseline, ("meta", "bundle")) != results["meta"]["bundle"]:
+        print("\nnote: baseline was recorded with a different bundle")
+    print(f"\n{'metric':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+    ok = True
+    for path, higher_is_better in KEY_METRICS:
+        old, new = _get(baseline, path), _get(results, path)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > tolerance:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{'.'.join(path):<36} {old:>12.2f} {new:>12.2f} "
+              f"{change:>+8.1%}{flag}")
+    return ok
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed renders per formula (default: 5)")
+    parser.add_argument("--seconds", type=float, default=3.0,
+                        help="duration of each throughput run (default: 3)")
+    parser.add_argument("--init-runs", type=int, default=3,
+                        help="fresh renderers to time (default: 3)")
+    parser.add_argument("--output", type=Path,
+                        help="write the results as JSON to this file")
+    parser.add_argument("--baseline", type=Path,
+                        help="compare with results saved by --output")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed relative slowdown (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), "utf-8")
+        print(f"\nresults written to {args.output}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text("utf-8"))
+        if not compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,19 +3,35 @@ set -euo pipefail
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 RENDERER_DIR="$SCRIPT_DIR/renderer_src"
-OUT_FILE="$SCRIPT_DIR/quickjax/js/mathjax_bundle.js"
+JS_DIR="$SCRIPT_DIR/quickjax/js"
+OUT_FILE="$JS_DIR/mathjax_bundle.js"
+CORE_FILE="$JS_DIR/mathjax_core.js"
+FONTS_DIR="$JS_DIR/fonts"
+FASTPATH_FILE="$JS_DIR/fastpath.json"
 
 echo "==> Installing npm dependencies..."
 cd "$RENDERER_DIR"
 npm install --silent
 
+ESBUILD_FLAGS=(--bundle --minify --platform=browser --format=iife)
+
 echo "==> Building MathJax bundle with esbuild..."
-npx esbuild index.js \
-  --bundle \
-  --minify \
-  --platform=browser \
-  --format=iife \
-  --outfile="$OUT_FILE"
+npx esbuild index.js "${ESBUILD_FLAGS[@]}" --outfile="$OUT_FILE"
+
+echo "==> Building core bundle (fonts loaded on demand)..."
+npx esbuild index-core.js "${ESBUILD_FLAGS[@]}" --outfile="$CORE_FILE"
+rm -rf "$FONTS_DIR"
+node build_fonts.mjs "$FONTS_DIR"
+
+echo "==> Precomputing SVGs for trivial formulas..."
+rm -f "$FASTPATH_FILE"
+if (cd "$SCRIPT_DIR" && python -c "import quickjs" 2>/dev/null); then
+    (cd "$SCRIPT_DIR" && python -m quickjax.fastpath "$FASTPATH_FILE")
+else
+    echo "    quickjs is not installed; skipping (renders fall back to QuickJS)"
+fi
 
 SIZE=$(wc -c < "$OUT_FILE")
+CORE_SIZE=$(wc -c < "$CORE_FILE")
 echo "==> Bundle created: $OUT_FILE ($SIZE bytes)"
+echo "==> Core bundle created: $CORE_FILE ($CORE_SIZE bytes)"
@@ -2,6 +2,54 @@
 
 __version__ = "0.1.0"
 
-from .backend import MathJaxRenderError, MathJaxRenderer, render
+from .aio import AsyncMathJaxRenderer
+from .backend import (
+    MathJaxLimitError,
+    MathJaxRenderError,
+    MathJaxRenderer,
+    RenderResult,
+    ThreadSafeRenderer,
+    compress_svg,
+    configure,
+    render,
+    warm_up,
+)
+from .cache import DiskCache, RenderCache
+from .document import find_math, render_document, render_document_iter
+from .pool import MathJaxRendererPool
+from .sinks import (
+    DirectorySink,
+    HashedDirectorySink,
+    PackReader,
+    PackSink,
+    Sink,
+    TarSink,
+    ZipSink,
+)
 
-__all__ = ["MathJaxRenderError", "MathJaxRenderer", "render", "__version__"]
+__all__ = [
+    "AsyncMathJaxRenderer",
+    "DirectorySink",
+    "DiskCache",
+    "HashedDirectorySink",
+    "MathJaxLimitError",
+    "MathJaxRenderError",
+    "MathJaxRenderer",
+    "MathJaxRendererPool",
+    "PackReader",
+    "PackSink",
+    "RenderCache",
+    "RenderResult",
+    "Sink",
+    "TarSink",
+    "ThreadSafeRenderer",
+    "ZipSink",
+    "compress_svg",
+    "configure",
+    "find_math",
+    "render",
+    "render_document",
+    "render_document_iter",
+    "warm_up",
+    "__version__",
+]
@@ -0,0 +1,382 @@
+"""asyncio front end: await renders without blocking the event loop."""
+
+import asyncio
+import concurrent.futures as cf
+import contextlib
+import functools
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+from .backend import (
+    MathJaxRenderError,
+    MathJaxRenderer,
+    ThreadSafeRenderer,
+    _chunked,
+)
+from .pool import MathJaxRendererPool
+
+
+class AsyncMathJaxRenderer:
+    """Awaitable rendering for async web frameworks.
+
+    Renders run off the event loop, either on a :class:`ThreadSafeRenderer`
+    driven by a private thread pool (the default; QuickJS releases the GIL
+    while rendering) or on a :class:`MathJaxRendererPool` of worker
+    processes.  At most *max_concurrency* renders run at once; further calls
+    queue, and once *max_queue* calls are queued or running, new calls fail
+    fast with :class:`MathJaxRenderError` instead of piling up.
+
+    A call that is cancelled or times out before its render has started is
+    dropped from the queue.  One that has already started is released
+    immediately, but its render runs on to completion in the background
+    unless *render_timeout* stops it first.
+
+    Parameters
+    ----------
+    max_concurrency:
+        Number of contexts (threads) rendering in parallel.  Defaults to the
+        CPU count, or to the pool's worker count when *renderer* is a pool.
+    max_queue:
+        Maximum number of calls waiting or running at once.
+    timeout:
+        Default per-call timeout in seconds (*None* waits forever).
+    render_timeout:
+        Default QuickJS time limit in seconds for each chunk (*None* for
+        no limit).  QuickJS counts the CPU time of the whole process, so
+        with *max_concurrency* threads rendering it can fire up to that
+        many times early; an aborted context is discarded and rebuilt.
+        Each worker of a :class:`MathJaxRendererPool` is a process of its
+        own, so there the limit is exact.
+    renderer:
+        An existing :class:`ThreadSafeRenderer` or
+        :class:`MathJaxRendererPool` to render on.  It is not closed by
+        :meth:`close`.
+    **renderer_options:
+        Passed to each :class:`MathJaxRenderer` when *renderer* is not
+        given (e.g. ``cache=True``).
+
+    Usage::
+
+        renderer = AsyncMathJaxRenderer(max_concurrency=4)
+
+        async def handler(request):
+            svg = await renderer.arender(request.query["tex"], timeout=2)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        *,
+        max_queue: int = 1024,
+        timeout: float | None = None,
+        render_timeout: float | None = None,
+        renderer: ThreadSafeRenderer | MathJaxRendererPool | None = None,
+        **renderer_options,
+    ) -> None:
+        if renderer is None:
+            renderer = ThreadSafeRenderer(
+                max_concurrency,
+                factory=functools.partial(MathJaxRenderer, **renderer_options),
+            )
+        elif renderer_options:
+            raise TypeError(
+                "renderer_options cannot be combined with an explicit renderer"
+            )
+        self._renderer = renderer
+        self._executor: cf.ThreadPoolExecutor | None = None
+        if isinstance(renderer, MathJaxRendererPool):
+            self._max_concurrency = max_concurrency or renderer.workers
+        else:
+            self._max_concurrency = max_concurrency or renderer.max_contexts
+            self._executor = cf.ThreadPoolExecutor(
+                self._max_concurrency, thread_name_prefix="quickjax"
+            )
+        self._max_queue = max_queue
+        self._timeout = timeout
+        self._render_timeout = render_timeout
+        self._pending = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._closed = False
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    @property
+    def renderer(self) -> ThreadSafeRenderer | MathJaxRendererPool:
+        """The renderer that does the actual work."""
+        return self._renderer
+
+    async def arender(
+        self,
+        latex: str,
+        *,
+        display: bool = True,
+        timeout: float | None = None,
+        render_timeout: float | None = None,
+    ) -> str:
+        """Render *latex* to SVG without blocking the event loop.
+
+        Raises
+        ------
+        MathJaxRenderError
+            If the expression fails, the queue is full, or the render does
+            not finish within *timeout* seconds (defaults to the renderer's
+            *timeout*), or QuickJS aborts it after *render_timeout* seconds
+            of CPU time (defaults to the renderer's *render_timeout*).
+        """
+        (result,) = await self._run(
+            [latex], display, timeout, render_timeout
+        )
+        if isinstance(result, MathJaxRenderError):
+            raise result
+        return result
+
+    async def arender_batch(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+        timeout: float | None = None,
+        render_timeout: float | None = None,
+    ) -> list[str | MathJaxRenderError]:
+        """Render many expressions concurrently, in chunks.
+
+        Like :meth:`MathJaxRenderer.render_batch`, failed items hold a
+        :class:`MathJaxRenderError` instead of raising.  The batch takes one
+        place in the queue however many chunks it has, and at most
+        *max_concurrency* of them run at once.  *timeout* and
+        *render_timeout* apply to each chunk.  If a chunk fails or the
+        caller is cancelled, the chunks still pending are cancelled.
+        """
+        chunks = list(_chunked(latexes, chunksize))
+        limit = asyncio.Semaphore(self._max_concurrency)
+
+        async def run(chunk: list[str]) -> list[str | MathJaxRenderError]:
+            async with limit:
+                return await self._execute(
+                    chunk, display, timeout, render_timeout
+                )
+
+        with self._admit():
+            tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+            try:
+                results = await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+        return [item for chunk in results for item in chunk]
+
+    async def amap(
+        self,
+        latexes: Iterable[str] | AsyncIterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+        timeout: float | None = None,
+        render_timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Render *latexes*, yielding SVGs in input order (``async for``).
+
+        The input may be an async iterable.  Only a bounded window of chunks
+        is in flight at a time, so large or endless inputs are consumed
+        lazily.  The first failing expression raises
+        :class:`MathJaxRenderError` when it is reached.
+        """
+        window: list[asyncio.Task] = []
+        try:
+            async for chunk in _achunked(latexes, chunksize):
+                window.append(asyncio.ensure_future(
+                    self._run(chunk, display, timeout, render_timeout)
+                ))
+                if len(window) < 2 * self._max_concurrency:
+                    continue
+                for result in await window.pop(0):
+                    yield _unwrap(result)
+            while window:
+                for result in await window.pop(0):
+                    yield _unwrap(result)
+        finally:
+            for task in window:
+                task.cancel()
+
+    async def amap_unordered(
+        self,
+        latexes: Iterable[str] | AsyncIterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+        timeout: float | None = None,
+        render_timeout: float | None = None,
+    ) -> AsyncIterator[tuple[int, str]]:
+        """Like :meth:`amap`, but yield ``(index, svg)`` as renders finish."""
+        window: dict[asyncio.Task, int] = {}
+        start = 0
+        limit = 2 * self._max_concurrency
+        exhausted = False
+        chunks = _achunked(latexes, chunksize).__aiter__()
+        try:
+            while window or not exhausted:
+                while not exhausted and len(window) < limit:
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.ensure_future(
+                        self._run(chunk, display, timeout, render_timeout)
+                    )
+                    window[task] = start
+                    start += len(chunk)
+                if not window:
+                    break
+                done, _ = await asyncio.wait(
+                    window, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    offset = window.pop(task)
+                    for i, result in enumerate(task.result()):
+                        yield offset + i, _unwrap(result)
+        finally:
+            for task in window:
+                task.cancel()
+
+    def stats(self) -> dict[str, int]:
+        """Return queue counters.
+
+        ``pending`` is the number of calls currently queued or running;
+        ``rejected`` and ``timeouts`` count calls that failed for those
+        reasons.
+        """
+        return {
+            "max_concurrency": self._max_concurrency,
+            "pending": self._pending,
+            "rejected": self._rejected,
+            "timeouts": self._timeouts,
+        }
+
+    def close(self) -> None:
+        """Stop accepting work and drop queued renders.
+
+        Renders already running finish in the background.  A renderer
+        passed in by the caller is left open.
+        """
+        self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _submit(
+        self, items: list[str], display: bool, render_timeout: float | None
+    ) -> cf.Future:
+        if self._executor is None:
+            return self._renderer._submit_chunk(
+                items, display, render_timeout
+            )
+        return self._executor.submit(
+            self._renderer.render_batch,
+            items,
+            display=display,
+            chunk_size=len(items),
+            timeout=render_timeout,
+        )
+
+    @contextlib.contextmanager
+    def _admit(self) -> Iterator[None]:
+        """Hold one place in the queue, or fail fast if none is free."""
+        if self._closed:
+            raise MathJaxRenderError("AsyncMathJaxRenderer is closed")
+        if self._pending >= self._max_queue:
+            self._rejected += 1
+            raise MathJaxRenderError(
+                f"MathJax render queue is full ({self._max_queue} pending)"
+            )
+        self._pending += 1
+        try:
+            yield
+        finally:
+            self._pending -= 1
+
+    async def _run(
+        self,
+        items: list[str],
+        display: bool,
+        timeout: float | None,
+        render_timeout: float | None,
+    ) -> list[str | MathJaxRenderError]:
+        with self._admit():
+            return await self._execute(
+                items, display, timeout, render_timeout
+            )
+
+    async def _execute(
+        self,
+        items: list[str],
+        display: bool,
+        timeout: float | None,
+        render_timeout: float | None,
+    ) -> list[str | MathJaxRenderError]:
+        timeout = self._timeout if timeout is None else timeout
+        if render_timeout is None:
+            render_timeout = self._render_timeout
+        # Cancelling the wrapper (timeout or caller cancellation) also
+        # cancels the underlying future if it has not started yet.  One
+        # that has started keeps its context until it finishes or hits
+        # *render_timeout*.  The wall-clock *timeout* is not passed on:
+        # QuickJS counts process CPU time, so under concurrency it would
+        # abort renders early and throw their contexts away.
+        future = asyncio.wrap_future(
+            self._submit(items, display, render_timeout)
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise MathJaxRenderError(
+                f"MathJax render timed out after {timeout}s"
+            ) from None
+
+    # ------------------------------------------------------------------ #
+    # Context-manager support
+    # ------------------------------------------------------------------ #
+
+    async def __aenter__(self) -> "AsyncMathJaxRenderer":
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} max_concurrency="
+            f"{self._max_concurrency} pending={self._pending}"
+            f"/{self._max_queue}>"
+        )
+
+
+def _unwrap(result: str | MathJaxRenderError) -> str:
+    if isinstance(result, MathJaxRenderError):
+        raise result
+    return result
+
+
+async def _achunked(
+    items: Iterable[str] | AsyncIterable[str], size: int
+) -> AsyncIterator[list[str]]:
+    """Async counterpart of :func:`quickjax.backend._chunked`."""
+    if not isinstance(items, AsyncIterable):
+        for chunk in _chunked(items, size):
+            yield chunk
+        return
+    chunk: list[str] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -1,51 +1,373 @@
 """QuickJax: Zero-dependency MathJax v4 renderer powered by QuickJS."""
 
+import collections
+import concurrent.futures as cf
+import functools
+import gzip
+import hashlib
 import json
 import os
+import re
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal
 
 import quickjs
 
+from .cache import DiskCache, RenderCache
+from .fastpath import load_table
+
+
+# Message the JS side throws when MathJax asked for a font file that is still
+# being set up (on-demand fonts); the render is retried after running the
+# pending JS jobs.
+_JS_RETRY = "Error: MathJax retry"
+# Each retry loads at least one more of the 26 dynamic font files.
+_MAX_RETRIES = 32
+# QuickJS's message when a context reaches its memory limit.  When not even
+# the error object can be allocated, it throws null instead.
+_JS_OOM = "out of memory"
+_JS_OOM_NULL = "null"
+# Renders between heap checks when recycling on heap size.
+_HEAP_CHECK_INTERVAL = 16
+# QuickJS raises its own failures as InternalError (renderer.js passes
+# them on unwrapped); these are its messages when a call exceeds its time
+# limit or the stack size.
+_JS_INTERNAL = "InternalError: "
+_JS_INTERRUPTED = "interrupted"
+_JS_STACK_OVERFLOW = "stack overflow"
+
 
 class MathJaxRenderError(Exception):
     """Raised when MathJax fails to render a LaTeX expression."""
     pass
 
 
+class MathJaxLimitError(MathJaxRenderError):
+    """Raised when an expression exceeds a time or complexity limit."""
+    pass
+
+
 class MathJaxRenderer:
     """MathJax v4 SVG renderer backed by an embedded QuickJS engine.
 
-    The bundled MathJax JavaScript is loaded once on initialization.
+    The bundled MathJax JavaScript is loaded once, on the first render that
+    is not served from a cache (or eagerly via :meth:`warm_up`).
     Subsequent ``render`` calls reuse the same JS context for speed.
 
     Usage::
 
         renderer = MathJaxRenderer()
         svg = renderer.render(r"E = mc^2")
-    """
 
-    _JS_BUNDLE = Path(__file__).parent / "js" / "mathjax_bundle.js"
+    Parameters
+    ----------
+    cache:
+        Optional :class:`~quickjax.cache.RenderCache` consulted before
+        rendering (``True`` creates one with default limits).  Repeated
+        expressions are then returned without entering the JS engine.
+    disk_cache:
+        Optional persistent :class:`~quickjax.cache.DiskCache`, consulted
+        after *cache*.  Its keys include the bundle fingerprint, so entries
+        written by a different MathJax build are never returned.
+    fastpath:
+        Look single symbols and other trivial inputs (``x``, ``2``,
+        ``\\alpha``, ``x^2``; see :mod:`quickjax.fastpath`) up in the table
+        of SVGs precomputed when the bundle was built, before any cache, so
+        they never enter the JS engine.  The table only applies to the
+        default configuration: any of the options below except *fonts* and
+        the limits turns it off, as does a table built for another bundle.
+        A render that defines macros (``\\newcommand``, ``\\def``, ...)
+        turns it off until :meth:`reset` or :meth:`close`.
+    fonts:
+        ``"eager"`` (default) loads the full bundle with every dynamic font
+        file (~3 MB of glyph data) at start-up.  ``"lazy"`` loads the core
+        bundle instead and evaluates a font file (from ``js/fonts/``) only
+        when a formula first needs it, which makes contexts much cheaper to
+        create and smaller in memory.  Falls back to ``"eager"`` if the core
+        bundle has not been built.
+    compact:
+        Shrink the SVG markup: drop ``data-*`` annotations, unwrap the
+        attribute-less groups they leave behind and squeeze whitespace in
+        path data.  The rendering is unchanged.
+    precision:
+        Round coordinates (path data, transforms, viewBox) to this many
+        decimal places.  *None* (default) keeps MathJax's full precision.
+    metrics:
+        Instrument :meth:`render` and :meth:`render_batch`.  ``True`` keeps
+        running totals, returned by :meth:`stats`; a callable is
+        additionally called with one event dict per call (see
+        :meth:`stats` for the fields), e.g. to feed Prometheus or StatsD.
+        The callable runs on the rendering thread and must not raise.
+        Without *metrics* (the default) nothing is timed.
+    recycle_after:
+        Replace the QuickJS context after this many renders.
+    max_heap:
+        Replace the QuickJS context once its heap (``malloc_size`` in
+        :meth:`memory_usage`, checked every few renders) reaches this many
+        bytes; keep it well below the 128 MB limit.
 
-    def __init__(self) -> None:
-        js_code = self._JS_BUNDLE.read_text(encoding="utf-8")
+        With either option, a replacement context is built on a helper
+        thread while the old one keeps serving renders, and swapped in once
+        it is ready (never while a :meth:`font_scope` is open).  Regardless
+        of them, a render that exhausts the context's memory is retried
+        once on a fresh context.
+    timeout:
+        Default time limit in seconds for each call into QuickJS (see
+        :meth:`render`).
+    max_length:
+        Reject expressions longer than this many characters.
+    max_depth:
+        Reject expressions nested deeper than this: braces, ``\\left`` /
+        ``\\right`` and ``\\begin`` / ``\\end`` pairs each count as one
+        level.  Length and depth are checked before anything reaches
+        QuickJS; a violation raises :class:`MathJaxLimitError`.
+    packages:
+        TeX packages to enable, replacing the default list of 23 (see
+        ``renderer_src/renderer.js``).  Fewer packages make contexts
+        quicker to create.
+    svg_options:
+        Options for MathJax's SVG output jax, merged over QuickJax's
+        defaults (``{"fontCache": "local", "linebreaks": {"inline":
+        False}}``).
+    macros:
+        TeX macros, as in MathJax's ``tex.macros`` option: ``{"R":
+        r"\\mathbb{R}", "norm": [r"\\left\\|#1\\right\\|", 1]}``.
+    preamble:
+        TeX source compiled once per context, before any render, e.g. a
+        block of ``\\newcommand`` definitions.  Its definitions apply to
+        every render without being parsed again.
 
-        self._ctx = quickjs.Context()
-        # Give QuickJS enough room for the ~1.2 MB MathJax bundle
-        self._ctx.set_max_stack_size(4 * 1024 * 1024)   # 4 MB stack
-        self._ctx.set_memory_limit(128 * 1024 * 1024)    # 128 MB heap
+    All of these options are part of the cache keys.  Renderers created
+    with the same options pass their contexts on through :meth:`close`.
+    """
 
-        try:
-            self._ctx.eval(js_code)
-        except Exception as exc:
-            raise MathJaxRenderError(
-                f"Failed to initialize MathJax JS context: {exc}"
-            ) from exc
+    _JS_BUNDLE = Path(__file__).parent / "js" / "mathjax_bundle.js"
+    _JS_CORE_BUNDLE = Path(__file__).parent / "js" / "mathjax_core.js"
+    _JS_FONTS = Path(__file__).parent / "js" / "fonts"
+    _FASTPATH = Path(__file__).parent / "js" / "fastpath.json"
+
+    def __init__(
+        self,
+        *,
+        cache: RenderCache | bool | None = None,
+        disk_cache: DiskCache | None = None,
+        fastpath: bool = True,
+        fonts: str = "eager",
+        compact: bool = False,
+        precision: int | None = None,
+        metrics: bool | Callable[[dict], None] = False,
+        recycle_after: int | None = None,
+        max_heap: int | None = None,
+        timeout: float | None = None,
+        max_length: int | None = None,
+        max_depth: int | None = None,
+        packages: Iterable[str] | None = None,
+        svg_options: dict | None = None,
+        macros: dict[str, str | list] | None = None,
+        preamble: str | None = None,
+    ) -> None:
+        if fonts not in ("eager", "lazy"):
+            raise ValueError(f"fonts must be 'eager' or 'lazy', not {fonts!r}")
+        if precision is not None and not 0 <= precision <= 10:
+            raise ValueError(
+                f"precision must be between 0 and 10 or None, not {precision}"
+            )
+        self._lazy_fonts = fonts == "lazy" and self._JS_CORE_BUNDLE.exists()
+        self._bundle = (
+            self._JS_CORE_BUNDLE if self._lazy_fonts else self._JS_BUNDLE
+        )
+        self._cache = _make_cache(cache)
+        self._disk_cache = disk_cache
+        # Everything besides (latex, display) that affects the output; part
+        # of every cache key.  Defaults are left out so caches written
+        # before an option existed stay valid.
+        self._output_options = {"compact": compact, "precision": precision}
+        # MathJax configuration, applied before the bundle is evaluated.
+        self._config = {
+            name: value
+            for name, value in (
+                ("packages", None if packages is None else list(packages)),
+                ("svg", svg_options),
+                ("macros", macros),
+                ("preamble", preamble or None),
+            )
+            if value is not None
+        }
+        self._options: tuple = tuple(
+            (name, value)
+            for name, value in self._output_options.items()
+            if value is not None and value is not False
+        ) + tuple(
+            (name, json.dumps(value, sort_keys=True))
+            for name, value in self._config.items()
+        )
+        # Precomputed SVGs, valid only for the default configuration and
+        # while the context holds no macros defined by a render.
+        self._fastpath_table: dict[bool, dict[str, str]] | None = None
+        if fastpath and not self._options:
+            self._fastpath_table = load_table(self._FASTPATH)
+        self._fastpath = self._fastpath_table
+        self._ctx: quickjs.Context | None = None
+        self._functions: dict[str, quickjs.Object] = {}
+        self._pending: cf.Future | None = None
+        self._init_time: float | None = None
+        self._scope: FontScope | None = None
+        self._recycle_after = recycle_after
+        self._max_heap = max_heap
+        self._recycling = recycle_after is not None or max_heap is not None
+        self._renders = 0
+        self._recycles = 0
+        self._timeout = timeout
+        self._max_length = max_length
+        self._max_depth = max_depth
+        # Contexts built for an equal key are interchangeable (see close()).
+        self._context_key = (
+            self._bundle, self._lazy_fonts, bool(metrics), self._options
+        )
+        self._event: dict | None = None
+        self._totals: dict[str, float] | None = None
+        self._metrics_hook = metrics if callable(metrics) else None
+        if metrics:
+            self._totals = dict.fromkeys(_TOTAL_FIELDS, 0)
+            self._instrument()
 
     # ------------------------------------------------------------------ #
     # Public API
     # ------------------------------------------------------------------ #
 
-    def render(self, latex: str, *, display: bool = True) -> str:
+    def warm_up(self, *, background: bool = False) -> None:
+        """Create the QuickJS context and evaluate the bundle now.
+
+        Otherwise this happens on the first render that misses the caches.
+
+        With ``background=True`` the bundle is evaluated on a helper thread
+        and this call returns immediately.  QuickJS releases the GIL while
+        evaluating, so start-up work in the caller (argument parsing,
+        reading inputs, ...) overlaps with the ~0.3 s initialization; the
+        first render waits for it to finish.
+        """
+        if not background:
+            self._context()
+            return
+        if self._ctx is not None or self._pending is not None:
+            return
+        self._build_in_background("quickjax-warm-up")
+
+    def reset(self) -> None:
+        """Forget macros and labels defined by earlier renders.
+
+        ``\\newcommand``/``\\def`` definitions and ``\\label`` tags persist
+        in a context from one render to the next.  This returns the context
+        to its freshly initialized TeX state in milliseconds, without
+        building a new one, e.g. to isolate tenants sharing a renderer.
+
+        A render that defines a macro turns the *fastpath* table off, since
+        a symbol in it may have been redefined; this turns it back on.  The
+        render caches are keyed by expression only and are left as they
+        are; do not share them between tenants whose formulas define
+        macros.
+        """
+        self._check_no_scope()
+        if self._ctx is not None:
+            self._function("reset")()
+        self._fastpath = self._fastpath_table
+
+    def close(self) -> None:
+        """Release the QuickJS context for reuse.
+
+        The context is :meth:`reset` and kept (a few per configuration, and
+        a few more in all, dropping those of the least recently used
+        configurations first) for the next renderer created with the same
+        options, which then starts without evaluating the bundle.  This
+        renderer stays usable and gets a context again on its next render.
+        Called on leaving a ``with`` block.
+        """
+        self._check_no_scope()
+        ctx, self._ctx = self._ctx, None
+        self._functions = {}
+        self._fastpath = self._fastpath_table
+        if ctx is None:
+            return
+        try:
+            ctx.get("reset")()
+            heap = ctx.memory()["malloc_size"]
+        except Exception:
+            return  # never hand on a broken context
+        if self._max_heap is not None and heap >= self._max_heap:
+            return
+        with _SPARE_LOCK:
+            spares = _SPARE_CONTEXTS.setdefault(self._context_key, [])
+            _SPARE_CONTEXTS.move_to_end(self._context_key)
+            if len(spares) >= _MAX_SPARE_CONTEXTS:
+                return
+            spares.append(ctx)
+            total = sum(map(len, _SPARE_CONTEXTS.values()))
+            while total > _MAX_SPARE_TOTAL:
+                key, oldest = next(iter(_SPARE_CONTEXTS.items()))
+                oldest.pop(0)
+                if not oldest:
+                    del _SPARE_CONTEXTS[key]
+                total -= 1
+
+    @property
+    def init_time(self) -> float | None:
+        """Seconds spent creating the current QuickJS context, if created."""
+        return self._init_time
+
+    @property
+    def recycle_count(self) -> int:
+        """Number of times the QuickJS context has been replaced."""
+        return self._recycles
+
+    def memory_usage(self) -> dict[str, int]:
+        """Return QuickJS heap statistics for this renderer's context.
+
+        The keys are those of ``quickjs.Context.memory()`` (``malloc_size``,
+        ``memory_used_size``, ``obj_count``, ...).  Empty until the context
+        has been created.
+        """
+        if self._ctx is None:
+            return {}
+        return self._ctx.memory()
+
+    def stats(self) -> dict[str, float]:
+        """Return the instrumentation totals (empty without *metrics*).
+
+        ``calls`` counts :meth:`render` and :meth:`render_batch` calls and
+        ``renders`` the expressions they were given; ``cache_hits``,
+        ``errors``, ``input_chars`` (LaTeX) and ``output_chars`` (SVG) are
+        per expression.  The ``time_*`` entries are cumulative seconds per
+        phase:
+
+        ``lookup`` / ``store``
+            Render cache and disk cache access.
+        ``js``
+            Wall time of the calls into QuickJS, which includes:
+        ``parse``
+            TeX to MathML, inside QuickJS.
+        ``layout``
+            MathML to SVG layout, inside QuickJS.
+        ``serialize``
+            SVG tree to markup, inside QuickJS.
+        ``total``
+            The whole call.
+
+        The events passed to a *metrics* callable carry the same numbers
+        for a single call (without the ``time_`` prefix), plus ``kind``
+        (``"render"`` or ``"render_batch"``), ``display`` and ``count``.
+        """
+        return dict(self._totals) if self._totals is not None else {}
+
+    def render(
+        self,
+        latex: str,
+        *,
+        display: bool = True,
+        timeout: float | None = None,
+    ) -> str:
         """Render a LaTeX string to SVG markup.
 
         Parameters
@@ -54,6 +376,12 @@ class MathJaxRenderer:
             The LaTeX expression (without surrounding ``$`` delimiters).
         display:
             If *True* (default), render in display mode; otherwise inline.
+        timeout:
+            Abort the render after this many seconds (defaults to the
+            renderer's *timeout*).  QuickJS measures CPU time of the whole
+            process, so with several threads rendering at once the limit is
+            reached early rather than late.  The aborted context is
+            discarded and a new one is built in the background.
 
         Returns
         -------
@@ -62,26 +390,804 @@ class MathJaxRenderer:
 
         Raises
         ------
+        MathJaxLimitError
+            If the expression exceeds *timeout*, *max_length* or
+            *max_depth*, or overflows the QuickJS stack.
         MathJaxRenderError
             If MathJax cannot parse / render the expression.
         """
-        escaped = json.dumps(latex)  # produces a safe JS string literal
-        func = "render" if display else "renderInline"
-        js_expr = f"globalThis.{func}({escaped})"
+        self._check_no_scope()
+        return self._convert_one("svg", latex, display, timeout)
+
+    def render_batch(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunk_size: int = 256,
+        timeout: float | None = None,
+    ) -> list[str | MathJaxRenderError]:
+        """Render many LaTeX strings with one JS round-trip per chunk.
+
+        Unlike :meth:`render`, a failing expression does not raise: its slot
+        in the returned list holds the :class:`MathJaxRenderError` instead,
+        and the rest of the batch is still rendered.  Cached expressions are
+        served from the caches; only the misses reach QuickJS, in chunks of
+        at most *chunk_size* to bound the size of each call.
+
+        *timeout* limits each chunk.  A chunk that exceeds it is rendered
+        again one expression at a time, each with *timeout*, so only the
+        slow expressions fail (with :class:`MathJaxLimitError`).
+
+        Returns
+        -------
+        list
+            One entry per input, in input order: the SVG string, or the
+            :class:`MathJaxRenderError` for that input.
+        """
+        self._check_no_scope()
+        return self._convert_many(
+            "svg", latexes, display, chunk_size, timeout
+        )
+
+    def to_mathml(
+        self,
+        latex: str,
+        *,
+        display: bool = True,
+        timeout: float | None = None,
+    ) -> str:
+        """Convert *latex* to a MathML ``<math>`` element.
+
+        Stops after TeX parsing, so no layout or glyph data is involved:
+        much cheaper than :meth:`render`.  Cached like :meth:`render`.
+        """
+        self._check_no_scope()
+        return self._convert_one("mathml", latex, display, timeout)
+
+    def to_mathml_batch(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunk_size: int = 256,
+        timeout: float | None = None,
+    ) -> list[str | MathJaxRenderError]:
+        """Batch form of :meth:`to_mathml` (see :meth:`render_batch`)."""
+        self._check_no_scope()
+        return self._convert_many(
+            "mathml", latexes, display, chunk_size, timeout
+        )
+
+    def render_mathml(
+        self,
+        mathml: str,
+        *,
+        display: bool | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        """Render a MathML ``<math>`` element to SVG markup.
+
+        With *display* left as *None*, display mode follows the element's
+        ``display="block"`` attribute.  Cached like :meth:`render`.
+        """
+        self._check_no_scope()
+        return self._convert_one("mathml-svg", mathml, display, timeout)
 
+    def render_mathml_batch(
+        self,
+        mathmls: Iterable[str],
+        *,
+        display: bool | None = None,
+        chunk_size: int = 256,
+        timeout: float | None = None,
+    ) -> list[str | MathJaxRenderError]:
+        """Batch form of :meth:`render_mathml` (see :meth:`render_batch`)."""
+        self._check_no_scope()
+        return self._convert_many(
+            "mathml-svg", mathmls, display, chunk_size, timeout
+        )
+
+    def render_ex(
+        self,
+        latex: str,
+        *,
+        display: bool = True,
+        timeout: float | None = None,
+    ) -> "RenderResult":
+        """Render *latex* and return the SVG together with its metrics.
+
+        The metrics are the ones MathJax computed for the ``width``,
+        ``height`` and ``vertical-align`` of the root ``<svg>``, so they
+        need not be parsed back out of the markup.  Cache hits are served
+        from the caches as in :meth:`render`.
+        """
+        self._check_no_scope()
+        svg = self._lookup(latex, display)
+        if svg is not None:
+            return RenderResult(svg, *_svg_metrics(svg))
+        data = json.loads(
+            self._call("renderEx", latex, display, timeout=timeout)
+        )
+        self._store(latex, display, data["svg"])
+        return RenderResult(
+            data["svg"], data["width"], data["height"], data["depth"]
+        )
+
+    def measure(
+        self,
+        latex: str,
+        *,
+        display: bool = True,
+        timeout: float | None = None,
+    ) -> "RenderResult":
+        """Lay out *latex* and return only its metrics.
+
+        The SVG is never serialized (:attr:`RenderResult.svg` is *None*),
+        which makes this cheaper than :meth:`render_ex` for passes that
+        only need sizes.  Measurements are not cached.
+        """
+        self._check_no_scope()
+        data = json.loads(
+            self._call("measure", latex, display, timeout=timeout)
+        )
+        return RenderResult(None, data["width"], data["height"], data["depth"])
+
+    def render_compressed(
+        self,
+        latex: str,
+        *,
+        display: bool = True,
+        encoding: str = "gzip",
+    ) -> bytes:
+        """Render *latex* and return the SVG compressed for serving as-is.
+
+        *encoding* is ``"gzip"`` or ``"br"`` (the HTTP ``Content-Encoding``
+        names); brotli needs the optional ``brotli`` package.  The output is
+        deterministic, so it can be cached or hashed for ETags.
+        """
+        return compress_svg(self.render(latex, display=display), encoding)
+
+    def render_iter(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunk_size: int = 256,
+        timeout: float | None = None,
+    ) -> Iterator[str | MathJaxRenderError]:
+        """Lazily render an iterable of any length, in input order.
+
+        Inputs are pulled and rendered *chunk_size* at a time (see
+        :meth:`render_batch`), so memory use does not grow with the input.
+        As with :meth:`render_batch`, a failing expression yields its
+        :class:`MathJaxRenderError` instead of ending the stream.
+        """
+        for chunk in _chunked(latexes, max(1, chunk_size)):
+            try:
+                yield from self.render_batch(
+                    chunk,
+                    display=display,
+                    chunk_size=chunk_size,
+                    timeout=timeout,
+                )
+            except MathJaxRenderError as exc:
+                yield from [exc] * len(chunk)
+
+    @contextmanager
+    def font_scope(self) -> Iterator["FontScope"]:
+        """Render a group of formulas that share one set of glyph definitions.
+
+        Inside the ``with`` block, SVGs rendered through the yielded
+        :class:`FontScope` reference glyphs with ``<use href="#...">``
+        instead of each carrying its own ``<defs>``; :meth:`FontScope.defs`
+        returns a single deduplicated definitions block to place once on
+        the page.  This renderer's own :meth:`render` is unavailable until
+        the scope closes.
+
+        Usage::
+
+            with renderer.font_scope() as scope:
+                svgs = [scope.render(tex) for tex in page_formulas]
+                defs = scope.defs()
+            html = defs + "".join(svgs)
+        """
+        self._check_no_scope()
+        self._function("beginFontScope")()
+        scope = self._scope = FontScope(self)
         try:
-            result = self._ctx.eval(js_expr)
+            yield scope
+        finally:
+            try:
+                scope._final_defs = self._function("endFontScope")()
+            finally:
+                self._scope = None
+
+    @property
+    def cache(self) -> RenderCache | None:
+        """The in-memory render cache in use, if any."""
+        return self._cache
+
+    @property
+    def disk_cache(self) -> DiskCache | None:
+        """The persistent render cache in use, if any."""
+        return self._disk_cache
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _context(self) -> quickjs.Context:
+        if self._ctx is None:
+            pending, self._pending = self._pending, None
+            if pending is not None:
+                self._use(pending.result())
+            else:
+                self._use(self._spare_context() or self._create_context())
+        elif (
+            self._pending is not None
+            and self._pending.done()
+            and self._scope is None
+        ):
+            self._swap()
+        return self._ctx
+
+    def _use(self, ctx: quickjs.Context) -> None:
+        self._ctx = ctx
+        self._functions = {}
+        self._renders = 0
+
+    def _spare_context(self) -> quickjs.Context | None:
+        """Take a context another renderer with this configuration closed."""
+        start = time.perf_counter()
+        with _SPARE_LOCK:
+            spares = _SPARE_CONTEXTS.get(self._context_key)
+            if not spares:
+                return None
+            ctx = spares.pop()
+            if spares:
+                _SPARE_CONTEXTS.move_to_end(self._context_key)
+            else:
+                del _SPARE_CONTEXTS[self._context_key]
+        self._init_time = time.perf_counter() - start
+        return ctx
+
+    def _build_in_background(self, name: str) -> None:
+        future: cf.Future = cf.Future()
+
+        def _build() -> None:
+            try:
+                future.set_result(self._create_context())
+            except BaseException as exc:
+                future.set_exception(exc)
+
+        self._pending = future
+        threading.Thread(target=_build, name=name, daemon=True).start()
+
+    # ------------------------------------------------------------------ #
+    # Context recycling
+    # ------------------------------------------------------------------ #
+
+    def _count_renders(self, count: int) -> None:
+        """Start building a replacement context once one is due."""
+        before = self._renders
+        self._renders += count
+        if self._pending is not None or self._scope is not None:
+            return
+        if (
+            self._recycle_after is not None
+            and self._renders >= self._recycle_after
+        ):
+            self._build_in_background("quickjax-recycle")
+        elif (
+            self._max_heap is not None
+            and before // _HEAP_CHECK_INTERVAL
+            < self._renders // _HEAP_CHECK_INTERVAL
+            and self._ctx.memory()["malloc_size"] >= self._max_heap
+        ):
+            self._build_in_background("quickjax-recycle")
+
+    def _swap(self) -> None:
+        """Switch to the context built in the background."""
+        pending, self._pending = self._pending, None
+        try:
+            ctx = pending.result()
+        except MathJaxRenderError:
+            # Keep serving from the old context; retry after another
+            # interval.
+            self._renders = 0
+            return
+        self._use(ctx)
+        self._recycles += 1
+
+    def _recover(self) -> bool:
+        """Replace a context that ran out of memory; return *True* if done.
+
+        Callers check for the failure with :func:`_engine_error` first.
+        Waits for a replacement already being built, if any.  Not done
+        inside a font scope, whose glyphs live in the old context.
+        """
+        if self._scope is not None:
+            return False
+        self._ctx = None
+        self._context()
+        self._recycles += 1
+        return True
+
+    def _discard_context(self) -> None:
+        """Drop a context aborted mid-render; start building a new one.
+
+        Not done inside a font scope, whose glyphs live in the context.
+        """
+        if self._scope is not None:
+            return
+        self._ctx = None
+        self._recycles += 1
+        if self._pending is None:
+            self._build_in_background("quickjax-replace")
+
+    # ------------------------------------------------------------------ #
+    # Limits
+    # ------------------------------------------------------------------ #
+
+    def _check_limits(self, latex: str) -> None:
+        if self._max_length is not None and len(latex) > self._max_length:
+            raise MathJaxLimitError(
+                f"Input is {len(latex)} characters long; the limit is "
+                f"{self._max_length}"
+            )
+        if self._max_depth is not None:
+            depth = _nesting_depth(latex)
+            if depth > self._max_depth:
+                raise MathJaxLimitError(
+                    f"Input is nested {depth} levels deep; the limit is "
+                    f"{self._max_depth}"
+                )
+
+    def _invoke(
+        self, func: quickjs.Object, timeout: float | None, *args: object
+    ):
+        """Call *func*, aborting it after *timeout* seconds of CPU time."""
+        if timeout is None:
+            return func(*args)
+        ctx = self._ctx
+        ctx.set_time_limit(timeout)
+        try:
+            return func(*args)
+        finally:
+            ctx.set_time_limit(-1)
+
+    def _limit_error(
+        self, latex: str, reason: str | None, timeout: float | None
+    ) -> MathJaxLimitError | None:
+        """Translate a QuickJS time limit or stack overflow, if it is one.
+
+        *reason* comes from :func:`_engine_error`, or *None* for errors
+        raised by MathJax.  A context interrupted by its time limit may be
+        left mid-way through a conversion, so it is replaced.
+        """
+        if reason == _JS_INTERRUPTED:
+            self._discard_context()
+            reason = f"timed out after {timeout}s"
+        elif reason == _JS_STACK_OVERFLOW:
+            reason = "nested too deeply (stack overflow)"
+        else:
+            return None
+        return MathJaxLimitError(
+            f"MathJax render failed for input {json.dumps(latex)}: {reason}"
+        )
+
+    def _create_context(self) -> quickjs.Context:
+        start = time.perf_counter()
+        js_code = _read_bundle(self._bundle)
+
+        ctx = quickjs.Context()
+        if self._config:
+            ctx.set("quickjaxConfig", json.dumps(self._config))
+        # Give QuickJS enough room for the ~1.2 MB MathJax bundle
+        ctx.set_max_stack_size(4 * 1024 * 1024)   # 4 MB stack
+        ctx.set_memory_limit(128 * 1024 * 1024)    # 128 MB heap
+        if self._lazy_fonts:
+            # Not a bound method: a context may outlive its renderer (see
+            # close()).
+            ctx.add_callable(
+                "quickjaxLoadFont",
+                functools.partial(_load_font_source, self._JS_FONTS),
+            )
+        if self._totals is not None:
+            # Enables the per-phase timers in the bundle (see takeTimings()).
+            ctx.add_callable("quickjaxClock", _clock_ms)
+
+        try:
+            ctx.eval(js_code)
+            if self._options:
+                ctx.get("setOutputOptions")(json.dumps(self._output_options))
         except Exception as exc:
             raise MathJaxRenderError(
-                f"MathJax render failed for input {escaped}: {exc}"
+                f"Failed to initialize MathJax JS context: {exc}"
             ) from exc
+        self._init_time = time.perf_counter() - start
+        return ctx
+
+    def _run_pending_jobs(self) -> None:
+        # The context the retried function belongs to; never swapped here.
+        ctx = self._ctx
+        while ctx.execute_pending_job():
+            pass
+
+    def _function(self, name: str) -> quickjs.Object:
+        """Return the global JS function *name*, looked up once per context.
+
+        Calling the function object directly passes arguments as values, so
+        no JS source has to be built, parsed and compiled per call.
+        """
+        ctx = self._context()
+        func = self._functions.get(name)
+        if func is None:
+            func = self._functions[name] = ctx.get(name)
+        return func
+
+    def _check_no_scope(self) -> None:
+        if self._scope is not None:
+            raise MathJaxRenderError(
+                "A font scope is open on this renderer; render through the "
+                "FontScope object until it is closed"
+            )
+
+    def _instrument(self) -> None:
+        """Wrap the entry points and their phases with timers.
+
+        The wrappers are instance attributes, so renderers created without
+        *metrics* run the plain methods with no per-call checks.
+        """
+        self._lookup = self._timed("lookup", self._lookup, hits=True)
+        self._store = self._timed("store", self._store)
+        self._render = self._timed("js", self._render)
+        self._render_many = self._timed("js", self._render_many)
+        self.render = self._reported("render", self.render)
+        self.render_batch = self._reported("render_batch", self.render_batch)
+
+    def _timed(self, phase: str, method: Callable, hits: bool = False):
+        def timed(*args, **kwargs):
+            event = self._event
+            if event is None:
+                return method(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            finally:
+                event[phase] += time.perf_counter() - start
+            if hits and result is not None:
+                event["cache_hits"] += 1
+            return result
+
+        return timed
+
+    def _reported(self, kind: str, method: Callable):
+        batch = kind == "render_batch"
+
+        @functools.wraps(method)
+        def reported(latex, **kwargs):
+            if self._event is not None:
+                return method(latex, **kwargs)
+            items = list(latex) if batch else [latex]
+            event = self._event = {
+                "kind": kind,
+                "display": kwargs.get("display", True),
+                **dict.fromkeys(_EVENT_FIELDS, 0),
+            }
+            event["count"] = len(items)
+            event["input_chars"] = sum(map(len, items))
+            start = time.perf_counter()
+            recycles = self._recycles
+            results: list = []
+            succeeded = False
+            try:
+                result = method(items if batch else latex, **kwargs)
+                results = result if batch else [result]
+                succeeded = True
+                return result
+            except MathJaxRenderError:
+                event["errors"] = len(items)
+                raise
+            finally:
+                self._event = None
+                for result in results:
+                    if isinstance(result, str):
+                        event["output_chars"] += len(result)
+                    else:
+                        event["errors"] += 1
+                if event["js"] and self._ctx is not None:
+                    # The phase timers of a failed call, or of one that
+                    # replaced its context midway, are cleared unreported.
+                    same = succeeded and self._recycles == recycles
+                    self._take_timings(event if same else None)
+                event["total"] = time.perf_counter() - start
+                self._report(event)
+
+        return reported
+
+    def _take_timings(self, event: dict | None) -> None:
+        """Read and clear the bundle's phase timers, into *event* if given.
+
+        Never raises, so a broken context cannot mask the outcome of the
+        render that is being reported.
+        """
+        try:
+            phases = json.loads(self._ctx.get("takeTimings")())
+        except Exception:
+            return
+        if event is not None:
+            for phase, ms in phases.items():
+                event[phase] = ms / 1000
+
+    def _report(self, event: dict) -> None:
+        totals = self._totals
+        totals["calls"] += 1
+        totals["renders"] += event["count"]
+        for name in _COUNTERS:
+            totals[name] += event[name]
+        for phase in _PHASES:
+            totals["time_" + phase] += event[phase]
+        if self._metrics_hook is not None:
+            self._metrics_hook(event)
+
+    def _cache_options(self, kind: str) -> tuple:
+        """Cache key options for output *kind* (SVG keys stay unchanged)."""
+        if kind == "svg":
+            return self._options
+        return self._options + (("output", kind),)
+
+    def _disk_options(self, kind: str = "svg") -> tuple:
+        return (bundle_fingerprint(self._bundle), self._cache_options(kind))
+
+    def _note_definitions(self, latexes: Iterable[str]) -> None:
+        """Turn the fast path off before *latexes* may redefine a symbol."""
+        if self._fastpath is not None and any(
+            _DEFINITION.search(latex) for latex in latexes
+        ):
+            self._fastpath = None
+
+    def _lookup(
+        self, latex: str, display: bool, kind: str = "svg"
+    ) -> str | None:
+        """Return a precomputed or cached SVG for *latex*, or *None*."""
+        if kind == "svg" and self._fastpath is not None:
+            svg = self._fastpath[bool(display)].get(latex)
+            if svg is not None:
+                return svg
+        svg = None
+        options = self._cache_options(kind)
+        if self._cache is not None:
+            svg = self._cache.get(self._cache.key(latex, display, options))
+        if svg is None and self._disk_cache is not None:
+            disk = self._disk_cache
+            svg = disk.get(
+                disk.key(latex, display, self._disk_options(kind))
+            )
+            if svg is not None and self._cache is not None:
+                self._cache.put(
+                    self._cache.key(latex, display, options), svg
+                )
+        return svg
+
+    def _store(
+        self, latex: str, display: bool, svg: str, kind: str = "svg"
+    ) -> None:
+        if self._cache is not None:
+            self._cache.put(
+                self._cache.key(latex, display, self._cache_options(kind)),
+                svg,
+            )
+        if self._disk_cache is not None:
+            disk = self._disk_cache
+            disk.put(disk.key(latex, display, self._disk_options(kind)), svg)
+
+    def _convert_one(
+        self,
+        kind: str,
+        latex: str,
+        display: bool | None,
+        timeout: float | None,
+    ) -> str:
+        svg = self._lookup(latex, display, kind)
+        if svg is None:
+            svg = self._render(latex, display, timeout, kind)
+            self._store(latex, display, svg, kind)
+        return svg
+
+    def _convert_many(
+        self,
+        kind: str,
+        latexes: Iterable[str],
+        display: bool | None,
+        chunk_size: int,
+        timeout: float | None,
+    ) -> list[str | MathJaxRenderError]:
+        latexes = list(latexes)
+        results: list[str | MathJaxRenderError | None] = [
+            self._lookup(latex, display, kind) for latex in latexes
+        ]
+        misses = [i for i, svg in enumerate(results) if svg is None]
+        for start in range(0, len(misses), max(1, chunk_size)):
+            chunk = misses[start:start + chunk_size]
+            rendered = self._render_many(
+                [latexes[i] for i in chunk], display, timeout, kind
+            )
+            for i, result in zip(chunk, rendered):
+                results[i] = result
+                if isinstance(result, str):
+                    self._store(latexes[i], display, result, kind)
+        return results
+
+    def _render(
+        self,
+        latex: str,
+        display: bool | None,
+        timeout: float | None = None,
+        kind: str = "svg",
+    ) -> str:
+        name, args = _entry_point(kind, display)
+        return self._call(name, latex, *args, timeout=timeout)
+
+    def _call(
+        self,
+        name: str,
+        latex: str,
+        *args: object,
+        timeout: float | None = None,
+    ) -> str:
+        """Call the JS function *name* on *latex*, retrying on font loads."""
+        self._check_limits(latex)
+        self._note_definitions([latex])
+        if timeout is None:
+            timeout = self._timeout
+        func = self._function(name)
+        recovered = False
+
+        for _ in range(_MAX_RETRIES):
+            try:
+                result = self._invoke(func, timeout, latex, *args)
+                break
+            except Exception as exc:
+                if str(exc).startswith(_JS_RETRY):
+                    self._run_pending_jobs()
+                    continue
+                if (
+                    not recovered
+                    and _engine_error(exc) == _JS_OOM
+                    and self._recover()
+                ):
+                    recovered = True
+                    func = self._function(name)
+                    continue
+                error = self._limit_error(
+                    latex, _engine_error(exc), timeout
+                )
+                if error is not None:
+                    raise error from exc
+                raise MathJaxRenderError(
+                    f"MathJax render failed for input "
+                    f"{json.dumps(latex)}: {exc}"
+                ) from exc
+        else:
+            raise MathJaxRenderError(
+                f"MathJax render failed for input {json.dumps(latex)}: "
+                f"font data did not load"
+            )
 
         if not isinstance(result, str):
             raise MathJaxRenderError(
                 f"Expected string from JS render, got {type(result).__name__}"
             )
+        if self._recycling:
+            self._count_renders(1)
         return result
 
+    def _render_many(
+        self,
+        latexes: list[str],
+        display: bool | None,
+        timeout: float | None = None,
+        kind: str = "svg",
+    ) -> list[str | MathJaxRenderError]:
+        if timeout is None:
+            timeout = self._timeout
+        results: list = [None] * len(latexes)
+        todo = []
+        for i, latex in enumerate(latexes):
+            try:
+                self._check_limits(latex)
+                todo.append(i)
+            except MathJaxLimitError as exc:
+                results[i] = exc
+        if not todo:
+            return results
+        self._note_definitions(latexes[i] for i in todo)
+        func = self._function("renderBatch")
+        recovered = False
+
+        for _ in range(_MAX_RETRIES):
+            try:
+                payload = json.loads(self._invoke(
+                    func,
+                    timeout,
+                    json.dumps([latexes[i] for i in todo]),
+                    display,
+                    kind,
+                ))
+            except Exception as exc:
+                if (
+                    not recovered
+                    and _engine_error(exc) == _JS_OOM
+                    and self._recover()
+                ):
+                    recovered = True
+                    func = self._function("renderBatch")
+                    continue
+                interrupted = _engine_error(exc) == _JS_INTERRUPTED
+                if interrupted and self._scope is None:
+                    # Find the slow expressions: one call each.
+                    self._discard_context()
+                    name, args = _entry_point(kind, display)
+                    for i in todo:
+                        try:
+                            results[i] = self._call(
+                                name, latexes[i], *args, timeout=timeout
+                            )
+                        except MathJaxRenderError as error:
+                            results[i] = error
+                    return results
+                raise MathJaxRenderError(
+                    f"MathJax batch render failed for {len(todo)} "
+                    f"expression(s): {exc}"
+                ) from exc
+            retry = []
+            out_of_memory = []
+            for i, item in zip(todo, payload):
+                if "svg" in item:
+                    results[i] = item["svg"]
+                elif item.get("retry"):
+                    retry.append(i)
+                elif (
+                    not recovered
+                    and item.get("internal")
+                    and item["error"] == _JS_OOM
+                ):
+                    out_of_memory.append(i)
+                else:
+                    reason = item["error"] if item.get("internal") else None
+                    results[i] = self._limit_error(
+                        latexes[i], reason, timeout
+                    ) or MathJaxRenderError(
+                        f"MathJax render failed for input "
+                        f"{json.dumps(latexes[i])}: {item['error']}"
+                    )
+            if out_of_memory and self._recover():
+                # Rerun everything unfinished on the fresh context.
+                recovered = True
+                func = self._function("renderBatch")
+                retry += out_of_memory
+            else:
+                for i in out_of_memory:
+                    results[i] = MathJaxRenderError(
+                        f"MathJax render failed for input "
+                        f"{json.dumps(latexes[i])}: {_JS_OOM}"
+                    )
+            if not retry:
+                if self._recycling:
+                    self._count_renders(len(latexes))
+                return results
+            todo = sorted(retry)
+            self._run_pending_jobs()
+
+        for i in todo:
+            results[i] = MathJaxRenderError(
+                f"MathJax render failed for input {json.dumps(latexes[i])}: "
+                f"font data did not load"
+            )
+        return results
+
     # ------------------------------------------------------------------ #
     # Context-manager support
     # ------------------------------------------------------------------ #
@@ -90,31 +1196,680 @@ class MathJaxRenderer:
         return self
 
     def __exit__(self, *_: object) -> None:
-        pass
+        self.close()
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}>"
 
 
+class RenderResult:
+    """An SVG and its layout metrics, as returned by
+    :meth:`MathJaxRenderer.render_ex` and :meth:`MathJaxRenderer.measure`.
+
+    All sizes are in ex units of the surrounding text, as in the SVG's own
+    ``width``/``height``/``vertical-align`` attributes.
+
+    Attributes
+    ----------
+    svg:
+        The SVG markup, or *None* for a measurement.
+    width:
+        Total width.
+    height:
+        Total height, above and below the baseline.
+    depth:
+        Extent below the baseline.
+    """
+
+    __slots__ = ("svg", "width", "height", "depth")
+
+    def __init__(
+        self, svg: str | None, width: float, height: float, depth: float
+    ) -> None:
+        self.svg = svg
+        self.width = width
+        self.height = height
+        self.depth = depth
+
+    @property
+    def ascent(self) -> float:
+        """Extent above the baseline (``height - depth``)."""
+        return self.height - self.depth
+
+    @property
+    def vertical_align(self) -> float:
+        """CSS ``vertical-align`` offset in ex (``-depth``)."""
+        return -self.depth
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RenderResult):
+            return NotImplemented
+        return (self.svg, self.width, self.height, self.depth) == (
+            other.svg, other.width, other.height, other.depth
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} width={self.width}ex "
+            f"height={self.height}ex depth={self.depth}ex>"
+        )
+
+
+class FontScope:
+    """A group of renders sharing one deduplicated glyph ``<defs>`` block.
+
+    Obtained from :meth:`MathJaxRenderer.font_scope`.  SVGs rendered here
+    are *not* self-contained: they only display correctly on a page that
+    also includes :meth:`defs`.  They bypass the render caches, because
+    every glyph they use has to be recorded in this scope's definitions.
+    """
+
+    def __init__(self, renderer: MathJaxRenderer) -> None:
+        self._renderer = renderer
+        self._count = 0
+        self._final_defs: str | None = None
+
+    def render(self, latex: str, *, display: bool = True) -> str:
+        """Render *latex* to an SVG that references the shared glyphs."""
+        self._check_open()
+        svg = self._renderer._render(latex, display)
+        self._count += 1
+        return svg
+
+    def render_batch(
+        self, latexes: Iterable[str], *, display: bool = True
+    ) -> list[str | MathJaxRenderError]:
+        """Render many formulas in one JS call.
+
+        As with :meth:`MathJaxRenderer.render_batch`, failed items hold a
+        :class:`MathJaxRenderError` instead of raising.
+        """
+        self._check_open()
+        results = self._renderer._render_many(list(latexes), display)
+        self._count += len(results)
+        return results
+
+    def defs(self) -> str:
+        """Return a hidden ``<svg>`` holding every glyph used so far.
+
+        Place it once in the page (before or after the formulas); each
+        rendered SVG points into it by id.
+        """
+        if self._final_defs is not None:
+            defs = self._final_defs
+        else:
+            defs = self._renderer._function("fontScopeDefs")()
+        return (
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink" '
+            'style="display: none">' + defs + "</svg>"
+        )
+
+    def _check_open(self) -> None:
+        if self._final_defs is not None:
+            raise MathJaxRenderError("This font scope has been closed")
+
+    def __repr__(self) -> str:
+        state = "closed" if self._final_defs is not None else "open"
+        return f"<{self.__class__.__name__} {state} renders={self._count}>"
+
+
+@functools.lru_cache(maxsize=4)
+def _read_bundle(bundle: Path) -> str:
+    # Every context in the process evaluates the same text; read and decode
+    # the ~4 MB file only once.
+    return bundle.read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def bundle_fingerprint(bundle: Path = MathJaxRenderer._JS_BUNDLE) -> str:
+    """Return a digest identifying the MathJax build at *bundle*.
+
+    Combines the QuickJax version with the SHA-256 of the bundle contents;
+    persistent caches include it in their keys.
+    """
+    from . import __version__
+
+    digest = hashlib.sha256(bundle.read_bytes()).hexdigest()
+    return f"{__version__}:{digest}"
+
+
+def compress_svg(svg: str, encoding: str = "gzip") -> bytes:
+    """Compress *svg* with ``"gzip"`` or ``"br"`` (brotli)."""
+    data = svg.encode("utf-8")
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br":
+        try:
+            import brotli
+        except ImportError:
+            raise ImportError(
+                "brotli output needs the 'brotli' package "
+                "(pip install quickjax[brotli])"
+            ) from None
+        return brotli.compress(data, mode=brotli.MODE_TEXT)
+    raise ValueError(f"encoding must be 'gzip' or 'br', not {encoding!r}")
+
+
+_SVG_ROOT = re.compile(r"<svg\b[^>]*>")
+_EX_ATTR = re.compile(r'\b(width|height)="(-?[\d.]+)ex"')
+_VERTICAL_ALIGN = re.compile(r"vertical-align:\s*(-?[\d.]+)ex")
+_VIEW_BOX = re.compile(r'\bviewBox="([^"]*)"')
+
+
+# Tokens that open or close a nesting level; other control words and
+# escapes (``\{``) are matched only so they are skipped.
+_NESTING = re.compile(
+    r"\\(begin|left)(?![a-zA-Z])|\\(end|right)(?![a-zA-Z])"
+    r"|\\[a-zA-Z]+|\\.|([{])|([}])"
+)
+
+
+# Commands that define or redefine macros for later renders.
+_DEFINITION = re.compile(
+    r"\\(?:(?:re)?newcommand|providecommand|[gex]?def|let"
+    r"|DeclareMathOperator|(?:re)?newenvironment)(?![a-zA-Z])"
+)
+
+
+def _engine_error(exc: Exception) -> str | None:
+    """Return QuickJS's own reason for *exc*, or *None* for a JS error.
+
+    A thrown ``null`` means the context ran out of memory.  Otherwise only
+    an ``InternalError`` whose message is exactly one of QuickJS's
+    counts, so no TeX input can imitate one.  (The binding's
+    :class:`quickjs.StackOverflow` is not enough: it is raised for any
+    error whose message mentions a stack overflow.)
+    """
+    if not isinstance(exc, quickjs.JSException):
+        return None
+    message = str(exc)
+    if message.strip() == _JS_OOM_NULL:
+        return _JS_OOM
+    if not message.startswith(_JS_INTERNAL):
+        return None
+    reason = message[len(_JS_INTERNAL):].split("\n", 1)[0].strip()
+    if reason in (_JS_OOM, _JS_INTERRUPTED, _JS_STACK_OVERFLOW):
+        return reason
+    return None
+
+
+def _nesting_depth(latex: str) -> int:
+    """Maximum nesting depth of groups and environments in *latex*."""
+    depth = deepest = 0
+    for opener, closer, brace_open, brace_close in _NESTING.findall(latex):
+        if opener or brace_open:
+            depth += 1
+            deepest = max(deepest, depth)
+        elif closer or brace_close:
+            depth -= 1
+    return deepest
+
+
+def _svg_metrics(svg: str) -> tuple[float, float, float]:
+    """Read ``(width, height, depth)`` in ex from the root ``<svg>`` tag.
+
+    Used for cache hits, where MathJax's own numbers are not at hand.  A
+    size that is not in ex (``width="100%"`` on tagged equations) is
+    recomputed from the viewBox, like ``exSize()`` in ``renderer.js``; the
+    other size supplies the ex-per-viewBox-unit ratio that the font's
+    x-height gives there.
+    """
+    root = _SVG_ROOT.search(svg)
+    tag = root.group(0) if root else ""
+    sizes = {name: float(value) for name, value in _EX_ATTR.findall(tag)}
+    view = _VIEW_BOX.search(tag)
+    if len(sizes) == 1 and view is not None:
+        try:
+            _, _, width, height = map(float, view.group(1).split())
+        except ValueError:
+            pass
+        else:
+            box = {"width": width, "height": height}
+            ((known, ex),) = sizes.items()
+            if box[known]:
+                for name, units in box.items():
+                    sizes.setdefault(name, units * ex / box[known])
+    align = _VERTICAL_ALIGN.search(tag)
+    return (
+        sizes.get("width", 0.0),
+        sizes.get("height", 0.0),
+        -float(align.group(1)) if align else 0.0,
+    )
+
+
+# Idle contexts released by MathJaxRenderer.close(), by configuration, least
+# recently used configuration first.  At most _MAX_SPARE_CONTEXTS are kept
+# per configuration and _MAX_SPARE_TOTAL in all, so per-document macros
+# cannot pile up contexts that are never reused.
+_SPARE_CONTEXTS: "collections.OrderedDict[tuple, list[quickjs.Context]]" = (
+    collections.OrderedDict()
+)
+_SPARE_LOCK = threading.Lock()
+_MAX_SPARE_CONTEXTS = 4
+_MAX_SPARE_TOTAL = 8
+
+# Instrumentation fields (see MathJaxRenderer.stats()).
+_PHASES = ("lookup", "js", "parse", "layout", "serialize", "store", "total")
+_COUNTERS = ("cache_hits", "errors", "input_chars", "output_chars")
+_EVENT_FIELDS = ("count",) + _COUNTERS + _PHASES
+_TOTAL_FIELDS = ("calls", "renders") + _COUNTERS + tuple(
+    "time_" + phase for phase in _PHASES
+)
+
+
+def _entry_point(kind: str, display: bool | None) -> tuple[str, tuple]:
+    """JS function (and extra arguments) converting one input to *kind*."""
+    if kind == "svg":
+        return ("render" if display else "renderInline"), ()
+    return {"mathml": "toMathML", "mathml-svg": "renderMathML"}[kind], (
+        display,
+    )
+
+
+def _load_font_source(fonts: Path, name: str) -> str:
+    """Return the JS source of the dynamic font file MathJax asked for.
+
+    *name* is MathJax's load path (``<prefix>/<file>``); only its last
+    component is used, so requests cannot leave the *fonts* directory.
+    """
+    file = name.rsplit("/", 1)[-1]
+    if not file.endswith(".js"):
+        file += ".js"
+    return (fonts / file).read_text(encoding="utf-8")
+
+
+def _clock_ms() -> float:
+    return time.perf_counter() * 1000
+
+
+def _make_cache(cache: RenderCache | bool | None) -> RenderCache | None:
+    if cache is True:
+        return RenderCache()
+    return cache if isinstance(cache, RenderCache) else None
+
+
+def _chunked(items: Iterable[str], size: int) -> Iterator[list[str]]:
+    chunk: list[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stream_chunks(
+    submit: Callable[[list[str]], cf.Future],
+    latexes: Iterable[str],
+    chunk_size: int,
+    max_in_flight: int,
+    ordered: bool,
+) -> Iterator:
+    """Drive chunked renders with at most *max_in_flight* chunks pending.
+
+    *submit* schedules one chunk and returns a future resolving to its
+    per-item results.  Input is pulled lazily, only as completed chunks
+    make room, so memory stays bounded however long *latexes* is.  A chunk
+    whose future fails reports that error for each of its items.  Yields
+    results in input order, or ``(index, result)`` pairs in completion
+    order when *ordered* is false.
+    """
+    chunks = _chunked(latexes, max(1, chunk_size))
+    pending: dict[cf.Future, tuple[int, int]] = {}
+    start = 0
+    exhausted = False
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max(1, max_in_flight):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending[submit(chunk)] = (start, len(chunk))
+                start += len(chunk)
+            if not pending:
+                break
+            if ordered:
+                done = [next(iter(pending))]
+            else:
+                done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+            for future in done:
+                offset, size = pending.pop(future)
+                try:
+                    results = future.result()
+                except MathJaxRenderError as exc:
+                    results = [exc] * size
+                for i, result in enumerate(results, offset):
+                    yield result if ordered else (i, result)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+# ====================================================================== #
+# Thread-safe context checkout
+# ====================================================================== #
+
+class ThreadSafeRenderer:
+    """Share a bounded set of MathJax contexts safely between threads.
+
+    A QuickJS context must never be entered by two threads at once, so each
+    thread *checks out* a renderer for the duration of a call and returns it
+    afterwards.  Contexts are created lazily, up to *max_contexts*; when all
+    of them are busy, callers wait (optionally bounded by *timeout* seconds).
+    QuickJS releases the GIL while evaluating JS, so renders on distinct
+    contexts do run in parallel.
+
+    Usage::
+
+        renderer = ThreadSafeRenderer(max_contexts=4)
+        svg = renderer.render(r"E = mc^2")      # from any thread
+    """
+
+    def __init__(
+        self,
+        max_contexts: int | None = None,
+        *,
+        timeout: float | None = None,
+        factory: Callable[[], MathJaxRenderer] = MathJaxRenderer,
+    ) -> None:
+        self._max_contexts = max_contexts or os.cpu_count() or 1
+        self._timeout = timeout
+        self._factory = factory
+        self._cond = threading.Condition()
+        self._idle: list[MathJaxRenderer] = []
+        self._created = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    @property
+    def max_contexts(self) -> int:
+        """Upper bound on the number of QuickJS contexts."""
+        return self._max_contexts
+
+    @contextmanager
+    def checkout(
+        self, timeout: float | None = None
+    ) -> Iterator[MathJaxRenderer]:
+        """Borrow a renderer for exclusive use inside a ``with`` block.
+
+        Raises
+        ------
+        MathJaxRenderError
+            If no context becomes free within *timeout* seconds (defaults to
+            the pool-wide timeout given to the constructor).
+        """
+        renderer = self._acquire(self._timeout if timeout is None else timeout)
+        try:
+            yield renderer
+        finally:
+            self._release(renderer)
+
+    def render(self, latex: str, *, display: bool = True) -> str:
+        """Render *latex* on whichever context is free.
+
+        See :meth:`MathJaxRenderer.render`.
+        """
+        with self.checkout() as renderer:
+            return renderer.render(latex, display=display)
+
+    def render_batch(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunk_size: int = 256,
+        timeout: float | None = None,
+    ) -> list[str | MathJaxRenderError]:
+        """Render many expressions on one context.
+
+        See :meth:`MathJaxRenderer.render_batch`; *timeout* is its QuickJS
+        time limit, not a limit on waiting for a free context.
+        """
+        with self.checkout() as renderer:
+            return renderer.render_batch(
+                latexes,
+                display=display,
+                chunk_size=chunk_size,
+                timeout=timeout,
+            )
+
+    def to_mathml(self, latex: str, *, display: bool = True) -> str:
+        """Convert *latex* to MathML on whichever context is free.
+
+        See :meth:`MathJaxRenderer.to_mathml`.
+        """
+        with self.checkout() as renderer:
+            return renderer.to_mathml(latex, display=display)
+
+    def render_mathml(
+        self, mathml: str, *, display: bool | None = None
+    ) -> str:
+        """Render MathML on whichever context is free.
+
+        See :meth:`MathJaxRenderer.render_mathml`.
+        """
+        with self.checkout() as renderer:
+            return renderer.render_mathml(mathml, display=display)
+
+    def render_iter(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunk_size: int = 64,
+        ordered: bool = True,
+        max_in_flight: int | None = None,
+    ) -> Iterator:
+        """Lazily render an iterable of any length on all contexts at once.
+
+        Chunks of *chunk_size* inputs are rendered in parallel, with at most
+        *max_in_flight* chunks (default: twice *max_contexts*) pulled from
+        *latexes* and not yet yielded.  Failed items yield their
+        :class:`MathJaxRenderError` without ending the stream.
+
+        Yields results in input order, or ``(index, result)`` pairs as they
+        finish when *ordered* is false.
+        """
+        with cf.ThreadPoolExecutor(
+            self._max_contexts, thread_name_prefix="quickjax"
+        ) as executor:
+            yield from _stream_chunks(
+                lambda chunk: executor.submit(
+                    self.render_batch,
+                    chunk,
+                    display=display,
+                    chunk_size=len(chunk),
+                ),
+                latexes,
+                chunk_size,
+                max_in_flight or 2 * self._max_contexts,
+                ordered,
+            )
+
+    def warm_up(self, *, background: bool = False) -> None:
+        """Make sure at least one context exists and is initialized.
+
+        See :meth:`MathJaxRenderer.warm_up`.
+        """
+        with self._cond:
+            if self._created:
+                return
+            self._created += 1
+        renderer = self._factory()
+        renderer.warm_up(background=background)
+        self._release(renderer)
+
+    def stats(self) -> dict[str, float]:
+        """Return a snapshot of context and wait-time counters.
+
+        ``waits`` counts checkouts that had to block for a busy context;
+        ``wait_total`` and ``wait_max`` are in seconds.
+        """
+        with self._cond:
+            return {
+                "contexts": self._created,
+                "idle": len(self._idle),
+                "in_use": self._created - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_total": self._wait_total,
+                "wait_max": self._wait_max,
+            }
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _acquire(self, timeout: float | None) -> MathJaxRenderer:
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        waited = False
+        with self._cond:
+            try:
+                while not self._idle and self._created >= self._max_contexts:
+                    waited = True
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            raise MathJaxRenderError(
+                                f"Timed out after {timeout}s waiting for a "
+                                "MathJax context"
+                            )
+                    self._cond.wait(remaining)
+            finally:
+                if waited:
+                    elapsed = time.perf_counter() - start
+                    self._waits += 1
+                    self._wait_total += elapsed
+                    self._wait_max = max(self._wait_max, elapsed)
+            self._checkouts += 1
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        # Build the new context outside the lock: it takes ~0.3 s.
+        try:
+            return self._factory()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, renderer: MathJaxRenderer) -> None:
+        with self._cond:
+            self._idle.append(renderer)
+            self._cond.notify()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} contexts={self._created}"
+            f"/{self._max_contexts}>"
+        )
+
+
 # ====================================================================== #
 # Module-level convenience API (lazy singleton)
 # ====================================================================== #
 
-_default_renderer: MathJaxRenderer | None = None
+_default_renderer: ThreadSafeRenderer | None = None
+_default_lock = threading.Lock()
+_default_max_contexts = 1
+_default_cache: RenderCache | None = None
+_default_disk_cache: DiskCache | None = None
 
 
-def _get_renderer() -> MathJaxRenderer:
+def _get_renderer() -> ThreadSafeRenderer:
     global _default_renderer
     if _default_renderer is None:
-        _default_renderer = MathJaxRenderer()
+        with _default_lock:
+            if _default_renderer is None:
+                options = dict(
+                    cache=_default_cache, disk_cache=_default_disk_cache
+                )
+                _default_renderer = ThreadSafeRenderer(
+                    _default_max_contexts,
+                    factory=lambda: MathJaxRenderer(**options),
+                )
     return _default_renderer
 
 
+def configure(
+    *,
+    max_contexts: int | None = None,
+    cache: RenderCache | bool | None = None,
+    disk_cache: DiskCache | Literal[False] | None = None,
+) -> None:
+    """Configure the renderer behind the module-level :func:`render`.
+
+    Parameters
+    ----------
+    max_contexts:
+        How many QuickJS contexts concurrent threads may use in parallel
+        (default 1).  Contexts are still created lazily, on demand.
+    cache:
+        A :class:`~quickjax.cache.RenderCache` shared by those contexts,
+        ``True`` for one with default limits, or ``False`` to disable
+        caching (the default).  *None* leaves the current setting.
+    disk_cache:
+        A persistent :class:`~quickjax.cache.DiskCache`, or ``False`` to
+        disable it (the default).  *None* leaves the current setting.
+        There is no ``True`` shorthand, since a disk cache needs a path.
+
+    Existing contexts are discarded; new ones are created on the next call.
+
+    Raises
+    ------
+    TypeError
+        If *disk_cache* is not a ``DiskCache``, ``False`` or *None*.
+    """
+    global _default_renderer, _default_max_contexts
+    global _default_cache, _default_disk_cache
+    if disk_cache is not False and not isinstance(
+        disk_cache, (DiskCache, type(None))
+    ):
+        raise TypeError(
+            f"disk_cache must be a DiskCache, False or None, "
+            f"not {disk_cache!r}"
+        )
+    with _default_lock:
+        if max_contexts is not None:
+            _default_max_contexts = max_contexts
+        if cache is not None:
+            _default_cache = _make_cache(cache)
+        if disk_cache is not None:
+            _default_disk_cache = (
+                None if disk_cache is False else disk_cache
+            )
+        _default_renderer = None
+
+
+def warm_up(*, background: bool = False) -> None:
+    """Initialize the context behind :func:`render` ahead of the first call.
+
+    With ``background=True`` this returns immediately and the MathJax
+    bundle is evaluated on a helper thread (see
+    :meth:`MathJaxRenderer.warm_up`).
+    """
+    _get_renderer().warm_up(background=background)
+
+
 def render(latex: str, *, display: bool = True) -> str:
     """Render *latex* to a self-contained SVG string.
 
     This is a convenience wrapper around :class:`MathJaxRenderer`.  The
     underlying JS context is created lazily on the first call and reused
-    thereafter.
+    thereafter.  It is safe to call from several threads; see
+    :func:`configure` to let them render in parallel.
     """
     return _get_renderer().render(latex, display=display)
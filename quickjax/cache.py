@@ -0,0 +1,270 @@
+"""Render caches: skip MathJax entirely for expressions seen before."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_whitespace(latex: str) -> str:
+    """Collapse runs of whitespace in *latex* to a single space.
+
+    Leading whitespace is dropped, and so is trailing whitespace unless it
+    is a control space (``\\ ``).  Inside math mode TeX treats the results as
+    equivalent input, so they can share one cache entry.
+    """
+    latex = _WHITESPACE.sub(" ", latex).lstrip()
+    if latex.endswith(" ") and not latex.endswith("\\ "):
+        latex = latex[:-1]
+    return latex
+
+
+class RenderCache:
+    """Bounded, thread-safe LRU cache of rendered SVG strings.
+
+    Entries are evicted least-recently-used first whenever either
+    *max_entries* or *max_bytes* (total UTF-8 size of the cached SVGs) would
+    be exceeded.  A single cache may be shared by several renderers; keys
+    include the renderer's configuration, so differently configured
+    renderers never see each other's output.
+
+    Parameters
+    ----------
+    max_entries:
+        Maximum number of cached SVGs.
+    max_bytes:
+        Maximum total size of the cached SVGs, in bytes.
+    normalize_whitespace:
+        If *True*, inputs that differ only in whitespace share an entry
+        (see :func:`normalize_whitespace`).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        *,
+        normalize_whitespace: bool = False,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.normalize_whitespace = normalize_whitespace
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[str, int]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def key(
+        self, latex: str, display: bool, options: Hashable = ()
+    ) -> Hashable:
+        """Build the cache key for one render call."""
+        if self.normalize_whitespace:
+            latex = normalize_whitespace(latex)
+        return (latex, display, options)
+
+    def get(self, key: Hashable) -> str | None:
+        """Return the cached SVG for *key*, or *None* on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, svg: str) -> None:
+        """Store *svg* under *key*, evicting old entries as needed."""
+        size = len(svg.encode("utf-8"))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (svg, size)
+            self._bytes += size
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return a snapshot of hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} entries={len(self._entries)}"
+            f"/{self.max_entries} bytes={self._bytes}/{self.max_bytes}>"
+        )
+
+
+class DiskCache:
+    """Persistent, content-addressed SVG cache stored in SQLite.
+
+    Entries are keyed by a SHA-256 digest of the LaTeX input, display mode,
+    renderer configuration and MathJax bundle fingerprint, so a cache
+    directory can be kept across builds and shared by parallel processes:
+    stale entries from an older bundle are simply never looked up again.
+    The database runs in WAL mode, which lets any number of readers proceed
+    while a writer commits.
+
+    Parameters
+    ----------
+    path:
+        Database file.  If *path* is an existing directory, the database is
+        created inside it as ``quickjax-cache.sqlite3``.
+    normalize_whitespace:
+        See :class:`RenderCache`.
+    timeout:
+        Seconds to wait for a competing writer's lock before giving up.
+    """
+
+    FILENAME = "quickjax-cache.sqlite3"
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        normalize_whitespace: bool = False,
+        timeout: float = 30.0,
+    ) -> None:
+        path = Path(path)
+        if path.is_dir():
+            path = path / self.FILENAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.normalize_whitespace = normalize_whitespace
+        self._timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS svg "
+                "(key TEXT PRIMARY KEY, svg TEXT NOT NULL)"
+            )
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def key(self, latex: str, display: bool, options: Hashable = ()) -> str:
+        """Build the content-addressed key for one render call.
+
+        *options* must have a stable ``repr`` across processes (tuples of
+        strings and numbers do).
+        """
+        if self.normalize_whitespace:
+            latex = normalize_whitespace(latex)
+        payload = json.dumps([latex, bool(display), repr(options)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the stored SVG for *key*, or *None* on a miss."""
+        row = self._connect().execute(
+            "SELECT svg FROM svg WHERE key = ?", (key,)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return row[0]
+
+    def put(self, key: str, svg: str) -> None:
+        """Store *svg* under *key*."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO svg (key, svg) VALUES (?, ?)",
+                (key, svg),
+            )
+        with self._lock:
+            self._writes += 1
+
+    def clear(self) -> None:
+        """Delete every stored entry."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM svg")
+
+    def stats(self) -> dict[str, int]:
+        """Return this process's hit/miss/write counts and the entry count."""
+        (entries,) = self._connect().execute(
+            "SELECT COUNT(*) FROM svg"
+        ).fetchone()
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "entries": entries,
+            }
+
+    def close(self) -> None:
+        """Close this thread's database connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections must not cross threads or fork(), so keep one
+        # per thread and reopen it in a child process.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self._timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_local"], state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {str(self.path)!r}>"
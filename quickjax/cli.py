@@ -0,0 +1,393 @@
+"""Command-line bulk renderer: ``python -m quickjax`` / ``quickjax``.
+
+Reads LaTeX from stdin, text files (one expression per line), ``.tex``
+files (one expression each), directories of ``.tex`` files and JSONL
+(``{"id": ..., "tex": ..., "display": ...}`` per line), renders on every
+core and streams the results to stdout as JSONL, to a JSONL file, to a
+directory of ``.svg`` files, or into a zip, tar or pack file (see
+:mod:`quickjax.sinks`).  Re-running the same command skips inputs whose
+output already exists, so an interrupted job resumes where it stopped.
+
+Usage::
+
+    quickjax formulas.jsonl -o out/            # one SVG per formula
+    quickjax formulas.jsonl -o out.zip
+    quickjax formulas.txt --inline -o out.jsonl
+    cat formulas.txt | quickjax > results.jsonl
+"""
+
+import argparse
+import collections
+import concurrent.futures as cf
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import IO, Iterable, Iterator, NamedTuple
+
+from .backend import MathJaxRenderError, MathJaxRenderer, _stream_chunks
+from .cache import DiskCache
+from .pool import MathJaxRendererPool, _render_pairs
+from .sinks import (
+    DirectorySink,
+    HashedDirectorySink,
+    PackSink,
+    Sink,
+    TarSink,
+    ZipSink,
+)
+
+
+class Job(NamedTuple):
+    """One expression to render, with the id its output is stored under."""
+
+    id: str
+    latex: str
+    display: bool
+
+
+# ====================================================================== #
+# Input
+# ====================================================================== #
+
+def _read_lines(
+    lines: Iterable[str], prefix: str, display: bool
+) -> Iterator[Job]:
+    """One expression per non-blank line; ids are ``<prefix><line>``."""
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if line.strip():
+            yield Job(f"{prefix}{number}", line, display)
+
+
+def _read_jsonl(
+    lines: Iterable[str], prefix: str, display: bool
+) -> Iterator[Job]:
+    """``{"id", "tex" (or "latex"), "display"}`` objects, one per line."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            latex = record["tex"] if "tex" in record else record["latex"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise ValueError(
+                f"{prefix or 'stdin:'}{number}: not a JSON object with a "
+                f"'tex' field ({exc})"
+            ) from None
+        yield Job(
+            str(record.get("id", f"{prefix}{number}")),
+            latex,
+            bool(record.get("display", display)),
+        )
+
+
+def read_jobs(
+    inputs: list[str],
+    *,
+    display: bool = True,
+    jsonl: bool = False,
+    pattern: str = "*.tex",
+) -> Iterator[Job]:
+    """Lazily yield a :class:`Job` for every expression in *inputs*.
+
+    ``-`` (or no inputs at all) reads stdin.  A directory contributes every
+    file matching *pattern* below it, each file one expression with its
+    relative path (minus the suffix) as id.  ``.jsonl`` files, and stdin
+    with *jsonl*, hold JSON records; ``.tex`` files one expression; any
+    other file one expression per line, with ``<stem>-<line>`` ids.
+    """
+    for name in inputs or ["-"]:
+        if name == "-":
+            reader = _read_jsonl if jsonl else _read_lines
+            yield from reader(sys.stdin, "", display)
+            continue
+        path = Path(name)
+        if path.is_dir():
+            for file in sorted(path.rglob(pattern)):
+                if file.is_file():
+                    yield Job(
+                        file.relative_to(path).with_suffix("").as_posix(),
+                        file.read_text("utf-8").strip(),
+                        display,
+                    )
+        elif path.suffix == ".tex":
+            yield Job(path.stem, path.read_text("utf-8").strip(), display)
+        else:
+            reader = (
+                _read_jsonl if jsonl or path.suffix == ".jsonl"
+                else _read_lines
+            )
+            with path.open(encoding="utf-8") as lines:
+                yield from reader(lines, f"{path.stem}-", display)
+
+
+# ====================================================================== #
+# Output
+# ====================================================================== #
+
+class SinkOutput:
+    """Adapt a :class:`~quickjax.sinks.Sink` to :func:`run`.
+
+    Failures are reported by :func:`run` and are not written, so they are
+    retried by the next run.
+    """
+
+    def __init__(self, sink: Sink) -> None:
+        self.sink = sink
+
+    def done(self, job: Job) -> bool:
+        return job.id in self.sink
+
+    def write(self, job: Job, result: str | MathJaxRenderError) -> None:
+        if not isinstance(result, MathJaxRenderError):
+            self.sink.write(job.id, result)
+
+    def close(self) -> None:
+        self.sink.close()
+
+
+class JsonlOutput:
+    """Append ``{"id", "svg"}`` or ``{"id", "error"}`` records to a stream.
+
+    When *path* is given, ids that already have an ``svg`` record there
+    are skipped (failed ones are retried) and new records are appended.
+    """
+
+    FLUSH_EVERY = 256
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._done: set[str] = set()
+        self._pending = 0
+        if path is None:
+            self._file: IO[str] = sys.stdout
+            return
+        complete = True
+        if path.exists():
+            with path.open(encoding="utf-8") as lines:
+                for line in lines:
+                    complete = line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an earlier crash
+                    if "svg" in record:
+                        self._done.add(record["id"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("a", encoding="utf-8")
+        if not complete:
+            self._file.write("\n")
+
+    def done(self, job: Job) -> bool:
+        return job.id in self._done
+
+    def write(self, job: Job, result: str | MathJaxRenderError) -> None:
+        if isinstance(result, MathJaxRenderError):
+            record = {"id": job.id, "error": str(result)}
+        else:
+            record = {"id": job.id, "svg": result}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.FLUSH_EVERY:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self) -> None:
+        self._file.flush()
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def open_output(path: Path | None, *, hashed: bool = False):
+    """Pick the output for *path* from its suffix (stdout for *None*)."""
+    if path is None:
+        return JsonlOutput()
+    name = path.name.lower()
+    if name.endswith(".jsonl"):
+        return JsonlOutput(path)
+    if name.endswith(".zip"):
+        return SinkOutput(ZipSink(path))
+    if name.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        return SinkOutput(TarSink(path))
+    if name.endswith(".pack"):
+        return SinkOutput(PackSink(path))
+    if hashed:
+        return SinkOutput(HashedDirectorySink(path))
+    return SinkOutput(DirectorySink(path))
+
+
+# ====================================================================== #
+# Rendering
+# ====================================================================== #
+
+def _local_submit(renderer: MathJaxRenderer):
+    def submit(chunk: list[Job]) -> cf.Future:
+        future: cf.Future = cf.Future()
+        future.set_result(_render_pairs(
+            renderer, [(job.latex, job.display) for job in chunk]
+        ))
+        return future
+    return submit
+
+
+def _pool_submit(pool: MathJaxRendererPool):
+    def submit(chunk: list[Job]) -> cf.Future:
+        return pool._submit_chunk(
+            [(job.latex, job.display) for job in chunk], None
+        )
+    return submit
+
+
+def run(
+    jobs: Iterable[Job],
+    sink,
+    *,
+    workers: int = 1,
+    chunk_size: int = 64,
+    renderer_options: dict | None = None,
+    progress: IO[str] | None = None,
+) -> dict[str, float]:
+    """Render *jobs* not yet done in *sink* and write the results to it.
+
+    Uses *workers* processes (a prefork :class:`MathJaxRendererPool` where
+    ``fork`` is available), or the calling process when *workers* is 1.
+    Returns counts of rendered, skipped and failed jobs and the elapsed
+    seconds.  Failures are counted, reported on stderr and passed to the
+    sink, which decides whether to record them: :class:`JsonlOutput`
+    writes an ``error`` record, :class:`SinkOutput` writes nothing.
+    """
+    options = renderer_options or {}
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+    queued: collections.deque[Job] = collections.deque()
+
+    def todo() -> Iterator[Job]:
+        for job in jobs:
+            if sink.done(job):
+                counts["skipped"] += 1
+                continue
+            queued.append(job)
+            yield job
+
+    start = time.perf_counter()
+    shown = start
+    if workers > 1:
+        prefork = "fork" in multiprocessing.get_all_start_methods()
+        backend = MathJaxRendererPool(workers, prefork=prefork, **options)
+        submit = _pool_submit(backend)
+    else:
+        backend = MathJaxRenderer(**options)
+        submit = _local_submit(backend)
+    with backend:
+        for result in _stream_chunks(
+            submit, todo(), chunk_size, 2 * workers, ordered=True
+        ):
+            job = queued.popleft()
+            sink.write(job, result)
+            if isinstance(result, MathJaxRenderError):
+                counts["failed"] += 1
+                print(f"{job.id}: {result}", file=sys.stderr)
+            else:
+                counts["rendered"] += 1
+            now = time.perf_counter()
+            if progress is not None and now - shown >= 0.5:
+                shown = now
+                done = counts["rendered"] + counts["failed"]
+                progress.write(
+                    f"\r{done} rendered, {counts['failed']} failed, "
+                    f"{done / (now - start):.0f}/s "
+                )
+                progress.flush()
+    counts["seconds"] = time.perf_counter() - start
+    return counts
+
+
+# ====================================================================== #
+# Entry point
+# ====================================================================== #
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="quickjax", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument(
+        "inputs", nargs="*", metavar="INPUT",
+        help="files, directories or - for stdin (default: stdin)",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path,
+        help="directory for .svg files, or a .jsonl file "
+             "(default: JSONL on stdout)",
+    )
+    parser.add_argument("--hashed", action="store_true",
+                        help="name files in an output directory by content "
+                             "hash, storing identical SVGs once")
+    parser.add_argument("--inline", action="store_true",
+                        help="render in inline mode unless a record says "
+                             "otherwise")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="read stdin and non-.jsonl files as JSONL")
+    parser.add_argument("--glob", default="*.tex",
+                        help="files to read from directories "
+                             "(default: *.tex)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="expressions per worker task (default: 64)")
+    parser.add_argument("--compact", action="store_true",
+                        help="strip data-* annotations from the SVGs")
+    parser.add_argument("--precision", type=int,
+                        help="round SVG coordinates to this many decimals")
+    parser.add_argument("--timeout", type=float,
+                        help="seconds allowed per expression")
+    parser.add_argument("--disk-cache", type=Path,
+                        help="SQLite cache file or directory shared by runs")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="print no progress or summary")
+    args = parser.parse_args(argv)
+
+    options: dict = {"compact": args.compact, "precision": args.precision}
+    if args.timeout is not None:
+        options["timeout"] = args.timeout
+
+    jobs = read_jobs(
+        args.inputs,
+        display=not args.inline,
+        jsonl=args.jsonl,
+        pattern=args.glob,
+    )
+    progress = None
+    if not args.quiet and sys.stderr.isatty():
+        progress = sys.stderr
+    try:
+        if args.disk_cache is not None:
+            options["disk_cache"] = DiskCache(args.disk_cache)
+        sink = open_output(args.output, hashed=args.hashed)
+        try:
+            counts = run(
+                jobs,
+                sink,
+                workers=max(1, args.jobs or 1),
+                chunk_size=max(1, args.chunk_size),
+                renderer_options=options,
+                progress=progress,
+            )
+        finally:
+            sink.close()
+    except (OSError, ValueError, MathJaxRenderError) as exc:
+        print(f"quickjax: {exc}", file=sys.stderr)
+        return 2
+
+    if not args.quiet:
+        done = counts["rendered"] + counts["failed"]
+        rate = done / counts["seconds"] if counts["seconds"] else 0.0
+        if progress is not None:
+            progress.write("\n")
+        print(
+            f"{counts['rendered']} rendered, {counts['skipped']} skipped, "
+            f"{counts['failed']} failed in {counts['seconds']:.1f} s "
+            f"({rate:.0f}/s)",
+            file=sys.stderr,
+        )
+    return 1 if counts["failed"] else 0
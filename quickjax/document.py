@@ -0,0 +1,367 @@
+"""Whole-document rendering: find math in Markdown/HTML and replace it."""
+
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple, Sequence
+
+from .backend import MathJaxRenderError, _get_renderer
+
+# (opening delimiter, closing delimiter, display mode), longest first so that
+# "$$" wins over "$".
+DEFAULT_DELIMITERS: tuple[tuple[str, str, bool], ...] = (
+    ("$$", "$$", True),
+    ("\\[", "\\]", True),
+    ("\\(", "\\)", False),
+    ("$", "$", False),
+)
+
+# HTML elements whose content is never scanned for math.
+_RAW_TAGS = re.compile(r"<(code|pre|script|style|kbd|samp)\b", re.IGNORECASE)
+_FENCE = re.compile(r"(`{3,}|~{3,})")
+_BACKTICKS = re.compile(r"`+")
+
+# How far past a position the scanner may need to look to classify it.
+_LOOKAHEAD = 8
+
+
+class MathSpan(NamedTuple):
+    """One math expression found in a document."""
+
+    latex: str
+    display: bool
+    start: int
+    end: int
+    raw: str
+
+
+# ====================================================================== #
+# Scanning
+# ====================================================================== #
+
+class _Scanner:
+    """Single-pass delimiter scanner shared by the batch and streaming APIs.
+
+    :meth:`scan` splits a buffer into text and :class:`MathSpan` segments.
+    When *final* is false it stops before anything it cannot classify yet
+    (an opener whose closer may arrive in a later chunk, an unterminated
+    code block, or the last few characters), and reports how much of the
+    buffer it consumed.
+    """
+
+    def __init__(
+        self,
+        delimiters: Sequence[tuple[str, str, bool]],
+        max_pending: int,
+    ) -> None:
+        self.delimiters = sorted(delimiters, key=lambda d: -len(d[0]))
+        self.max_pending = max_pending
+
+    def scan(
+        self, text: str, *, final: bool, line_start: bool = True
+    ) -> tuple[list[str | MathSpan], int]:
+        segments: list[str | MathSpan] = []
+        n = len(text)
+        pos = 0
+        flushed = 0
+
+        def _emit(span: MathSpan) -> None:
+            nonlocal flushed
+            if span.start > flushed:
+                segments.append(text[flushed:span.start])
+            segments.append(span)
+            flushed = span.end
+
+        while pos < n:
+            if not final and n - pos < _LOOKAHEAD:
+                break
+            at_line_start = (pos == 0 and line_start) or (
+                pos > 0 and text[pos - 1] == "\n"
+            )
+            ch = text[pos]
+
+            if ch in "`~":
+                end = self._skip_code(text, pos, at_line_start, final)
+                if end is None:
+                    break
+                pos = end
+                continue
+            if ch == "<":
+                end = self._skip_raw_html(text, pos, final)
+                if end is None:
+                    break
+                pos = end
+                continue
+
+            delimiter = self._match_opener(text, pos)
+            if delimiter is None:
+                # "\x" is an escape (e.g. "\$"): never a delimiter.
+                pos += 2 if ch == "\\" else 1
+                continue
+
+            open_, close, display = delimiter
+            found = self._find_closer(text, pos, open_, close, display, final)
+            if found is None:
+                if final or n - pos > self.max_pending:
+                    pos += len(open_)
+                    continue
+                break
+            if found < 0:
+                pos += len(open_)
+                continue
+            end = found + len(close)
+            latex = text[pos + len(open_):found]
+            _emit(MathSpan(latex, display, pos, end, text[pos:end]))
+            pos = end
+
+        if final:
+            pos = n
+        if pos > flushed:
+            segments.append(text[flushed:pos])
+        return segments, pos
+
+    # ------------------------------------------------------------------ #
+    # Delimiters
+    # ------------------------------------------------------------------ #
+
+    def _match_opener(
+        self, text: str, pos: int
+    ) -> tuple[str, str, bool] | None:
+        for open_, close, display in self.delimiters:
+            if not text.startswith(open_, pos):
+                continue
+            if open_ == "$":
+                # "$ x$" and "$5" are not math (pandoc's rule).
+                after = text[pos + 1:pos + 2]
+                if not after or after.isspace():
+                    continue
+            return open_, close, display
+        return None
+
+    def _find_closer(
+        self,
+        text: str,
+        pos: int,
+        open_: str,
+        close: str,
+        display: bool,
+        final: bool,
+    ) -> int | None:
+        """Return the index of the closing delimiter.
+
+        Returns -1 if the opener can be rejected for good, and *None* if
+        the closer was not found in *text* (more input may complete it).
+        """
+        i = pos + len(open_)
+        n = len(text)
+        inline_dollar = close == "$"
+        while i < n:
+            ch = text[i]
+            if ch == "\\" and not close.startswith("\\"):
+                i += 2
+                continue
+            if text.startswith(close, i):
+                if not inline_dollar:
+                    return i
+                if i == pos + 1 or text[i - 1].isspace():
+                    i += 1
+                    continue
+                following = text[i + 1:i + 2]
+                if not following and not final:
+                    return None
+                if following.isdigit():
+                    i += 1
+                    continue
+                return i
+            if ch == "\\":
+                i += 2
+                continue
+            if not display and text.startswith("\n\n", i):
+                # Inline math never spans a blank line.
+                return -1
+            i += 1
+        return None
+
+    # ------------------------------------------------------------------ #
+    # Regions that are never scanned
+    # ------------------------------------------------------------------ #
+
+    def _skip_code(
+        self, text: str, pos: int, at_line_start: bool, final: bool
+    ) -> int | None:
+        """Skip a code span or fenced block starting at *pos*."""
+        fence = _FENCE.match(text, pos)
+        if fence and at_line_start:
+            marker = fence.group(1)
+            close = re.compile(
+                r"^ {0,3}%s{%d,}[ \t]*$" % (re.escape(marker[0]), len(marker)),
+                re.MULTILINE,
+            )
+            line_end = text.find("\n", pos)
+            match = None
+            if line_end >= 0:
+                match = close.search(text, line_end + 1)
+            if match:
+                return match.end()
+            if final:
+                return len(text)
+            return None if len(text) - pos <= self.max_pending else len(text)
+        if text[pos] == "~":
+            return pos + 1
+        run = _BACKTICKS.match(text, pos).end() - pos
+        end = pos + run
+        while True:
+            found = text.find("`" * run, end)
+            if found < 0:
+                if final or len(text) - pos > self.max_pending:
+                    return pos + run
+                return None
+            after = found + run
+            if after < len(text) and text[after] == "`":
+                # A longer run of backticks does not close this span.
+                end = _BACKTICKS.match(text, after).end()
+                continue
+            if after == len(text) and not final:
+                return None
+            return after
+
+    def _skip_raw_html(self, text: str, pos: int, final: bool) -> int | None:
+        """Skip a ``<code>``/``<pre>``/... element starting at *pos*."""
+        match = _RAW_TAGS.match(text, pos)
+        if match is None:
+            return pos + 1
+        closing = re.compile(r"</%s\s*>" % match.group(1), re.IGNORECASE)
+        end = closing.search(text, match.end())
+        if end:
+            return end.end()
+        if final or len(text) - pos > self.max_pending:
+            return len(text)
+        return None
+
+
+def find_math(
+    text: str,
+    delimiters: Sequence[tuple[str, str, bool]] = DEFAULT_DELIMITERS,
+) -> list[MathSpan]:
+    """Return every math span in *text*, in order.
+
+    Escaped dollars (``\\$``), inline code, fenced code blocks and
+    ``<code>``/``<pre>``/``<script>``/``<style>`` elements are skipped.  A
+    single ``$`` opens inline math only if it is not followed by
+    whitespace, and closes it only if not preceded by whitespace or
+    followed by a digit, so prices like "$5 and $10" are left alone.
+    """
+    segments, _ = _Scanner(delimiters, len(text)).scan(text, final=True)
+    return [s for s in segments if isinstance(s, MathSpan)]
+
+
+# ====================================================================== #
+# Rendering
+# ====================================================================== #
+
+def _render_segments(
+    segments: list[str | MathSpan],
+    renderer,
+    wrap: Callable[[str, MathSpan], str] | None,
+    errors: str,
+) -> str:
+    """Render the math in *segments* (each distinct span once) and join."""
+    spans = [s for s in segments if isinstance(s, MathSpan)]
+    rendered: dict[tuple[str, bool], str | MathJaxRenderError] = {}
+    for display in (True, False):
+        unique = list(dict.fromkeys(
+            s.latex for s in spans if s.display is display
+        ))
+        if unique:
+            results = renderer.render_batch(unique, display=display)
+            rendered.update(
+                ((latex, display), result)
+                for latex, result in zip(unique, results)
+            )
+
+    parts = []
+    for segment in segments:
+        if not isinstance(segment, MathSpan):
+            parts.append(segment)
+            continue
+        result = rendered[segment.latex, segment.display]
+        if isinstance(result, MathJaxRenderError):
+            if errors == "raise":
+                raise result
+            parts.append(segment.raw)
+        else:
+            parts.append(wrap(result, segment) if wrap else result)
+    return "".join(parts)
+
+
+def render_document(
+    text: str,
+    *,
+    renderer=None,
+    delimiters: Sequence[tuple[str, str, bool]] = DEFAULT_DELIMITERS,
+    wrap: Callable[[str, MathSpan], str] | None = None,
+    errors: str = "keep",
+) -> str:
+    """Replace every math span in *text* with its rendered SVG.
+
+    The text is scanned once (see :func:`find_math`); identical spans are
+    rendered only once, and all of them go to the renderer in one batch.
+
+    Parameters
+    ----------
+    text:
+        Markdown or HTML source.
+    renderer:
+        Anything with a ``render_batch`` method, such as
+        :class:`~quickjax.MathJaxRenderer` or
+        :class:`~quickjax.ThreadSafeRenderer`.  Defaults to the renderer
+        behind :func:`quickjax.render`.
+    delimiters:
+        ``(open, close, display)`` triples; see :data:`DEFAULT_DELIMITERS`.
+    wrap:
+        Optional ``wrap(svg, span) -> str`` producing the replacement text,
+        e.g. to put display math in a ``<div>``.
+    errors:
+        ``"keep"`` (default) leaves spans that fail to render untouched;
+        ``"raise"`` raises the :class:`MathJaxRenderError`.
+    """
+    if errors not in ("keep", "raise"):
+        raise ValueError(f"errors must be 'keep' or 'raise', not {errors!r}")
+    renderer = renderer or _get_renderer()
+    segments, _ = _Scanner(delimiters, len(text)).scan(text, final=True)
+    return _render_segments(segments, renderer, wrap, errors)
+
+
+def render_document_iter(
+    chunks: Iterable[str],
+    *,
+    renderer=None,
+    delimiters: Sequence[tuple[str, str, bool]] = DEFAULT_DELIMITERS,
+    wrap: Callable[[str, MathSpan], str] | None = None,
+    errors: str = "keep",
+    max_pending: int = 1024 * 1024,
+) -> Iterator[str]:
+    """Streaming :func:`render_document` over an iterable of text chunks.
+
+    Chunks may split delimiters, math and code blocks anywhere; output is
+    yielded as soon as each part of the input is complete, so memory stays
+    bounded by the chunk size plus the longest open span.  An opener left
+    unclosed for more than *max_pending* characters is treated as literal
+    text.
+    """
+    if errors not in ("keep", "raise"):
+        raise ValueError(f"errors must be 'keep' or 'raise', not {errors!r}")
+    renderer = renderer or _get_renderer()
+    scanner = _Scanner(delimiters, max_pending)
+    buffer = ""
+    line_start = True
+    for chunk in chunks:
+        buffer += chunk
+        segments, consumed = scanner.scan(
+            buffer, final=False, line_start=line_start
+        )
+        if consumed:
+            line_start = buffer[consumed - 1] == "\n"
+            buffer = buffer[consumed:]
+            yield _render_segments(segments, renderer, wrap, errors)
+    segments, _ = scanner.scan(buffer, final=True, line_start=line_start)
+    if segments:
+        yield _render_segments(segments, renderer, wrap, errors)
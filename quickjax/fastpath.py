@@ -0,0 +1,130 @@
+"""Precomputed SVGs for trivial inputs (single symbols), built with the bundle.
+
+Much inline math is one token: ``x``, ``n``, ``\\alpha``, ``2``,
+``\\infty``.  ``build_bundle.sh`` renders each input in :data:`INPUTS`,
+in both modes, with the default configuration and writes the results to
+``quickjax/js/fastpath.json``, keyed to the bundle's fingerprint.
+:class:`~quickjax.MathJaxRenderer` consults the table before its caches,
+so these inputs are a dictionary lookup and never need a context.
+
+Glyph ids in the SVGs are derived from the input (see ``typeset()`` in
+``renderer.js``), so a formula's markup does not depend on what its
+context rendered before.  Only entries that render byte-identically in
+two fresh contexts, one input at a time and as a batch, are kept, so a
+table hit is exactly what a live render would return.
+
+Usage::
+
+    python -m quickjax.fastpath [OUTPUT]
+"""
+
+import functools
+import json
+import string
+import sys
+from pathlib import Path
+
+TABLE = Path(__file__).parent / "js" / "fastpath.json"
+
+_GREEK = (
+    "alpha beta gamma delta epsilon varepsilon zeta eta theta vartheta "
+    "iota kappa lambda mu nu xi pi varpi rho varrho sigma varsigma tau "
+    "upsilon phi varphi chi psi omega "
+    "Gamma Delta Theta Lambda Xi Pi Sigma Upsilon Phi Psi Omega"
+).split()
+
+_SYMBOLS = (
+    "infty partial nabla pm mp times cdot cdots ldots dots circ ast star "
+    "leq geq neq approx equiv sim propto in notin subset subseteq cup cap "
+    "emptyset forall exists neg to rightarrow leftarrow Rightarrow "
+    "Leftrightarrow mapsto ell hbar Re Im aleph prime angle perp parallel"
+).split()
+
+# Single characters and control sequences, plus a few very common pairs.
+INPUTS: tuple[str, ...] = (
+    tuple(string.ascii_letters)
+    + tuple(string.digits)
+    + tuple("+-=<>()[]|/!',.;:")
+    + tuple("\\" + name for name in _GREEK + _SYMBOLS)
+    + ("x^2", "n^2", "x_i", "a_i", "x_n", "a_n", "2n", "n+1", "n-1",
+       "i,j", "f(x)", "x,y")
+)
+
+
+# ====================================================================== #
+# Runtime lookup
+# ====================================================================== #
+
+@functools.lru_cache(maxsize=4)
+def load_table(path: Path = TABLE) -> dict[bool, dict[str, str]]:
+    """Return ``{display: {latex: svg}}`` from *path*.
+
+    Empty when the file is missing or was built for a different bundle
+    than the one installed.
+    """
+    from .backend import MathJaxRenderer, bundle_fingerprint
+
+    try:
+        data = json.loads(path.read_text("utf-8"))
+        bundle = bundle_fingerprint(MathJaxRenderer._JS_BUNDLE)
+        if data["bundle"] == bundle:
+            return {True: data["display"], False: data["inline"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return {True: {}, False: {}}
+
+
+# ====================================================================== #
+# Build
+# ====================================================================== #
+
+def build_table(inputs: tuple[str, ...] = INPUTS) -> dict:
+    """Render *inputs* in both modes and return the verified table.
+
+    Each input is rendered twice, at the same position on two fresh
+    contexts: on its own with :meth:`~quickjax.MathJaxRenderer.render`,
+    and in one :meth:`~quickjax.MathJaxRenderer.render_batch`.  Inputs that
+    fail or whose two renderings differ by a single byte are left out.
+    Raises :class:`~quickjax.MathJaxRenderError` if the bundle cannot be
+    loaded.
+    """
+    from .backend import (
+        MathJaxRenderError,
+        MathJaxRenderer,
+        bundle_fingerprint,
+    )
+
+    table: dict = {
+        "bundle": bundle_fingerprint(MathJaxRenderer._JS_BUNDLE),
+        "display": {},
+        "inline": {},
+    }
+    # The table must not feed its own build.
+    first = MathJaxRenderer(fastpath=False)
+    second = MathJaxRenderer(fastpath=False)
+    for display, key in ((True, "display"), (False, "inline")):
+        batch = second.render_batch(inputs, display=display)
+        for latex, batched in zip(inputs, batch):
+            try:
+                svg = first.render(latex, display=display)
+            except MathJaxRenderError:
+                continue
+            if svg == batched:
+                table[key][latex] = svg
+    return table
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    output = Path(argv[0]) if argv else TABLE
+    table = build_table()
+    output.write_text(
+        json.dumps(table, ensure_ascii=False, sort_keys=True), "utf-8"
+    )
+    kept = len(table["display"]) + len(table["inline"])
+    print(f"{output}: {kept} of {2 * len(INPUTS)} entries verified")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
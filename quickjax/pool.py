@@ -0,0 +1,418 @@
+"""Multi-core rendering: a pool of warm MathJax worker processes."""
+
+import concurrent.futures as cf
+import gc
+import multiprocessing
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator
+
+from .backend import (
+    MathJaxRenderError,
+    MathJaxRenderer,
+    _chunked,
+    _stream_chunks,
+)
+
+
+# ====================================================================== #
+# Worker-side state (one renderer per worker process)
+# ====================================================================== #
+
+_worker_renderer: MathJaxRenderer | None = None
+
+
+def _init_worker(options: dict) -> None:
+    """Process initializer: build the worker's MathJax context up front."""
+    global _worker_renderer
+    _worker_renderer = MathJaxRenderer(**options)
+    _worker_renderer.warm_up()
+
+
+def _adopt_renderer(renderer: MathJaxRenderer) -> None:
+    """Prefork initializer: use the renderer inherited from the parent."""
+    global _worker_renderer
+    _worker_renderer = renderer
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _render_chunk(
+    items: list, display: bool | None, timeout: float | None = None
+) -> list[str | MathJaxRenderError]:
+    """Render *items* in a worker, returning per-item SVGs or errors.
+
+    With *display* set to *None*, *items* are ``(latex, display)`` pairs.
+    *timeout* is the QuickJS time limit for the call (see
+    :meth:`MathJaxRenderer.render_batch`).
+    """
+    if display is None:
+        return _render_pairs(_worker_renderer, items, timeout)
+    return _worker_renderer.render_batch(
+        items, display=display, chunk_size=len(items), timeout=timeout
+    )
+
+
+def _render_pairs(
+    renderer: MathJaxRenderer,
+    items: list[tuple[str, bool]],
+    timeout: float | None = None,
+) -> list[str | MathJaxRenderError]:
+    """Render ``(latex, display)`` pairs with one batch per display mode."""
+    results: list[str | MathJaxRenderError | None] = [None] * len(items)
+    for display in (True, False):
+        indices = [
+            i for i, (_, mode) in enumerate(items) if bool(mode) is display
+        ]
+        if not indices:
+            continue
+        rendered = renderer.render_batch(
+            [items[i][0] for i in indices],
+            display=display,
+            chunk_size=len(indices),
+            timeout=timeout,
+        )
+        for i, result in zip(indices, rendered):
+            results[i] = result
+    return results
+
+
+# ====================================================================== #
+# Pool
+# ====================================================================== #
+
+class MathJaxRendererPool:
+    """Render on several cores with a pool of warm worker processes.
+
+    Each worker owns its own :class:`MathJaxRenderer`, initialized once when
+    the process starts, so the ~0.3 s bundle evaluation is paid *workers*
+    times rather than once per task.  Work is shipped to the workers in
+    chunks to amortize the inter-process round-trip.
+
+    If a worker dies (segfault, OOM kill, ...), the pool is rebuilt and the
+    affected chunks are resubmitted up to *max_retries* times before their
+    futures fail with :class:`MathJaxRenderError`.
+
+    With *prefork* (POSIX only), the parent builds and warms one renderer
+    and the workers are forked from it, inheriting the evaluated bundle
+    instead of each evaluating it again.  Start-up then costs about one
+    initialization, and the MathJax heap pages are shared copy-on-write
+    until a worker writes to them.  Python objects alive at fork time are
+    moved out of the cyclic GC's reach (:func:`gc.freeze`) so collections
+    in the workers do not unshare them either.
+
+    Extra keyword arguments are passed to each worker's
+    :class:`MathJaxRenderer` (they must be picklable unless *prefork* is
+    set), e.g. a shared ``disk_cache``.
+
+    Usage::
+
+        with MathJaxRendererPool(workers=8) as pool:
+            svgs = pool.render_many(formulas)
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        *,
+        max_retries: int = 2,
+        mp_context=None,
+        prefork: bool = False,
+        **renderer_options,
+    ) -> None:
+        self._workers = workers or os.cpu_count() or 1
+        self._renderer_options = renderer_options
+        self._max_retries = max_retries
+        self._template: MathJaxRenderer | None = None
+        if prefork:
+            if mp_context is None:
+                if "fork" not in multiprocessing.get_all_start_methods():
+                    raise ValueError("prefork requires os.fork()")
+                mp_context = multiprocessing.get_context("fork")
+            elif mp_context.get_start_method() != "fork":
+                raise ValueError("prefork requires the 'fork' start method")
+            self._template = MathJaxRenderer(**renderer_options)
+            self._template.warm_up()
+        self._mp_context = mp_context
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = self._new_executor()
+        self._warm_up()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    @property
+    def workers(self) -> int:
+        """Number of worker processes."""
+        return self._workers
+
+    def submit(self, latex: str, *, display: bool = True) -> cf.Future:
+        """Schedule one render and return a :class:`concurrent.futures.Future`.
+
+        The future resolves to the SVG string, or raises
+        :class:`MathJaxRenderError`.
+        """
+        outer: cf.Future = cf.Future()
+        chunk = self._submit_chunk([latex], display)
+
+        def _unwrap(f: cf.Future) -> None:
+            if f.cancelled():
+                outer.cancel()
+            elif f.exception() is not None:
+                _resolve(outer, exc=f.exception())
+            elif isinstance(f.result()[0], MathJaxRenderError):
+                _resolve(outer, exc=f.result()[0])
+            else:
+                _resolve(outer, result=f.result()[0])
+
+        chunk.add_done_callback(_unwrap)
+        return outer
+
+    def render(self, latex: str, *, display: bool = True) -> str:
+        """Render a single expression on a worker and wait for the result."""
+        return self.submit(latex, display=display).result()
+
+    def map(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+    ) -> Iterator[str]:
+        """Render *latexes*, yielding SVGs in input order.
+
+        Like :meth:`concurrent.futures.Executor.map`, the first failing
+        expression raises :class:`MathJaxRenderError` when it is reached.
+        """
+        futures = [
+            self._submit_chunk(chunk, display)
+            for chunk in _chunked(latexes, chunksize)
+        ]
+        try:
+            for future in futures:
+                for result in future.result():
+                    if isinstance(result, MathJaxRenderError):
+                        raise result
+                    yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def map_unordered(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+    ) -> Iterator[tuple[int, str]]:
+        """Render *latexes*, yielding ``(index, svg)`` pairs as they finish."""
+        futures: dict[cf.Future, int] = {}
+        start = 0
+        for chunk in _chunked(latexes, chunksize):
+            futures[self._submit_chunk(chunk, display)] = start
+            start += len(chunk)
+        try:
+            for future in cf.as_completed(futures):
+                for offset, result in enumerate(future.result()):
+                    if isinstance(result, MathJaxRenderError):
+                        raise result
+                    yield futures[future] + offset, result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def render_iter(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+        ordered: bool = True,
+        max_in_flight: int | None = None,
+    ) -> Iterator:
+        """Lazily render an iterable of any length across the workers.
+
+        Unlike :meth:`map`, inputs are pulled only as results are consumed
+        (at most *max_in_flight* chunks, default twice the worker count, are
+        outstanding), so memory stays flat for corpora of any size, and a
+        failing expression yields its :class:`MathJaxRenderError` instead
+        of ending the stream.
+
+        Yields results in input order, or ``(index, result)`` pairs as they
+        finish when *ordered* is false.
+        """
+        return _stream_chunks(
+            lambda chunk: self._submit_chunk(chunk, display),
+            latexes,
+            chunksize,
+            max_in_flight or 2 * self._workers,
+            ordered,
+        )
+
+    def render_many(
+        self,
+        latexes: Iterable[str],
+        *,
+        display: bool = True,
+        chunksize: int = 16,
+    ) -> list[str]:
+        """Render *latexes* and return the SVGs as a list in input order."""
+        return list(self.map(latexes, display=display, chunksize=chunksize))
+
+    @property
+    def prefork(self) -> bool:
+        """Whether workers are forked from a renderer warmed in the parent."""
+        return self._template is not None
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+        executor.shutdown(wait=True, cancel_futures=True)
+        if self._template is not None:
+            self._template.close()
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _new_executor(self) -> cf.ProcessPoolExecutor:
+        if self._template is None:
+            return cf.ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=self._mp_context,
+                initializer=_init_worker,
+                initargs=(self._renderer_options,),
+            )
+        # Fork-based executors start every worker on the first submit.
+        # Do that now, with the parent's objects frozen, so the renderer is
+        # inherited as-is (never pickled) and the workers' collections skip
+        # the shared pages.  The parent unfreezes right after.
+        executor = cf.ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=self._mp_context,
+            initializer=_adopt_renderer,
+            initargs=(self._template,),
+        )
+        gc.freeze()
+        try:
+            executor.submit(_ping)
+        finally:
+            gc.unfreeze()
+        return executor
+
+    def _warm_up(self) -> None:
+        # One ping per worker forces every process to start (and run its
+        # initializer) now rather than on the first real request.
+        pings = [self._executor.submit(_ping) for _ in range(self._workers)]
+        try:
+            cf.wait(pings)
+            for ping in pings:
+                ping.result()
+        except BrokenProcessPool as exc:
+            self._executor.shutdown(wait=False)
+            raise MathJaxRenderError(
+                f"Failed to start MathJax worker processes: {exc}"
+            ) from exc
+
+    def _restart(
+        self, broken: cf.ProcessPoolExecutor
+    ) -> cf.ProcessPoolExecutor:
+        """Replace *broken* with a fresh executor (once per breakage)."""
+        with self._lock:
+            if self._closed:
+                raise MathJaxRenderError("MathJaxRendererPool is closed")
+            if self._executor is broken:
+                broken.shutdown(wait=False)
+                self._executor = self._new_executor()
+            return self._executor
+
+    def _submit_chunk(
+        self,
+        items: list,
+        display: bool | None,
+        timeout: float | None = None,
+    ) -> cf.Future:
+        outer: cf.Future = cf.Future()
+
+        def _attempt(executor: cf.ProcessPoolExecutor, tries: int) -> None:
+            try:
+                inner = executor.submit(
+                    _render_chunk, items, display, timeout
+                )
+            except BrokenProcessPool:
+                _retry(executor, tries)
+                return
+            except RuntimeError as exc:
+                _resolve(outer, exc=MathJaxRenderError(str(exc)))
+                return
+            inner.add_done_callback(lambda f: _done(f, executor, tries))
+
+        def _retry(executor: cf.ProcessPoolExecutor, tries: int) -> None:
+            if tries >= self._max_retries:
+                _resolve(outer, exc=MathJaxRenderError(
+                    f"MathJax worker crashed while rendering {len(items)} "
+                    f"expression(s); gave up after {tries + 1} attempt(s)"
+                ))
+                return
+            try:
+                fresh = self._restart(executor)
+            except MathJaxRenderError as exc:
+                _resolve(outer, exc=exc)
+                return
+            _attempt(fresh, tries + 1)
+
+        def _done(inner: cf.Future, executor: cf.ProcessPoolExecutor,
+                  tries: int) -> None:
+            if inner.cancelled():
+                outer.cancel()
+                return
+            exc = inner.exception()
+            if isinstance(exc, BrokenProcessPool):
+                _retry(executor, tries)
+            elif exc is not None:
+                _resolve(outer, exc=exc)
+            else:
+                _resolve(outer, result=inner.result())
+
+        with self._lock:
+            if self._closed:
+                raise MathJaxRenderError("MathJaxRendererPool is closed")
+            executor = self._executor
+        _attempt(executor, 0)
+        return outer
+
+    # ------------------------------------------------------------------ #
+    # Context-manager support
+    # ------------------------------------------------------------------ #
+
+    def __enter__(self) -> "MathJaxRendererPool":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        prefork = " prefork" if self._template is not None else ""
+        return f"<{self.__class__.__name__} workers={self._workers}{prefork}>"
+
+
+def _resolve(
+    future: cf.Future,
+    result: object = None,
+    exc: BaseException | None = None,
+) -> None:
+    """Settle *future* unless the caller already cancelled it."""
+    if not future.set_running_or_notify_cancel():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
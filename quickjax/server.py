@@ -0,0 +1,529 @@
+"""Local HTTP render service (standard library only).
+
+One process holds a set of warm MathJax contexts and serves any number of
+clients, whatever their language::
+
+    python -m quickjax.server --port 8000 --contexts 8
+
+Endpoints
+---------
+``GET /render?tex=...&display=1&output=svg`` and ``POST /render``
+    Render one expression.  The POST body is ``{"tex": ..., "display":
+    ..., "output": ...}``.  ``output`` is ``"svg"`` (default) or
+    ``"mathml"``.  Responses carry a content-hash ``ETag``, and a request
+    whose ``If-None-Match`` matches gets ``304 Not Modified``.
+``POST /batch``
+    ``{"tex": [...], "display": ..., "output": ...}`` returns
+    ``{"results": [{"svg": ...} | {"error": ...}, ...]}`` in input order.
+``GET /health`` and ``GET /metrics``
+    Liveness, and JSON counters: requests, errors, queue depth, recent
+    latency percentiles, context and cache statistics.
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import hashlib
+import json
+import sys
+import threading
+import time
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from .backend import (
+    MathJaxRenderError,
+    MathJaxRenderer,
+    ThreadSafeRenderer,
+    _DEFINITION,
+)
+from .cache import DiskCache, RenderCache
+
+_CONTENT_TYPES = {
+    "svg": "image/svg+xml; charset=utf-8",
+    "mathml": "application/mathml+xml; charset=utf-8",
+}
+_TRUE = ("1", "true", "yes", "on")
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# ====================================================================== #
+# Server
+# ====================================================================== #
+
+class MathJaxServer(ThreadingHTTPServer):
+    """Threaded HTTP server rendering on a :class:`ThreadSafeRenderer`.
+
+    Each connection is served on its own thread, which checks out one of
+    the warm contexts for the duration of a render.  Requests that cannot
+    get a context within *queue_timeout* seconds fail with ``503``, and
+    failed expressions with ``422``.
+
+    Parameters
+    ----------
+    address:
+        ``(host, port)`` to listen on; port 0 picks a free one.
+    contexts:
+        Number of MathJax contexts (default: CPU count), all created and
+        warmed before the server accepts requests.
+    renderer:
+        An existing :class:`ThreadSafeRenderer` to render on instead.
+    queue_timeout:
+        Seconds a request may wait for a free context.
+    max_body:
+        Largest accepted request body, in bytes.
+    max_batch:
+        Largest accepted number of expressions per ``/batch`` request.
+    cache_control:
+        ``Cache-Control`` header for successful renders.
+    **renderer_options:
+        Passed to each :class:`MathJaxRenderer` when *renderer* is not
+        given.  Unless ``cache`` says otherwise, the contexts share one
+        in-memory :class:`RenderCache`.
+
+    Usage::
+
+        with MathJaxServer(("127.0.0.1", 8000), contexts=4) as server:
+            server.serve_forever()
+    """
+
+    daemon_threads = True
+    LATENCY_WINDOW = 1024
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", 8000),
+        *,
+        contexts: int | None = None,
+        renderer: ThreadSafeRenderer | None = None,
+        queue_timeout: float = 10.0,
+        max_body: int = 1 << 20,
+        max_batch: int = 1024,
+        cache_control: str = "public, max-age=86400",
+        **renderer_options,
+    ) -> None:
+        self.cache: RenderCache | None = None
+        if renderer is None:
+            cache = renderer_options.get("cache", True)
+            if cache is True:
+                cache = RenderCache()
+            if isinstance(cache, RenderCache):
+                self.cache = cache
+            renderer_options["cache"] = cache
+            renderer = ThreadSafeRenderer(
+                contexts,
+                factory=functools.partial(MathJaxRenderer, **renderer_options),
+            )
+            _warm_all(renderer)
+        elif renderer_options:
+            raise TypeError(
+                "renderer_options cannot be combined with an explicit renderer"
+            )
+        self.renderer = renderer
+        self.queue_timeout = queue_timeout
+        self.max_body = max_body
+        self.max_batch = max_batch
+        self.cache_control = cache_control
+        self.access_log = False
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._requests = 0
+        self._errors = 0
+        self._not_modified = 0
+        self._in_flight = 0
+        self._waiting = 0
+        self._latencies: collections.deque[float] = collections.deque(
+            maxlen=self.LATENCY_WINDOW
+        )
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        """Base URL the server listens on."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _render(
+        self, sources: list[str], display: bool, output: str
+    ) -> list[str | MathJaxRenderError]:
+        """Render *sources* on a free context, as one batch.
+
+        Fails with 503 when no context frees up within *queue_timeout*.
+        Contexts and caches are shared by every client, so a batch that
+        defines macros (which its later items may use) bypasses the caches
+        and its context is :meth:`~quickjax.MathJaxRenderer.reset` after.
+        """
+        with self._lock:
+            self._waiting += 1
+        acquired = False
+        try:
+            with self.renderer.checkout(self.queue_timeout) as renderer:
+                acquired = True
+                with self._lock:
+                    self._waiting -= 1
+                if any(map(_DEFINITION.search, sources)):
+                    kind = "mathml" if output == "mathml" else "svg"
+                    try:
+                        return renderer._render_many(
+                            sources, display, kind=kind
+                        )
+                    finally:
+                        renderer.reset()
+                convert = (
+                    renderer.to_mathml_batch if output == "mathml"
+                    else renderer.render_batch
+                )
+                return convert(sources, display=display)
+        except MathJaxRenderError as exc:
+            if acquired:
+                raise
+            raise _BadRequest(HTTPStatus.SERVICE_UNAVAILABLE, str(exc))
+        finally:
+            if not acquired:
+                with self._lock:
+                    self._waiting -= 1
+
+    def stats(self) -> dict:
+        """Return request counters, queue depth and recent latencies.
+
+        ``latency_ms`` covers the last :attr:`LATENCY_WINDOW` requests.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "uptime": time.time() - self._started,
+                "requests": self._requests,
+                "errors": self._errors,
+                "not_modified": self._not_modified,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+            }
+        stats["latency_ms"] = _latency_summary(latencies)
+        stats["contexts"] = self.renderer.stats()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+    def _record(self, seconds: float, error: bool) -> None:
+        with self._lock:
+            self._requests += 1
+            self._errors += error
+            self._latencies.append(seconds)
+
+
+def _warm_all(renderer: ThreadSafeRenderer) -> None:
+    """Create every context of *renderer* now, building them in parallel."""
+    with contextlib.ExitStack() as stack:
+        renderers = [
+            stack.enter_context(renderer.checkout())
+            for _ in range(renderer.max_contexts)
+        ]
+        for each in renderers:
+            each.warm_up(background=True)
+        for each in renderers:
+            each.warm_up()
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float]:
+    """Count, mean and percentiles (in ms) of sorted *latencies*."""
+    if not latencies:
+        return {"count": 0}
+
+    def pick(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] \
+            * 1000
+
+    return {
+        "count": len(latencies),
+        "mean": sum(latencies) / len(latencies) * 1000,
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": latencies[-1] * 1000,
+    }
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _matches(header: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header value matches *etag*."""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+# ====================================================================== #
+# Request handling
+# ====================================================================== #
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MathJaxServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json({
+                "status": "ok",
+                "queue_depth": self.server._waiting,
+            })
+        elif url.path == "/metrics":
+            self._send_json(self.server.stats())
+        elif url.path == "/render":
+            query = parse_qs(url.query)
+            self._handle(self._render_one, {
+                key: values[-1] for key, values in query.items()
+            }, query_string=True)
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path
+        if path not in ("/render", "/batch"):
+            # The body is left unread, so the connection cannot be reused.
+            self.close_connection = True
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+            return
+        try:
+            request = self._read_json()
+        except _BadRequest as exc:
+            self._send_error(exc.status, str(exc))
+            return
+        if path == "/render":
+            self._handle(self._render_one, request)
+        else:
+            self._handle(self._render_batch, request)
+
+    # ------------------------------------------------------------------ #
+    # Endpoints
+    # ------------------------------------------------------------------ #
+
+    def _handle(self, endpoint, request: dict, query_string=False) -> None:
+        server = self.server
+        with server._lock:
+            server._in_flight += 1
+        start = time.perf_counter()
+        error = True
+        try:
+            display, output = _parse_options(request, query_string)
+            error = endpoint(request, display, output)
+        except _BadRequest as exc:
+            self._send_error(exc.status, str(exc))
+        except Exception:
+            # Logged whatever access_log says; a response may already be
+            # half written, so the connection is not reused.
+            BaseHTTPRequestHandler.log_message(
+                self, "error handling %s %s:\n%s",
+                self.command, self.path, traceback.format_exc(),
+            )
+            self.close_connection = True
+            self._send_error(
+                HTTPStatus.INTERNAL_SERVER_ERROR, "internal server error"
+            )
+        finally:
+            with server._lock:
+                server._in_flight -= 1
+            server._record(time.perf_counter() - start, error)
+
+    def _render_one(self, request: dict, display: bool, output: str) -> bool:
+        tex = request.get("tex")
+        if not isinstance(tex, str):
+            raise _BadRequest(HTTPStatus.BAD_REQUEST, "'tex' must be a string")
+        (result,) = self.server._render([tex], display, output)
+        if isinstance(result, MathJaxRenderError):
+            raise _BadRequest(HTTPStatus.UNPROCESSABLE_ENTITY, str(result))
+        self._send_body(result.encode("utf-8"), _CONTENT_TYPES[output])
+        return False
+
+    def _render_batch(
+        self, request: dict, display: bool, output: str
+    ) -> bool:
+        tex = request.get("tex")
+        if not isinstance(tex, list) or not all(
+            isinstance(item, str) for item in tex
+        ):
+            raise _BadRequest(
+                HTTPStatus.BAD_REQUEST, "'tex' must be a list of strings"
+            )
+        if len(tex) > self.server.max_batch:
+            raise _BadRequest(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"at most {self.server.max_batch} expressions per batch",
+            )
+        results = [
+            {"error": str(result)}
+            if isinstance(result, MathJaxRenderError)
+            else {output: result}
+            for result in self.server._render(tex, display, output)
+        ]
+        self._send_body(
+            json.dumps({"results": results}).encode("utf-8"),
+            "application/json",
+        )
+        return any("error" in result for result in results)
+
+    # ------------------------------------------------------------------ #
+    # I/O helpers
+    # ------------------------------------------------------------------ #
+
+    def _read_json(self) -> dict:
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            raise _BadRequest(
+                HTTPStatus.LENGTH_REQUIRED, "Content-Length required"
+            ) from None
+        if length < 0:
+            self.close_connection = True
+            raise _BadRequest(
+                HTTPStatus.BAD_REQUEST, "Content-Length must not be negative"
+            )
+        if length > self.server.max_body:
+            self.close_connection = True
+            raise _BadRequest(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"body larger than {self.server.max_body} bytes",
+            )
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as exc:
+            raise _BadRequest(
+                HTTPStatus.BAD_REQUEST, f"invalid JSON: {exc}"
+            ) from None
+        if not isinstance(request, dict):
+            raise _BadRequest(
+                HTTPStatus.BAD_REQUEST, "body must be a JSON object"
+            )
+        return request
+
+    def _send_body(self, body: bytes, content_type: str) -> None:
+        etag = _etag(body)
+        if _matches(self.headers.get("If-None-Match"), etag):
+            with self.server._lock:
+                self.server._not_modified += 1
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", self.server.cache_control)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", self.server.cache_control)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(
+        self, payload: dict, status: HTTPStatus = HTTPStatus.OK
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send_json({"error": message}, status)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+
+def _parse_options(request: dict, query_string: bool) -> tuple[bool, str]:
+    display = request.get("display", True)
+    if query_string:
+        display = str(display).lower() in _TRUE
+    elif not isinstance(display, bool):
+        raise _BadRequest(
+            HTTPStatus.BAD_REQUEST, "'display' must be true or false"
+        )
+    output = request.get("output", "svg")
+    if output not in _CONTENT_TYPES:
+        raise _BadRequest(
+            HTTPStatus.BAD_REQUEST, "'output' must be 'svg' or 'mathml'"
+        )
+    return display, output
+
+
+# ====================================================================== #
+# Entry point
+# ====================================================================== #
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m quickjax.server",
+        description=__doc__.splitlines()[0],
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000,
+                        help="port to listen on (default: 8000)")
+    parser.add_argument("--contexts", type=int,
+                        help="MathJax contexts (default: CPU count)")
+    parser.add_argument("--queue-timeout", type=float, default=10.0,
+                        help="seconds to wait for a free context "
+                             "(default: 10)")
+    parser.add_argument("--timeout", type=float,
+                        help="seconds allowed per expression")
+    parser.add_argument("--max-length", type=int,
+                        help="longest accepted expression, in characters")
+    parser.add_argument("--max-depth", type=int,
+                        help="deepest accepted nesting of groups")
+    parser.add_argument("--compact", action="store_true",
+                        help="strip data-* annotations from the SVGs")
+    parser.add_argument("--precision", type=int,
+                        help="round SVG coordinates to this many decimals")
+    parser.add_argument("--disk-cache", type=Path,
+                        help="SQLite cache file or directory")
+    parser.add_argument("--access-log", action="store_true",
+                        help="log every request to stderr")
+    args = parser.parse_args(argv)
+
+    options: dict = {
+        "compact": args.compact,
+        "precision": args.precision,
+        "timeout": args.timeout,
+        "max_length": args.max_length,
+        "max_depth": args.max_depth,
+    }
+    if args.disk_cache is not None:
+        options["disk_cache"] = DiskCache(args.disk_cache)
+    server = MathJaxServer(
+        (args.host, args.port),
+        contexts=args.contexts,
+        queue_timeout=args.queue_timeout,
+        **options,
+    )
+    server.access_log = args.access_log
+    print(f"QuickJax serving on {server.url} with "
+          f"{server.renderer.max_contexts} contexts", file=sys.stderr)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
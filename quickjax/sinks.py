@@ -0,0 +1,553 @@
+"""Output sinks: write rendered SVGs to directories, archives or packs.
+
+Every sink takes ``(name, svg)`` pairs through :meth:`Sink.write` (or the
+results of :meth:`MathJaxRenderer.render_batch` and friends through
+:meth:`Sink.write_many`) and, by default, does the actual I/O on a
+background thread fed by a bounded queue, so rendering does not wait on
+the disk.  Errors raised by that thread surface on the next call.
+
+Usage::
+
+    with HashedDirectorySink("out/") as sink:
+        sink.write_many(zip(names, renderer.render_batch(latexes)))
+
+    with PackSink("formulas.pack") as sink:
+        for name, latex in formulas.items():
+            sink.write(name, renderer.render(latex))
+    svg = PackReader("formulas.pack")["euler"]
+"""
+
+import hashlib
+import io
+import json
+import os
+import queue
+import re
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .backend import MathJaxRenderError
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+_STOP = object()
+
+
+def safe_name(name: str, suffix: str = ".svg") -> str:
+    """Turn *name* into a relative POSIX path that stays inside its root.
+
+    Empty, ``.`` and ``..`` components are dropped and characters other
+    than letters, digits, ``_``, ``.`` and ``-`` become ``_``.
+    """
+    parts = [
+        _UNSAFE.sub("_", part) for part in name.split("/")
+        if part not in ("", ".", "..")
+    ] or ["_"]
+    return "/".join(parts) + suffix
+
+
+# ====================================================================== #
+# Base class
+# ====================================================================== #
+
+class Sink:
+    """Base class for output sinks.
+
+    Subclasses implement :meth:`_key` (where *name* is stored, computed on
+    the caller's thread), :meth:`_store` (the I/O, run on the writer
+    thread) and optionally :meth:`_flush` and :meth:`_close`.
+
+    Parameters
+    ----------
+    background:
+        Do the I/O on a dedicated thread.  With *False* every write happens
+        synchronously in :meth:`write`.
+    max_queue:
+        Writes that may be queued before :meth:`write` blocks.
+    """
+
+    def __init__(
+        self, *, background: bool = True, max_queue: int = 1024
+    ) -> None:
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+        self._closed = False
+        self.written = 0
+        if background:
+            self._queue = queue.Queue(max_queue)
+            self._thread = threading.Thread(
+                target=self._drain, name="quickjax-sink", daemon=True
+            )
+            self._thread.start()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+
+    def write(self, name: str, svg: str) -> str:
+        """Store *svg* under *name* and return where it is stored."""
+        self._check()
+        data = svg.encode("utf-8")
+        key = self._key(name, data)
+        if self._queue is None:
+            self._store(key, name, data)
+        else:
+            self._queue.put((key, name, data))
+        self.written += 1
+        return key
+
+    def write_many(
+        self, items: Iterable[tuple[str, str | MathJaxRenderError]]
+    ) -> list[str | None]:
+        """Write ``(name, result)`` pairs; failed results are skipped.
+
+        Returns where each item is stored, or *None* for failures.
+        """
+        return [
+            None if isinstance(result, MathJaxRenderError)
+            else self.write(name, result)
+            for name, result in items
+        ]
+
+    def __contains__(self, name: str) -> bool:
+        """Whether *name* has been stored, where the sink can tell."""
+        return False
+
+    def flush(self) -> None:
+        """Wait until every queued write has reached the sink's files."""
+        if self._queue is not None:
+            self._queue.join()
+        self._check()
+        self._flush()
+
+    def close(self) -> None:
+        """Finish queued writes and close the underlying files."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+        try:
+            if self._error is None:
+                self._flush()
+            self._close()
+        finally:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+
+    # ------------------------------------------------------------------ #
+    # Subclass hooks
+    # ------------------------------------------------------------------ #
+
+    def _key(self, name: str, data: bytes) -> str:
+        raise NotImplementedError
+
+    def _store(self, key: str, name: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _flush(self) -> None:
+        pass
+
+    def _close(self) -> None:
+        pass
+
+    # ------------------------------------------------------------------ #
+    # Internals
+    # ------------------------------------------------------------------ #
+
+    def _check(self) -> None:
+        if self._closed:
+            raise ValueError(f"{self.__class__.__name__} is closed")
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _drain(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if self._error is None:
+                    self._store(*item)
+            except BaseException as exc:
+                self._error = exc
+            finally:
+                self._queue.task_done()
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+# ====================================================================== #
+# Directories
+# ====================================================================== #
+
+class DirectorySink(Sink):
+    """Write each SVG to ``<directory>/<name><suffix>``.
+
+    Files are written under a temporary name and renamed into place, so a
+    file that exists is always complete; ``name in sink`` checks that,
+    which makes interrupted jobs resumable.
+    """
+
+    def __init__(
+        self, directory: str | os.PathLike, *, suffix: str = ".svg", **kwargs
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix
+        super().__init__(**kwargs)
+
+    def __contains__(self, name: str) -> bool:
+        return (self.directory / safe_name(name, self.suffix)).exists()
+
+    def _key(self, name: str, data: bytes) -> str:
+        return safe_name(name, self.suffix)
+
+    def _store(self, key: str, name: str, data: bytes) -> None:
+        _write_file(self.directory / key, data)
+
+
+class HashedDirectorySink(Sink):
+    """Content-addressed directory: identical SVGs are stored once.
+
+    Each SVG goes to ``<directory>/<hh>/<sha256><suffix>``, where ``hh`` is
+    the first two hex digits (keeping directories small at millions of
+    files).  ``manifest.jsonl`` records one ``{"name", "file"}`` line per
+    write, and is reloaded on open so ``name in sink`` works across runs.
+    """
+
+    MANIFEST = "manifest.jsonl"
+
+    def __init__(
+        self, directory: str | os.PathLike, *, suffix: str = ".svg", **kwargs
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix
+        self.files: dict[str, str] = {}
+        manifest = self.directory / self.MANIFEST
+        if manifest.exists():
+            for record in _read_jsonl(manifest):
+                self.files[record["name"]] = record["file"]
+        self._manifest = manifest.open("a", encoding="utf-8")
+        self._stored = set(self.files.values())
+        super().__init__(**kwargs)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.files
+
+    def _key(self, name: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        key = f"{digest[:2]}/{digest}{self.suffix}"
+        self.files[name] = key
+        return key
+
+    def _store(self, key: str, name: str, data: bytes) -> None:
+        if key not in self._stored:
+            path = self.directory / key
+            if not path.exists():
+                _write_file(path, data)
+            self._stored.add(key)
+        self._manifest.write(json.dumps({"name": name, "file": key}) + "\n")
+
+    def _flush(self) -> None:
+        self._manifest.flush()
+
+    def _close(self) -> None:
+        self._manifest.close()
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read_jsonl(path: Path) -> Iterator:
+    with path.open(encoding="utf-8") as lines:
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an earlier crash
+
+
+# ====================================================================== #
+# Archives
+# ====================================================================== #
+
+class ZipSink(Sink):
+    """Stream SVGs into a zip archive as ``<name><suffix>`` members.
+
+    An existing archive is appended to, and its members count for
+    ``name in sink``, so interrupted jobs resume.  An archive cut short by
+    a crash has no central directory, and is refused with
+    :class:`ValueError` rather than started over.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        suffix: str = ".svg",
+        compression: int = zipfile.ZIP_DEFLATED,
+        **kwargs,
+    ) -> None:
+        self.suffix = suffix
+        # Mode "a" would quietly start a second archive after anything that
+        # is not a zip, including a zip cut short before its directory.
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists and not zipfile.is_zipfile(path):
+            raise ValueError(
+                f"{os.fspath(path)} is not a complete zip archive"
+            )
+        self._zip = zipfile.ZipFile(path, "a", compression=compression)
+        self._compression = compression
+        self._date_time = time.localtime()[:6]
+        self._names: set[str] = set(self._zip.namelist())
+        super().__init__(**kwargs)
+
+    def __contains__(self, name: str) -> bool:
+        return safe_name(name, self.suffix) in self._names
+
+    def _key(self, name: str, data: bytes) -> str:
+        key = safe_name(name, self.suffix)
+        self._names.add(key)
+        return key
+
+    def _store(self, key: str, name: str, data: bytes) -> None:
+        info = zipfile.ZipInfo(key, self._date_time)
+        info.compress_type = self._compression
+        info.external_attr = 0o644 << 16
+        self._zip.writestr(info, data)
+
+    def _close(self) -> None:
+        self._zip.close()
+
+
+class TarSink(Sink):
+    """Stream SVGs into a tar archive as ``<name><suffix>`` members.
+
+    Compression follows the file name (``.tar.gz``/``.tgz``, ``.tar.bz2``,
+    ``.tar.xz``) unless *compression* names one (``"gz"``, ``"bz2"``,
+    ``"xz"`` or ``""``).  A tar stream cannot be appended to, so each run
+    writes a new archive front to back, to ``<path>.<n>.tmp``, which
+    replaces *path* on a successful :meth:`close`.  It starts with the
+    members of *path* and of any temporary files earlier runs left behind
+    (up to where a crash cut them short), which count for ``name in sink``,
+    so interrupted jobs resume.  Those files are only removed once the new
+    archive is in place; after a write error, the new one is dropped
+    instead.
+    """
+
+    _SUFFIXES = {".tgz": "gz", ".gz": "gz", ".bz2": "bz2", ".xz": "xz"}
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        *,
+        suffix: str = ".svg",
+        compression: str | None = None,
+        **kwargs,
+    ) -> None:
+        path = Path(path)
+        if compression is None:
+            compression = self._SUFFIXES.get(path.suffix, "")
+        self.suffix = suffix
+        self._path = path
+        self._leftovers = self._temporary_files()
+        number = max(self._leftovers, default=0) + 1
+        self._tmp = path.with_name(f"{path.name}.{number}.tmp")
+        self._tar = tarfile.open(os.fspath(self._tmp), f"w|{compression}")
+        self._mtime = time.time()
+        self._names: set[str] = set()
+        self._failed = False
+        for source in [path, *self._leftovers.values()]:
+            if source.exists():
+                self._copy_members(source)
+        super().__init__(**kwargs)
+
+    def __contains__(self, name: str) -> bool:
+        return safe_name(name, self.suffix) in self._names
+
+    def _key(self, name: str, data: bytes) -> str:
+        key = safe_name(name, self.suffix)
+        self._names.add(key)
+        return key
+
+    def _store(self, key: str, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(key)
+        info.size = len(data)
+        info.mtime = self._mtime
+        info.mode = 0o644
+        try:
+            self._tar.addfile(info, io.BytesIO(data))
+        except BaseException:
+            self._failed = True  # the stream may end in a partial member
+            raise
+
+    def _temporary_files(self) -> dict[int, Path]:
+        """Return the ``<path>.<n>.tmp`` files of earlier runs, by *n*."""
+        pattern = re.compile(re.escape(self._path.name) + r"\.(\d+)\.tmp")
+        found = {}
+        for file in self._path.parent.glob("*.tmp"):
+            match = pattern.fullmatch(file.name)
+            if match:
+                found[int(match.group(1))] = file
+        return dict(sorted(found.items()))
+
+    def _copy_members(self, source: Path) -> None:
+        try:
+            with tarfile.open(os.fspath(source), "r|*") as old:
+                for info in old:
+                    if not info.isfile() or info.name in self._names:
+                        continue
+                    data = old.extractfile(info).read()
+                    self._tar.addfile(info, io.BytesIO(data))
+                    self._names.add(info.name)
+        except (tarfile.TarError, EOFError):
+            pass  # the tail of an archive cut short by an earlier crash
+
+    def _close(self) -> None:
+        self._tar.close()
+        if self._failed:
+            # The stream may end in a partial member: keep the old files
+            # and let the next run redo this one's items.
+            self._tmp.unlink(missing_ok=True)
+            return
+        os.replace(self._tmp, self._path)
+        for leftover in self._leftovers.values():
+            leftover.unlink(missing_ok=True)
+
+
+# ====================================================================== #
+# Packed file with an offset index
+# ====================================================================== #
+
+class PackSink(Sink):
+    """Append SVGs to one packed file, indexed for random access.
+
+    The data file holds the UTF-8 SVGs back to back.  ``<path>.idx`` gets
+    one ``[name, offset, length]`` JSON line per SVG.  Index lines are
+    written in groups, each only after the data it points at has been
+    flushed, so a crash can lose index entries but never leave one
+    pointing at missing bytes.  Reopening appends; ``name in sink`` sees
+    earlier runs.  Read packs with :class:`PackReader`.
+    """
+
+    INDEX_EVERY = 256
+
+    def __init__(self, path: str | os.PathLike, **kwargs) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.index_path = _index_path(self.path)
+        self._index: dict[str, tuple[int, int]] = _load_index(
+            self.index_path
+        )
+        self._data = self.path.open("ab")
+        self._offset = self._data.tell()
+        self._index_file = self.index_path.open("a", encoding="utf-8")
+        self._unindexed: list[str] = []
+        super().__init__(**kwargs)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def _key(self, name: str, data: bytes) -> str:
+        return name
+
+    def _store(self, key: str, name: str, data: bytes) -> None:
+        self._data.write(data)
+        entry = (self._offset, len(data))
+        self._offset += len(data)
+        self._index[name] = entry
+        self._unindexed.append(json.dumps([name, *entry]) + "\n")
+        if len(self._unindexed) >= self.INDEX_EVERY:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._data.flush()
+        self._index_file.writelines(self._unindexed)
+        self._index_file.flush()
+        self._unindexed.clear()
+
+    def _close(self) -> None:
+        self._data.close()
+        self._index_file.close()
+
+
+class PackReader:
+    """Random access to the SVGs in a pack written by :class:`PackSink`.
+
+    Usage::
+
+        with PackReader("formulas.pack") as pack:
+            svg = pack["euler"]
+    """
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = Path(path)
+        self._index = _load_index(_index_path(self.path))
+        self._file = self.path.open("rb")
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> str | None:
+        """Return the SVG stored under *name*, or *None*."""
+        entry = self._index.get(name)
+        if entry is None:
+            return None
+        offset, length = entry
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        return data.decode("utf-8")
+
+    def __getitem__(self, name: str) -> str:
+        svg = self.get(name)
+        if svg is None:
+            raise KeyError(name)
+        return svg
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "PackReader":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _load_index(path: Path) -> dict[str, tuple[int, int]]:
+    """Read a pack index; later entries for a name win."""
+    if not path.exists():
+        return {}
+    return {
+        name: (offset, length)
+        for name, offset, length in _read_jsonl(path)
+    }
@@ -0,0 +1,35 @@
+// Build the dynamic font files of mathjax-modern-font as standalone scripts
+// for on-demand loading by the core bundle (quickjax/js/mathjax_core.js).
+//
+// Each file's import of the font class is replaced by the
+// globalThis.quickjaxFontClass that renderer.js publishes, then the result is
+// wrapped in a function and minified.  Usage: node build_fonts.mjs <out-dir>
+import { mkdirSync, readdirSync, readFileSync, writeFileSync } from "node:fs";
+import { join } from "node:path";
+import { transformSync } from "esbuild";
+
+const SRC_DIR = "node_modules/mathjax-modern-font/mjs/svg/dynamic";
+const IMPORT = /^\s*import\s*\{\s*MathJaxModernFont\s*\}\s*from\s*["'][^"']*svg\.js["'];?\s*$/m;
+
+const outDir = process.argv[2];
+if (!outDir) {
+  console.error("usage: node build_fonts.mjs <out-dir>");
+  process.exit(2);
+}
+mkdirSync(outDir, { recursive: true });
+
+let count = 0;
+for (const file of readdirSync(SRC_DIR).filter((f) => f.endsWith(".js"))) {
+  const source = readFileSync(join(SRC_DIR, file), "utf8");
+  if (!IMPORT.test(source)) {
+    throw new Error(`${file}: expected an import of MathJaxModernFont`);
+  }
+  const body = source.replace(IMPORT, "");
+  if (/^\s*(import|export)\b/m.test(body)) {
+    throw new Error(`${file}: unexpected import/export left after rewriting`);
+  }
+  const wrapped = `(function (MathJaxModernFont) {\n${body}\n})(globalThis.quickjaxFontClass);\n`;
+  writeFileSync(join(outDir, file), transformSync(wrapped, { minify: true }).code);
+  count++;
+}
+console.log(`${count} font files written to ${outDir}`);
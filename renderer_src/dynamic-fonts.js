@@ -0,0 +1,29 @@
+// All 26 dynamic font files of mathjax-modern-font.  Importing them registers
+// their glyph data with the font class; renderer.js then loads it with
+// loadDynamicFilesSync().  Only the full bundle (index.js) includes this file.
+import "mathjax-modern-font/mjs/svg/dynamic/accents.js";
+import "mathjax-modern-font/mjs/svg/dynamic/accents-b-i.js";
+import "mathjax-modern-font/mjs/svg/dynamic/arrows.js";
+import "mathjax-modern-font/mjs/svg/dynamic/calligraphic.js";
+import "mathjax-modern-font/mjs/svg/dynamic/double-struck.js";
+import "mathjax-modern-font/mjs/svg/dynamic/fraktur.js";
+import "mathjax-modern-font/mjs/svg/dynamic/latin.js";
+import "mathjax-modern-font/mjs/svg/dynamic/latin-b.js";
+import "mathjax-modern-font/mjs/svg/dynamic/latin-bi.js";
+import "mathjax-modern-font/mjs/svg/dynamic/latin-i.js";
+import "mathjax-modern-font/mjs/svg/dynamic/math.js";
+import "mathjax-modern-font/mjs/svg/dynamic/monospace.js";
+import "mathjax-modern-font/mjs/svg/dynamic/monospace-ex.js";
+import "mathjax-modern-font/mjs/svg/dynamic/monospace-l.js";
+import "mathjax-modern-font/mjs/svg/dynamic/PUA.js";
+import "mathjax-modern-font/mjs/svg/dynamic/sans-serif.js";
+import "mathjax-modern-font/mjs/svg/dynamic/sans-serif-b.js";
+import "mathjax-modern-font/mjs/svg/dynamic/sans-serif-bi.js";
+import "mathjax-modern-font/mjs/svg/dynamic/sans-serif-ex.js";
+import "mathjax-modern-font/mjs/svg/dynamic/sans-serif-i.js";
+import "mathjax-modern-font/mjs/svg/dynamic/sans-serif-r.js";
+import "mathjax-modern-font/mjs/svg/dynamic/script.js";
+import "mathjax-modern-font/mjs/svg/dynamic/shapes.js";
+import "mathjax-modern-font/mjs/svg/dynamic/symbols.js";
+import "mathjax-modern-font/mjs/svg/dynamic/symbols-b-i.js";
+import "mathjax-modern-font/mjs/svg/dynamic/variants.js";
@@ -0,0 +1,4 @@
+// Core bundle entry (quickjax/js/mathjax_core.js): MathJax without the
+// dynamic font files.  They are built separately into quickjax/js/fonts/ and
+// fetched on first use through the host's quickjaxLoadFont() callback.
+import "./renderer.js";
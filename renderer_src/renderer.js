@@ -0,0 +1,518 @@
+import { mathjax } from "mathjax-full/mjs/mathjax.js";
+import { TeX } from "mathjax-full/mjs/input/tex.js";
+import { MathML } from "mathjax-full/mjs/input/mathml.js";
+import { SVG } from "mathjax-full/mjs/output/svg.js";
+import { liteAdaptor } from "mathjax-full/mjs/adaptors/liteAdaptor.js";
+import { RegisterHTMLHandler } from "mathjax-full/mjs/handlers/html.js";
+import { STATE } from "mathjax-full/mjs/core/MathItem.js";
+import { SerializedMmlVisitor } from "mathjax-full/mjs/core/MmlTree/SerializedMmlVisitor.js";
+
+// Import common TeX extension packages so they register themselves
+import "mathjax-full/mjs/input/tex/ams/AmsConfiguration.js";
+import "mathjax-full/mjs/input/tex/newcommand/NewcommandConfiguration.js";
+import "mathjax-full/mjs/input/tex/boldsymbol/BoldsymbolConfiguration.js";
+import "mathjax-full/mjs/input/tex/braket/BraketConfiguration.js";
+import "mathjax-full/mjs/input/tex/cancel/CancelConfiguration.js";
+import "mathjax-full/mjs/input/tex/color/ColorConfiguration.js";
+import "mathjax-full/mjs/input/tex/enclose/EncloseConfiguration.js";
+import "mathjax-full/mjs/input/tex/extpfeil/ExtpfeilConfiguration.js";
+import "mathjax-full/mjs/input/tex/html/HtmlConfiguration.js";
+import "mathjax-full/mjs/input/tex/mhchem/MhchemConfiguration.js";
+import "mathjax-full/mjs/input/tex/noerrors/NoErrorsConfiguration.js";
+import "mathjax-full/mjs/input/tex/noundefined/NoUndefinedConfiguration.js";
+import "mathjax-full/mjs/input/tex/physics/PhysicsConfiguration.js";
+import "mathjax-full/mjs/input/tex/mathtools/MathtoolsConfiguration.js";
+import "mathjax-full/mjs/input/tex/amscd/AmsCdConfiguration.js";
+import "mathjax-full/mjs/input/tex/action/ActionConfiguration.js";
+import "mathjax-full/mjs/input/tex/bbox/BboxConfiguration.js";
+import "mathjax-full/mjs/input/tex/unicode/UnicodeConfiguration.js";
+import "mathjax-full/mjs/input/tex/verb/VerbConfiguration.js";
+import "mathjax-full/mjs/input/tex/textmacros/TextMacrosConfiguration.js";
+import "mathjax-full/mjs/input/tex/textcomp/TextcompConfiguration.js";
+import "mathjax-full/mjs/input/tex/cases/CasesConfiguration.js";
+
+// Set up synchronous font loading.  In the full bundle every dynamic font
+// file is already imported, so asyncLoad is a no-op and we just need setup()
+// to run on the font instance.  In the core bundle the host provides
+// quickjaxLoadFont(name), which returns the source of the requested font
+// file; evaluating it registers the glyph data on the spot.
+const loadFontSource = globalThis.quickjaxLoadFont;
+const fontsOnDemand = typeof loadFontSource === "function";
+mathjax.asyncLoad = fontsOnDemand
+  ? (name) => { (0, eval)(loadFontSource(name)); }
+  : (name) => {};
+mathjax.asyncIsSynchronous = true;
+
+// Initialize the lite adaptor (virtual DOM for non-browser environments)
+const adaptor = liteAdaptor();
+
+// Register the HTML handler with the adaptor
+RegisterHTMLHandler(adaptor);
+
+// Host configuration, set by MathJaxRenderer(packages=..., svg_options=...,
+// macros=..., preamble=...) as a JSON string before this file is evaluated.
+const config = JSON.parse(globalThis.quickjaxConfig || "{}");
+
+// Define the list of packages to load
+const packages = config.packages || [
+  "base", "ams", "newcommand", "boldsymbol", "braket", "cancel",
+  "color", "enclose", "extpfeil", "html", "mhchem", "noerrors",
+  "noundefined", "physics", "mathtools", "amscd", "action", "bbox",
+  "unicode", "verb", "textmacros", "textcomp", "cases",
+];
+
+// Create the SVG output jax; the TeX input and the document are created by
+// createDocument() below.
+const svgOptions = Object.assign(
+  { fontCache: "local", linebreaks: { inline: false } },
+  config.svg || {}
+);
+const svgOutput = new SVG(svgOptions);
+
+// Font files built for on-demand loading refer to the font class through
+// this global instead of importing it.
+globalThis.quickjaxFontClass = svgOutput.font.constructor;
+
+// Force synchronous loading of all dynamic font data into the font instance
+// This prevents "MathJax retry" errors for \mathbb, \mathfrak, \mathcal, etc.
+// With on-demand fonts, a missing file instead surfaces as a retry (see
+// convert()) and the host loads it and renders again.
+if (!fontsOnDemand) {
+  svgOutput.font.loadDynamicFilesSync();
+}
+
+// Per-phase timing (see takeTimings()).  The timers are only installed when
+// the host provides quickjaxClock(), a high-resolution clock in ms, so
+// uninstrumented renders run the unwrapped methods.
+const clock = globalThis.quickjaxClock;
+const timings = { parse: 0, layout: 0, serialize: 0 };
+
+function timed(phase, method) {
+  return function (...args) {
+    const start = clock();
+    try {
+      return method.apply(this, args);
+    } finally {
+      timings[phase] += clock() - start;
+    }
+  };
+}
+
+if (typeof clock === "function") {
+  // MathML -> SVG layout, then markup; TeX parsing is wrapped per input jax.
+  svgOutput.typeset = timed("layout", svgOutput.typeset);
+  adaptor.serializeXML = timed("serialize", adaptor.serializeXML);
+}
+
+// MathML input (renderMathML()) and output (toMathML()).  Neither keeps
+// state between expressions, so both outlive reset().
+const mmlInput = new MathML();
+const mmlVisitor = new SerializedMmlVisitor();
+
+if (typeof clock === "function") {
+  mmlInput.compile = timed("parse", mmlInput.compile);
+  mmlVisitor.visitTree = timed("serialize", mmlVisitor.visitTree);
+}
+
+// The TeX input jax holds the per-document state (\newcommand macros,
+// equation labels); reset() replaces it and the document.
+let texInput = null;
+let htmlDoc = null;
+
+/**
+ * Create the TeX input jax and the MathJax document, then define the
+ * configured preamble's macros.  The preamble is only compiled, never laid
+ * out, and its definitions persist for every later render.
+ */
+function createDocument() {
+  texInput = new TeX({ packages, macros: config.macros || {} });
+  if (typeof clock === "function") {
+    texInput.compile = timed("parse", texInput.compile);
+  }
+  htmlDoc = mathjax.document("", {
+    InputJax: [texInput, mmlInput],
+    OutputJax: svgOutput,
+  });
+  if (config.preamble) {
+    htmlDoc.convert(config.preamble, { display: false, end: STATE.COMPILED });
+    timings.parse = 0;
+  }
+}
+
+createDocument();
+
+/**
+ * Forget everything earlier renders defined (macros, labels) by replacing
+ * the TeX input jax and the document, as if the bundle had just been
+ * evaluated; the configured macros and preamble are defined again.  Much
+ * cheaper than a new context: the fonts and the rest of MathJax stay
+ * loaded.
+ */
+globalThis.reset = function reset() {
+  createDocument();
+};
+
+/**
+ * Return the time spent in each phase since the previous call, and reset.
+ * @returns {string} JSON-encoded {parse, layout, serialize} in ms (all zero
+ *   unless the host installed quickjaxClock).
+ */
+globalThis.takeTimings = function takeTimings() {
+  const result = JSON.stringify(timings);
+  timings.parse = timings.layout = timings.serialize = 0;
+  return result;
+};
+
+/**
+ * Return the first <svg> child of a MathJax container node, or null.
+ */
+function findSvg(containerNode) {
+  for (const child of adaptor.childNodes(containerNode)) {
+    if (adaptor.kind(child) === "svg") {
+      return child;
+    }
+  }
+  return null;
+}
+
+// Output compaction (see setOutputOptions()).
+const outputOptions = { compact: false, precision: null };
+const NUMBER = /-?(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?/gi;
+const NUMERIC_ATTRIBUTES = new Set([
+  "d", "transform", "viewBox", "x", "y", "width", "height",
+  "x1", "y1", "x2", "y2", "rx", "ry", "stroke-width",
+]);
+
+/**
+ * Round every number in an attribute value to `precision` decimal places,
+ * dropping trailing zeros.
+ */
+function roundNumbers(value, precision) {
+  return value.replace(NUMBER, (n) => String(+(+n).toFixed(precision)));
+}
+
+/**
+ * Shrink the SVG subtree under `node` in place: round coordinates, drop
+ * data-* annotations and the IE-only focusable attribute, unwrap <g>
+ * elements left without attributes, and squeeze whitespace in path data.
+ * The root element keeps its ex-based width/height/style, which carry the
+ * layout metrics.
+ */
+function compactNode(node, isRoot) {
+  for (const child of adaptor.childNodes(node).slice()) {
+    if (adaptor.kind(child) !== "#text") {
+      compactNode(child, false);
+    }
+  }
+  const { compact, precision } = outputOptions;
+  for (const { name, value } of adaptor.allAttributes(node)) {
+    if (compact && (name.startsWith("data-") || name === "focusable")) {
+      adaptor.removeAttribute(node, name);
+      continue;
+    }
+    if (!NUMERIC_ATTRIBUTES.has(name)) {
+      continue;
+    }
+    if (isRoot && name !== "viewBox") {
+      continue;
+    }
+    let result = precision === null ? value : roundNumbers(value, precision);
+    if (compact && name === "d") {
+      result = result.replace(/\s*([A-Za-z])\s*/g, "$1")
+        .replace(/\s+/g, " ").replace(/ -/g, "-");
+    } else if (compact) {
+      result = result.replace(/\s*,\s*/g, ",").replace(/\s+/g, " ").trim();
+    }
+    if (result !== value) {
+      adaptor.setAttribute(node, name, result);
+    }
+  }
+  if (compact && !isRoot && adaptor.kind(node) === "g"
+      && adaptor.allAttributes(node).length === 0) {
+    for (const child of adaptor.childNodes(node).slice()) {
+      adaptor.insert(adaptor.remove(child), node);
+    }
+    adaptor.remove(node);
+  }
+}
+
+/**
+ * Configure output compaction for this context.
+ * @param {string} optionsJson - JSON {compact: boolean, precision: int|null}.
+ */
+globalThis.setOutputOptions = function setOutputOptions(optionsJson) {
+  Object.assign(outputOptions, JSON.parse(optionsJson));
+};
+
+/**
+ * Extract the first <svg> child from a MathJax container node and return its
+ * outerHTML serialized as valid XML (properly escaping &, <, > in attributes).
+ * This strips the <mjx-container> wrapper and avoids multi-SVG line-breaking artifacts.
+ */
+function extractSvg(containerNode) {
+  const svg = findSvg(containerNode);
+  if (svg) {
+    if (outputOptions.compact || outputOptions.precision !== null) {
+      compactNode(svg, true);
+    }
+    return adaptor.serializeXML(svg);
+  }
+  // Fallback: return the full container inner HTML
+  return adaptor.innerHTML(containerNode);
+}
+
+/**
+ * Size of a length attribute in ex.  MathJax writes ex values; anything else
+ * (e.g. a percentage width) is recomputed from the viewBox, which is in
+ * thousandths of an em.
+ */
+function exSize(svg, name, viewBoxIndex) {
+  const value = adaptor.getAttribute(svg, name) || "";
+  if (value.endsWith("ex")) {
+    return parseFloat(value);
+  }
+  const viewBox = (adaptor.getAttribute(svg, "viewBox") || "").split(/\s+/);
+  const em = parseFloat(viewBox[viewBoxIndex]) / 1000;
+  return isNaN(em) ? 0 : em / svgOutput.font.params.x_height;
+}
+
+/**
+ * Read the layout metrics MathJax put on the root <svg>: width and total
+ * height in ex, and the depth below the baseline (its vertical-align).
+ */
+function svgMetrics(containerNode) {
+  const svg = findSvg(containerNode);
+  if (!svg) {
+    return { width: 0, height: 0, depth: 0 };
+  }
+  const align = /vertical-align:\s*(-?[\d.]+)ex/.exec(
+    adaptor.getAttribute(svg, "style") || ""
+  );
+  return {
+    width: exSize(svg, "width", 2),
+    height: exSize(svg, "height", 3),
+    depth: align ? -parseFloat(align[1]) : 0,
+  };
+}
+
+// Error message telling the host to run pending jobs and retry the render.
+const RETRY = "MathJax retry";
+
+// Glyph ids in a self-contained SVG are "MJX-<localID>-<glyph>".  MathJax
+// numbers localID per render, so the same formula would come out differently
+// depending on how many renders the context has done.  Deriving it from the
+// input instead makes the markup a function of the input alone (as the
+// caches and the fast-path table assume), while different formulas on one
+// page still get different ids.  An explicit svg_options localID wins.
+const pinLocalID = !("localID" in svgOptions);
+
+/**
+ * Return the glyph id prefix for an input: a 32-bit FNV-1a hash in base 36.
+ * @param {string} source - The LaTeX or MathML being typeset.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @param {string} format - Input format: "TeX" or "MathML".
+ * @returns {string}
+ */
+function localID(source, display, format) {
+  const key = format + (display ? ":D:" : ":I:") + source;
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < key.length; i++) {
+    hash = Math.imul(hash ^ key.charCodeAt(i), 0x01000193);
+  }
+  return (hash >>> 0).toString(36);
+}
+
+/**
+ * Whether an exception was raised by QuickJS itself (out of memory, stack
+ * overflow) rather than by MathJax: an InternalError, or null when not even
+ * the error object could be allocated.  These are passed on unwrapped, so
+ * the host can tell them apart from TeX errors by type, never by message.
+ * @param {*} e - The caught exception.
+ * @returns {boolean}
+ */
+function isEngineError(e) {
+  return e === null
+    || (typeof InternalError === "function" && e instanceof InternalError);
+}
+
+/**
+ * Typeset a LaTeX (or MathML) string and return the MathJax container node.
+ * @param {string} latex - The LaTeX expression to render.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @param {string} format - Input format: "TeX" (default) or "MathML".
+ * @returns {object} The lite-DOM container holding the <svg>.
+ */
+function typeset(latex, display, format = "TeX") {
+  if (pinLocalID) {
+    svgOutput.options.localID = localID(latex, display, format);
+  }
+  try {
+    return htmlDoc.convert(latex, { display, format, containerWidth: 1e7 });
+  } catch (e) {
+    if (e.retry) {
+      // A font file was requested.  It has been evaluated synchronously, but
+      // MathJax finishes registering it in a promise callback: the host runs
+      // the pending jobs and calls us again.
+      e.retry.catch(() => {});
+      throw new Error(RETRY);
+    }
+    if (isEngineError(e)) throw e;
+    throw new Error("MathJax render error: " + (e.message || String(e)));
+  }
+}
+
+/**
+ * Convert a LaTeX string and return the extracted SVG markup.
+ * @param {string} latex - The LaTeX expression to render.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @returns {string} The rendered SVG markup.
+ */
+function convert(latex, display) {
+  return extractSvg(typeset(latex, display));
+}
+
+/**
+ * Convert a LaTeX string to MathML, stopping after TeX parsing: nothing is
+ * laid out, so no font data is needed either.
+ * @param {string} latex - The LaTeX expression to convert.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @returns {string} The serialized <math> element.
+ */
+function toMathML(latex, display) {
+  let root;
+  try {
+    root = htmlDoc.convert(latex, { display, end: STATE.COMPILED });
+  } catch (e) {
+    if (isEngineError(e)) throw e;
+    throw new Error("MathJax render error: " + (e.message || String(e)));
+  }
+  return mmlVisitor.visitTree(root);
+}
+
+/**
+ * Render MathML to SVG markup.  When display is null, it follows the
+ * display="block" attribute of the <math> element.
+ * @param {string} mathml - The <math> element to render.
+ * @param {?boolean} display - Display (true) or inline (false) mode.
+ * @returns {string} The rendered SVG markup.
+ */
+function convertMathML(mathml, display) {
+  if (display === null || display === undefined) {
+    display = /^\s*<math\b[^>]*\bdisplay\s*=\s*["']block["']/.test(mathml);
+  }
+  return extractSvg(typeset(mathml, display, "MathML"));
+}
+
+// Converters by output kind, for the entry points and renderBatch().
+const CONVERTERS = {
+  svg: convert,
+  mathml: toMathML,
+  "mathml-svg": convertMathML,
+};
+
+globalThis.toMathML = toMathML;
+globalThis.renderMathML = convertMathML;
+
+/**
+ * Render a LaTeX string to an SVG string.
+ * @param {string} latex - The LaTeX expression to render.
+ * @returns {string} The rendered SVG markup (a single self-contained <svg> element).
+ */
+globalThis.render = function render(latex) {
+  return convert(latex, true);
+};
+
+/**
+ * Render an inline LaTeX string to an SVG string.
+ * @param {string} latex - The LaTeX expression to render.
+ * @returns {string} The rendered SVG markup (a single self-contained <svg> element).
+ */
+globalThis.renderInline = function renderInline(latex) {
+  return convert(latex, false);
+};
+
+/**
+ * Render a LaTeX string and report its layout metrics with the markup.
+ * @param {string} latex - The LaTeX expression to render.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @returns {string} JSON-encoded {svg, width, height, depth} (sizes in ex).
+ */
+globalThis.renderEx = function renderEx(latex, display) {
+  const node = typeset(latex, display);
+  const result = svgMetrics(node);
+  result.svg = extractSvg(node);
+  return JSON.stringify(result);
+};
+
+/**
+ * Lay out a LaTeX string without serializing the SVG.
+ * @param {string} latex - The LaTeX expression to measure.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @returns {string} JSON-encoded {width, height, depth} (sizes in ex).
+ */
+globalThis.measure = function measure(latex, display) {
+  return JSON.stringify(svgMetrics(typeset(latex, display)));
+};
+
+/**
+ * Render many LaTeX strings in one call.  A failing item does not abort the
+ * batch: its slot holds {error} instead of {svg} ({retry: true} if it needs a
+ * font file that is still being set up; {internal: true} if QuickJS itself
+ * failed, see isEngineError).
+ * @param {string} latexJson - JSON-encoded array of LaTeX strings.
+ * @param {boolean} display - Display (true) or inline (false) mode.
+ * @param {string} kind - "svg" (default), "mathml" (TeX to MathML; the
+ *   markup is still returned as {svg}) or "mathml-svg" (MathML input).
+ * @returns {string} JSON-encoded array of {svg} | {error} | {retry} objects.
+ */
+globalThis.renderBatch = function renderBatch(latexJson, display, kind) {
+  const items = JSON.parse(latexJson);
+  const convertItem = CONVERTERS[kind || "svg"];
+  const results = new Array(items.length);
+  for (let i = 0; i < items.length; i++) {
+    try {
+      results[i] = { svg: convertItem(items[i], display) };
+    } catch (e) {
+      if (isEngineError(e)) {
+        results[i] = {
+          error: e === null ? "out of memory" : e.message,
+          internal: true,
+        };
+      } else {
+        results[i] = e.message === RETRY
+          ? { retry: true }
+          : { error: e.message || String(e) };
+      }
+    }
+  }
+  return JSON.stringify(results);
+};
+
+/**
+ * Open a font scope: until endFontScope(), rendered SVGs reference glyphs
+ * with <use href="#..."> and the glyph paths are collected once, in a single
+ * shared <defs> block, instead of being embedded in every SVG.
+ */
+globalThis.beginFontScope = function beginFontScope() {
+  svgOutput.options.fontCache = "global";
+  svgOutput.fontCache.clearCache();
+};
+
+/**
+ * Return the shared <defs> element of the open font scope as XML.
+ * @returns {string} The <defs>…</defs> markup for every glyph used so far.
+ */
+globalThis.fontScopeDefs = function fontScopeDefs() {
+  return adaptor.serializeXML(svgOutput.fontCache.getCache());
+};
+
+/**
+ * Close the font scope and go back to self-contained SVGs.
+ * @returns {string} The final <defs>…</defs> markup of the scope.
+ */
+globalThis.endFontScope = function endFontScope() {
+  const defs = globalThis.fontScopeDefs();
+  svgOutput.options.fontCache = svgOptions.fontCache;
+  svgOutput.fontCache.clearCache();
+  return defs;
+};
@@ -0,0 +1,184 @@
+"""Tests for the asyncio front end."""
+
+import asyncio
+import time
+
+import pytest
+
+from quickjax import (
+    AsyncMathJaxRenderer,
+    MathJaxRenderError,
+    MathJaxRenderer,
+    ThreadSafeRenderer,
+)
+
+
+class _SlowRenderer(MathJaxRenderer):
+    """Renderer whose batches take at least *delay* seconds."""
+
+    delay = 0.5
+
+    def render_batch(self, latexes, **kwargs):
+        time.sleep(self.delay)
+        return super().render_batch(latexes, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def arenderer():
+    renderer = AsyncMathJaxRenderer(max_concurrency=2)
+    yield renderer
+    renderer.close()
+
+
+def _slow(max_queue=1024):
+    return AsyncMathJaxRenderer(
+        renderer=ThreadSafeRenderer(1, factory=_SlowRenderer),
+        max_queue=max_queue,
+    )
+
+
+class TestArender:
+    def test_returns_svg(self, arenderer):
+        svg = asyncio.run(arenderer.arender(r"E = mc^2"))
+        assert svg.startswith("<svg") and svg.endswith("</svg>")
+
+    def test_concurrent_calls(self, arenderer):
+        async def main():
+            return await asyncio.gather(
+                *(arenderer.arender(f"x_{i}") for i in range(8))
+            )
+
+        svgs = asyncio.run(main())
+        assert len(svgs) == 8
+        assert all(s.startswith("<svg") for s in svgs)
+        assert arenderer.stats()["pending"] == 0
+
+    def test_batch(self, arenderer):
+        results = asyncio.run(
+            arenderer.arender_batch([f"y_{i}" for i in range(20)], chunksize=3)
+        )
+        assert len(results) == 20
+        assert all(r.startswith("<svg") for r in results)
+
+    def test_loop_is_not_blocked(self):
+        renderer = _slow()
+
+        async def main():
+            ticks = 0
+            task = asyncio.ensure_future(renderer.arender("x"))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            await task
+            return ticks
+
+        try:
+            assert asyncio.run(main()) > 10
+        finally:
+            renderer.close()
+
+
+class TestLimits:
+    def test_timeout(self):
+        renderer = _slow()
+        try:
+            with pytest.raises(MathJaxRenderError, match="timed out"):
+                asyncio.run(renderer.arender("x", timeout=0.05))
+            assert renderer.stats()["timeouts"] == 1
+        finally:
+            renderer.close()
+
+    def test_queue_full_fails_fast(self):
+        renderer = _slow(max_queue=1)
+
+        async def main():
+            first = asyncio.ensure_future(renderer.arender("x"))
+            await asyncio.sleep(0)
+            with pytest.raises(MathJaxRenderError, match="queue is full"):
+                await renderer.arender("y")
+            await first
+
+        try:
+            asyncio.run(main())
+            assert renderer.stats()["rejected"] == 1
+        finally:
+            renderer.close()
+
+    def test_closed(self):
+        renderer = AsyncMathJaxRenderer(max_concurrency=1)
+        renderer.close()
+        with pytest.raises(MathJaxRenderError, match="closed"):
+            asyncio.run(renderer.arender("x"))
+
+    def test_batch_is_one_queue_entry(self):
+        renderer = AsyncMathJaxRenderer(max_concurrency=1, max_queue=1)
+        try:
+            results = asyncio.run(renderer.arender_batch(
+                [f"v_{i}" for i in range(5)], chunksize=1
+            ))
+            assert all(r.startswith("<svg") for r in results)
+            assert renderer.stats()["rejected"] == 0
+        finally:
+            renderer.close()
+
+    def test_batch_failure_cancels_other_chunks(self):
+        renderer = _slow()
+
+        async def main():
+            with pytest.raises(MathJaxRenderError, match="timed out"):
+                await renderer.arender_batch(
+                    ["a", "b", "c"], chunksize=1, timeout=0.1
+                )
+            await asyncio.sleep(3 * _SlowRenderer.delay)
+
+        try:
+            asyncio.run(main())
+            assert renderer.stats()["timeouts"] == 1
+            assert renderer.stats()["pending"] == 0
+        finally:
+            renderer.close()
+
+    def test_render_timeout_reaches_quickjs(self):
+        seen = []
+
+        class Recording(MathJaxRenderer):
+            def render_batch(self, latexes, **kwargs):
+                seen.append(kwargs["timeout"])
+                return super().render_batch(latexes, **kwargs)
+
+        renderer = AsyncMathJaxRenderer(
+            renderer=ThreadSafeRenderer(1, factory=Recording), timeout=5
+        )
+        try:
+            asyncio.run(renderer.arender("x"))
+            asyncio.run(renderer.arender("y", render_timeout=1))
+            # The wall-clock timeout is never used as the CPU-time limit.
+            assert seen == [None, 1]
+        finally:
+            renderer.close()
+
+
+class TestAmap:
+    def test_ordered(self, arenderer):
+        latexes = [f"z_{{{i}}}" for i in range(30)]
+
+        async def main():
+            return [s async for s in arenderer.amap(latexes, chunksize=4)]
+
+        svgs = asyncio.run(main())
+        assert len(svgs) == 30
+        assert all(s.startswith("<svg") for s in svgs)
+
+    def test_unordered_from_async_iterable(self, arenderer):
+        async def source():
+            for i in range(10):
+                yield f"w_{i}"
+
+        async def main():
+            return [
+                pair async for pair in
+                arenderer.amap_unordered(source(), chunksize=3)
+            ]
+
+        pairs = asyncio.run(main())
+        assert sorted(i for i, _ in pairs) == list(range(10))
@@ -0,0 +1,101 @@
+"""Tests for render caching."""
+
+import pytest
+
+from quickjax import DiskCache, MathJaxRenderer, RenderCache, configure
+from quickjax.cache import normalize_whitespace
+
+
+# ------------------------------------------------------------------ #
+# RenderCache (no JS involved)
+# ------------------------------------------------------------------ #
+
+class TestRenderCache:
+    def test_hit_and_miss(self):
+        cache = RenderCache()
+        key = cache.key("x", True)
+        assert cache.get(key) is None
+        cache.put(key, "<svg/>")
+        assert cache.get(key) == "<svg/>"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_display_is_part_of_key(self):
+        cache = RenderCache()
+        assert cache.key("x", True) != cache.key("x", False)
+
+    def test_entry_limit_evicts_lru(self):
+        cache = RenderCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_limit(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put("a", "x" * 6)
+        cache.put("b", "y" * 6)
+        assert len(cache) == 1
+        assert cache.stats()["bytes"] == 6
+        cache.put("c", "z" * 11)
+        assert cache.get("c") is None
+
+    def test_normalize_whitespace(self):
+        cache = RenderCache(normalize_whitespace=True)
+        assert cache.key("  a +\n b ", True) == cache.key("a + b", True)
+        assert normalize_whitespace(r"a\ ") == r"a\ "
+
+
+# ------------------------------------------------------------------ #
+# Renderer integration
+# ------------------------------------------------------------------ #
+
+@pytest.fixture(scope="module")
+def cached_renderer():
+    return MathJaxRenderer(cache=True)
+
+
+class TestRendererCache:
+    def test_repeat_is_cached(self, cached_renderer):
+        first = cached_renderer.render(r"\alpha + \beta")
+        second = cached_renderer.render(r"\alpha + \beta")
+        assert first is second
+        assert cached_renderer.cache.stats()["hits"] >= 1
+
+    def test_inline_cached_separately(self, cached_renderer):
+        display = cached_renderer.render(r"O(n\log n)")
+        inline = cached_renderer.render(r"O(n\log n)", display=False)
+        assert display != inline
+
+
+# ------------------------------------------------------------------ #
+# DiskCache
+# ------------------------------------------------------------------ #
+
+class TestDiskCache:
+    def test_roundtrip_across_instances(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        key = cache.key("x", True, ("bundle-a",))
+        cache.put(key, "<svg/>")
+        reopened = DiskCache(tmp_path)
+        assert reopened.get(key) == "<svg/>"
+        assert reopened.stats()["entries"] == 1
+
+    def test_key_depends_on_options(self, tmp_path):
+        cache = DiskCache(tmp_path / "c.sqlite3")
+        assert cache.key("x", True, ("a",)) != cache.key("x", True, ("b",))
+        assert cache.key("x", True) != cache.key("x", False)
+
+    def test_hit_skips_js_context(self, tmp_path):
+        warm = MathJaxRenderer(disk_cache=DiskCache(tmp_path))
+        svg = warm.render(r"\sum_{i=1}^n i")
+        cold = MathJaxRenderer(disk_cache=DiskCache(tmp_path))
+        assert cold.render(r"\sum_{i=1}^n i") == svg
+        assert cold._ctx is None
+
+    def test_configure_rejects_true(self):
+        with pytest.raises(TypeError, match="disk_cache"):
+            configure(disk_cache=True)
@@ -0,0 +1,135 @@
+"""Tests for the ``python -m quickjax`` bulk renderer."""
+
+import io
+import json
+
+import pytest
+
+from quickjax import MathJaxRenderer
+from quickjax.cli import Job, main, read_jobs
+
+
+# ------------------------------------------------------------------ #
+# Reading inputs (no JS involved)
+# ------------------------------------------------------------------ #
+
+class TestReadJobs:
+    def test_text_file_one_per_line(self, tmp_path):
+        source = tmp_path / "formulas.txt"
+        source.write_text("x^2\n\n\\alpha\n", "utf-8")
+        assert list(read_jobs([str(source)], display=False)) == [
+            Job("formulas-1", "x^2", False),
+            Job("formulas-3", r"\alpha", False),
+        ]
+
+    def test_jsonl_records(self, tmp_path):
+        source = tmp_path / "formulas.jsonl"
+        source.write_text(
+            '{"id": "euler", "tex": "e^{i\\\\pi}"}\n'
+            '{"latex": "x", "display": false}\n',
+            "utf-8",
+        )
+        assert list(read_jobs([str(source)])) == [
+            Job("euler", r"e^{i\pi}", True),
+            Job("formulas-2", "x", False),
+        ]
+
+    def test_bad_jsonl_record(self, tmp_path):
+        source = tmp_path / "formulas.jsonl"
+        source.write_text('{"id": 1}\n', "utf-8")
+        with pytest.raises(ValueError):
+            list(read_jobs([str(source)]))
+
+    def test_directory_of_tex_files(self, tmp_path):
+        (tmp_path / "ch1").mkdir()
+        (tmp_path / "ch1" / "eq1.tex").write_text("a+b\n", "utf-8")
+        (tmp_path / "notes.md").write_text("ignored", "utf-8")
+        assert list(read_jobs([str(tmp_path)])) == [
+            Job("ch1/eq1", "a+b", True),
+        ]
+
+    def test_stdin(self, monkeypatch):
+        monkeypatch.setattr("sys.stdin", io.StringIO("a\nb\n"))
+        assert [job.id for job in read_jobs([])] == ["1", "2"]
+
+
+# ------------------------------------------------------------------ #
+# End to end
+# ------------------------------------------------------------------ #
+
+@pytest.fixture
+def formulas(tmp_path):
+    source = tmp_path / "formulas.txt"
+    source.write_text("x^2\n\\frac{a}{b}\n\\sqrt{2}\n", "utf-8")
+    return source
+
+
+class TestMain:
+    def test_directory_output_and_resume(self, formulas, tmp_path, capsys):
+        out = tmp_path / "out"
+        assert main([str(formulas), "-j", "1", "-o", str(out)]) == 0
+        files = sorted(p.name for p in out.iterdir())
+        assert files == ["formulas-1.svg", "formulas-2.svg", "formulas-3.svg"]
+        assert (out / "formulas-1.svg").read_text("utf-8").startswith("<svg")
+        assert "3 rendered, 0 skipped" in capsys.readouterr().err
+
+        (out / "formulas-2.svg").unlink()
+        assert main([str(formulas), "-j", "1", "-o", str(out)]) == 0
+        assert "1 rendered, 2 skipped" in capsys.readouterr().err
+
+    def test_jsonl_on_stdout(self, formulas, capsys):
+        assert main([str(formulas), "-j", "1", "--inline"]) == 0
+        records = [
+            json.loads(line) for line in capsys.readouterr().out.splitlines()
+        ]
+        assert [r["id"] for r in records] == [
+            "formulas-1", "formulas-2", "formulas-3",
+        ]
+        assert all(r["svg"].startswith("<svg") for r in records)
+
+    def test_jsonl_file_resume(self, formulas, tmp_path, capsys):
+        out = tmp_path / "out.jsonl"
+        out.write_text('{"id": "formulas-1", "svg": "<svg/>"}\n{"id": "fo')
+        assert main([str(formulas), "-j", "1", "-o", str(out)]) == 0
+        lines = out.read_text("utf-8").splitlines()
+        ids = [json.loads(line)["id"] for line in lines[2:]]
+        assert ids == ["formulas-2", "formulas-3"]
+        assert "2 rendered, 1 skipped" in capsys.readouterr().err
+
+    def test_parallel_matches_serial(self, formulas, tmp_path):
+        serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+        main([str(formulas), "-j", "1", "-q", "-o", str(serial)])
+        main([str(formulas), "-j", "2", "-q", "-o", str(parallel)])
+        for path in serial.iterdir():
+            assert (parallel / path.name).read_text("utf-8") == \
+                path.read_text("utf-8")
+
+    def test_ids_stay_inside_output_directory(self, tmp_path):
+        source = tmp_path / "evil.jsonl"
+        source.write_text('{"id": "../../escape", "tex": "x"}\n', "utf-8")
+        out = tmp_path / "out"
+        main([str(source), "-j", "1", "-q", "-o", str(out)])
+        assert (out / "escape.svg").exists()
+
+    @pytest.mark.parametrize("name", ["out.zip", "out.tar.gz", "out.pack"])
+    def test_archive_outputs(self, formulas, tmp_path, name):
+        out = tmp_path / name
+        assert main([str(formulas), "-j", "1", "-q", "-o", str(out)]) == 0
+        assert out.stat().st_size > 0
+
+    def test_unreadable_output_is_reported(self, formulas, tmp_path, capsys):
+        out = tmp_path / "out.zip"
+        out.write_bytes(b"not a zip")
+        assert main([str(formulas), "-j", "1", "-o", str(out)]) == 2
+        assert "not a complete zip archive" in capsys.readouterr().err
+
+    def test_broken_bundle_is_reported(
+        self, formulas, tmp_path, monkeypatch, capsys
+    ):
+        bundle = tmp_path / "broken.js"
+        bundle.write_text("throw new Error('no MathJax here');", "utf-8")
+        monkeypatch.setattr(MathJaxRenderer, "_JS_BUNDLE", bundle)
+        monkeypatch.setattr(MathJaxRenderer, "_JS_CORE_BUNDLE", bundle)
+        argv = [str(formulas), "-j", "1", "-o", str(tmp_path / "out")]
+        assert main(argv) == 2
+        assert "Failed to initialize MathJax" in capsys.readouterr().err
@@ -0,0 +1,135 @@
+"""Tests for whole-document math rendering."""
+
+import pytest
+
+from quickjax import (
+    MathJaxRenderer,
+    find_math,
+    render_document,
+    render_document_iter,
+)
+
+
+def _latex(text, **kwargs):
+    return [(s.latex, s.display) for s in find_math(text, **kwargs)]
+
+
+# ------------------------------------------------------------------ #
+# Scanning (no JS involved)
+# ------------------------------------------------------------------ #
+
+class TestFindMath:
+    def test_all_default_delimiters(self):
+        text = r"a $x$ b $$y$$ c \(z\) d \[w\] e"
+        assert _latex(text) == [
+            ("x", False), ("y", True), ("z", False), ("w", True),
+        ]
+
+    def test_spans_cover_raw_source(self):
+        text = "see $a+b$ here"
+        (span,) = find_math(text)
+        assert text[span.start:span.end] == span.raw == "$a+b$"
+
+    def test_escaped_dollar(self):
+        assert _latex(r"costs \$5 and \$10") == []
+        assert _latex(r"$a \$ b$") == [(r"a \$ b", False)]
+
+    def test_prices_are_not_math(self):
+        assert _latex("from $5 to $10 each") == []
+        assert _latex("$ x$ and $x $") == []
+
+    def test_inline_math_stops_at_blank_line(self):
+        assert _latex("$a\n\nb$") == []
+        assert _latex("$$a\n\nb$$") == [("a\n\nb", True)]
+
+    def test_unclosed_opener_is_text(self):
+        assert _latex(r"\[ never closed, but $x$ is") == [("x", False)]
+
+    def test_inline_code_is_skipped(self):
+        assert _latex("`$x$` and ``a ` $y$`` then $z$") == [("z", False)]
+
+    def test_fenced_code_is_skipped(self):
+        text = "```\n$x$\n```\n~~~py\n$y$\n~~~\n$z$"
+        assert _latex(text) == [("z", False)]
+
+    def test_html_code_is_skipped(self):
+        text = "<pre>$x$</pre> <CODE>$y$</CODE> <p>$z$</p>"
+        assert _latex(text) == [("z", False)]
+
+    def test_custom_delimiters(self):
+        assert _latex("$x$ @@y@@", delimiters=[("@@", "@@", True)]) == [
+            ("y", True),
+        ]
+
+
+# ------------------------------------------------------------------ #
+# Rendering
+# ------------------------------------------------------------------ #
+
+@pytest.fixture(scope="module")
+def renderer():
+    return MathJaxRenderer()
+
+
+class _CountingRenderer:
+    """Wraps a renderer and records the expressions sent to it."""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.calls = []
+
+    def render_batch(self, latexes, *, display=True):
+        self.calls.append((list(latexes), display))
+        return self.renderer.render_batch(latexes, display=display)
+
+
+class TestRenderDocument:
+    def test_replaces_math(self, renderer):
+        out = render_document("a $x$ b \\[y\\] c", renderer=renderer)
+        assert out.startswith("a <svg")
+        assert out.count("<svg") == 2
+        assert out.endswith("</svg> c")
+
+    def test_identical_spans_render_once(self, renderer):
+        counting = _CountingRenderer(renderer)
+        render_document("$x$ $x$ $$x$$ $y$", renderer=counting)
+        assert sorted(counting.calls) == [
+            (["x"], True), (["x", "y"], False),
+        ]
+
+    def test_wrap(self, renderer):
+        out = render_document(
+            "$$x$$",
+            renderer=renderer,
+            wrap=lambda svg, span: f"<div>{svg}</div>",
+        )
+        assert out.startswith("<div><svg") and out.endswith("</svg></div>")
+
+    def test_no_math_is_unchanged(self, renderer):
+        text = "plain `$x$` text costs $5"
+        assert render_document(text, renderer=renderer) == text
+
+    def test_invalid_errors_mode(self, renderer):
+        with pytest.raises(ValueError):
+            render_document("", renderer=renderer, errors="ignore")
+
+
+class TestRenderDocumentIter:
+    @pytest.mark.parametrize("size", [1, 3, 7, 1000])
+    def test_chunking_matches_structure(self, renderer, size):
+        text = (
+            "Intro $a$ then\n```\n$skip$\n```\n"
+            "and $$\\frac{1}{2}$$ with `$code$` costs $5.\n"
+        )
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        out = "".join(render_document_iter(chunks, renderer=renderer))
+        assert out.count("<svg") == 2
+        assert "$skip$" in out and "`$code$`" in out
+        assert out.startswith("Intro <svg") and out.endswith("costs $5.\n")
+
+    def test_max_pending_releases_unclosed_opener(self, renderer):
+        chunks = ["$$ never closed "] + ["x" * 10] * 5
+        out = "".join(
+            render_document_iter(chunks, renderer=renderer, max_pending=20)
+        )
+        assert out == "".join(chunks)
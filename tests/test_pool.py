@@ -0,0 +1,111 @@
+"""Tests for the multi-process rendering pool."""
+
+import multiprocessing
+import os
+
+import pytest
+
+from quickjax import MathJaxRendererPool, pool as pool_module
+
+
+# ------------------------------------------------------------------ #
+# Fixture: shared pool (starting workers is expensive)
+# ------------------------------------------------------------------ #
+
+@pytest.fixture(scope="module")
+def pool():
+    with MathJaxRendererPool(workers=2) as p:
+        yield p
+
+
+# ------------------------------------------------------------------ #
+# Single renders and futures
+# ------------------------------------------------------------------ #
+
+class TestPoolRender:
+    def test_render(self, pool):
+        svg = pool.render(r"E = mc^2")
+        assert svg.strip().startswith("<svg")
+
+    def test_submit_returns_future(self, pool):
+        future = pool.submit(r"x^2", display=False)
+        assert "<svg" in future.result(timeout=30)
+
+
+# ------------------------------------------------------------------ #
+# Bulk rendering
+# ------------------------------------------------------------------ #
+
+class TestPoolMap:
+    EXPRESSIONS = [rf"x_{{{i}}} + \alpha^{{{i}}}" for i in range(40)]
+
+    def test_render_many(self, pool):
+        results = pool.render_many(self.EXPRESSIONS[:5], chunksize=2)
+        assert len(results) == 5
+        assert all("<svg" in r for r in results)
+
+    def test_map_preserves_order(self, pool):
+        results = list(pool.map(self.EXPRESSIONS, chunksize=3))
+        assert len(results) == len(self.EXPRESSIONS)
+        assert len(set(results)) == len(results)
+
+    def test_map_unordered_covers_all_indices(self, pool):
+        pairs = list(pool.map_unordered(self.EXPRESSIONS, chunksize=3))
+        assert sorted(i for i, _ in pairs) == list(range(len(self.EXPRESSIONS)))
+
+    def test_render_iter_ordered(self, pool):
+        latexes = [f"x_{{{i}}}" for i in range(40)]
+        results = list(pool.render_iter(iter(latexes), chunksize=4))
+        assert len(results) == 40
+        assert all(r.startswith("<svg") for r in results)
+
+    def test_render_iter_unordered(self, pool):
+        pairs = list(pool.render_iter(
+            (f"y_{i}" for i in range(25)), chunksize=4, ordered=False
+        ))
+        assert sorted(i for i, _ in pairs) == list(range(25))
+
+
+# ------------------------------------------------------------------ #
+# Crash recovery
+# ------------------------------------------------------------------ #
+
+class TestPoolRecovery:
+    def test_survives_worker_crash(self):
+        with MathJaxRendererPool(workers=1) as pool:
+            pool._executor.submit(os._exit, 1)
+            assert "<svg" in pool.render(r"\sqrt{2}")
+
+
+# ------------------------------------------------------------------ #
+# Prefork mode
+# ------------------------------------------------------------------ #
+
+def _worker_init_time():
+    return pool_module._worker_renderer.init_time
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="requires os.fork()",
+)
+class TestPrefork:
+    def test_workers_inherit_parent_context(self):
+        with MathJaxRendererPool(workers=2, prefork=True) as pool:
+            assert pool.prefork
+            assert "<svg" in pool.render(r"\frac{1}{2}")
+            init_time = pool._executor.submit(_worker_init_time).result()
+            assert init_time == pool._template.init_time
+
+    def test_survives_worker_crash(self):
+        with MathJaxRendererPool(workers=1, prefork=True) as pool:
+            pool._executor.submit(os._exit, 1)
+            assert "<svg" in pool.render(r"\sqrt{2}")
+
+    def test_requires_fork_context(self):
+        with pytest.raises(ValueError):
+            MathJaxRendererPool(
+                workers=1,
+                prefork=True,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
@@ -1,8 +1,25 @@
 """Tests for quickjax renderer."""
 
+import gzip
+import json
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
 import pytest
 
-from quickjax import MathJaxRenderError, MathJaxRenderer, render
+from quickjax import (
+    MathJaxLimitError,
+    MathJaxRenderError,
+    MathJaxRenderer,
+    RenderCache,
+    ThreadSafeRenderer,
+    render,
+)
+from quickjax import backend
+from quickjax.fastpath import build_table, load_table
 
 
 # ------------------------------------------------------------------ #
@@ -77,6 +94,14 @@ class TestContextReuse:
         # Each result should be distinct
         assert len(set(results)) == len(results)
 
+    def test_output_does_not_depend_on_history(self):
+        fresh = MathJaxRenderer(fastpath=False)
+        used = MathJaxRenderer(fastpath=False)
+        used.render_batch([r"\beta", r"\sum_i y_i", r"\sqrt{z}"])
+        # Glyph ids are derived from the input, not numbered per render.
+        assert used.render(r"\alpha + x") == fresh.render(r"\alpha + x")
+        assert used.render_batch(["x"]) == fresh.render_batch(["x"])
+
 
 # ------------------------------------------------------------------ #
 # Special characters / escaping
@@ -108,3 +133,600 @@ class TestConvenienceFunction:
     def test_render_inline(self):
         svg = render(r"x + y", display=False)
         assert "<svg" in svg
+
+
+# ------------------------------------------------------------------ #
+# Thread-safe context checkout
+# ------------------------------------------------------------------ #
+
+class TestThreadSafeRenderer:
+    def test_concurrent_renders(self):
+        renderer = ThreadSafeRenderer(max_contexts=2)
+        expressions = [rf"x^{{{i}}}" for i in range(16)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(renderer.render, expressions))
+        assert all("<svg" in r for r in results)
+        assert renderer.stats()["contexts"] <= 2
+
+    def test_contexts_created_lazily(self):
+        renderer = ThreadSafeRenderer(max_contexts=4)
+        assert renderer.stats()["contexts"] == 0
+        renderer.render(r"a + b")
+        renderer.render(r"a - b")
+        assert renderer.stats()["contexts"] == 1
+        assert renderer.stats()["checkouts"] == 2
+
+    def test_checkout_timeout(self):
+        renderer = ThreadSafeRenderer(max_contexts=1)
+        with renderer.checkout():
+            with pytest.raises(MathJaxRenderError):
+                with renderer.checkout(timeout=0.01):
+                    pass
+        assert renderer.stats()["waits"] == 1
+
+
+# ------------------------------------------------------------------ #
+# Batch rendering
+# ------------------------------------------------------------------ #
+
+class TestRenderBatch:
+    EXPRESSIONS = [r"x^2", r"\frac{a}{b}", r"\sqrt{2}", r"\alpha + \beta"]
+
+    def test_batch_matches_order(self, renderer):
+        results = renderer.render_batch(self.EXPRESSIONS)
+        assert len(results) == len(self.EXPRESSIONS)
+        assert all(isinstance(r, str) and "<svg" in r for r in results)
+        assert len(set(results)) == len(results)
+
+    def test_batch_inline(self, renderer):
+        results = renderer.render_batch(self.EXPRESSIONS, display=False)
+        assert all("<svg" in r for r in results)
+
+    def test_small_chunks(self, renderer):
+        results = renderer.render_batch(self.EXPRESSIONS * 3, chunk_size=5)
+        assert len(results) == 12
+        assert all("<svg" in r for r in results)
+
+    def test_empty_batch(self, renderer):
+        assert renderer.render_batch([]) == []
+
+
+class TestRenderEx:
+    def test_metrics(self, renderer):
+        result = renderer.render_ex(r"\frac{a}{b}", display=False)
+        assert result.svg.startswith("<svg")
+        assert result.width > 0 and result.height > 0
+        assert result.depth >= 0
+
+    def test_measure_skips_svg(self, renderer):
+        full = renderer.render_ex(r"\sqrt{x^2 + 1}")
+        measured = renderer.measure(r"\sqrt{x^2 + 1}")
+        assert measured.svg is None
+        assert (measured.width, measured.height, measured.depth) == (
+            full.width, full.height, full.depth
+        )
+
+    def test_cache_hit_metrics_match_js(self):
+        renderer = MathJaxRenderer(cache=True)
+        first = renderer.render_ex(r"a^2 + b^2")
+        second = renderer.render_ex(r"a^2 + b^2")
+        assert renderer.cache.stats()["hits"] == 1
+        assert second == first
+
+    def test_cache_hit_metrics_of_tagged_equation(self):
+        # Numbered equations get a width that is not in ex.
+        renderer = MathJaxRenderer(cache=True)
+        first = renderer.render_ex(r"E = mc^2 \tag{1}")
+        second = renderer.render_ex(r"E = mc^2 \tag{1}")
+        assert renderer.cache.stats()["hits"] == 1
+        assert first.width > 0
+        assert second.width == pytest.approx(first.width, rel=1e-3)
+        assert (second.height, second.depth) == (first.height, first.depth)
+
+    def test_slots(self, renderer):
+        result = renderer.measure("x")
+        with pytest.raises(AttributeError):
+            result.extra = 1
+        assert result.ascent == result.height - result.depth
+        assert result.vertical_align == -result.depth
+
+
+class TestCompactOutput:
+    LATEX = r"\int_0^1 \frac{x^2}{\sqrt{1 + x}} \, dx"
+
+    def test_compact_is_smaller_and_well_formed(self, renderer):
+        compact = MathJaxRenderer(compact=True, precision=1)
+        full = renderer.render(self.LATEX)
+        small = compact.render(self.LATEX)
+        assert len(small) < len(full)
+        assert "data-mml-node" not in small
+        ElementTree.fromstring(small)
+
+    def test_precision(self):
+        svg = MathJaxRenderer(precision=0).render(self.LATEX)
+        for path in re.findall(r' d="([^"]*)"', svg):
+            assert "." not in path
+
+    def test_options_are_part_of_cache_key(self):
+        cache = RenderCache()
+        MathJaxRenderer(cache=cache).render("x")
+        MathJaxRenderer(cache=cache, compact=True).render("x")
+        assert cache.stats()["entries"] == 2
+
+    def test_invalid_precision(self):
+        with pytest.raises(ValueError):
+            MathJaxRenderer(precision=-1)
+
+    def test_gzip(self):
+        cached = MathJaxRenderer(cache=True)
+        data = cached.render_compressed(r"E = mc^2")
+        assert gzip.decompress(data).decode() == cached.render(r"E = mc^2")
+        assert cached.render_compressed(r"E = mc^2") == data
+
+    def test_invalid_encoding(self, renderer):
+        with pytest.raises(ValueError):
+            renderer.render_compressed("x", encoding="zstd")
+
+
+class TestRenderIter:
+    def test_lazy_input(self, renderer):
+        pulled = []
+
+        def source():
+            for i in range(10):
+                pulled.append(i)
+                yield f"x_{{{i}}}"
+
+        results = renderer.render_iter(source(), chunk_size=3)
+        first = next(results)
+        assert first.startswith("<svg")
+        assert len(pulled) == 3
+        assert len(list(results)) == 9
+
+    def test_thread_safe_ordered(self):
+        pool = ThreadSafeRenderer(max_contexts=2)
+        latexes = [f"y_{{{i}}}" for i in range(20)]
+        results = list(pool.render_iter(latexes, chunk_size=3))
+        assert len(results) == 20
+        assert all(r.startswith("<svg") for r in results)
+
+    def test_thread_safe_unordered_bounded(self):
+        pool = ThreadSafeRenderer(max_contexts=2)
+        pulled = []
+
+        def source():
+            for i in range(20):
+                pulled.append(i)
+                yield f"z_{{{i}}}"
+
+        results = pool.render_iter(
+            source(), chunk_size=2, ordered=False, max_in_flight=3
+        )
+        next(results)
+        assert len(pulled) <= 2 * 3 + 2
+        pairs = list(results)
+        assert len(pairs) == 19
+        assert all(isinstance(i, int) for i, _ in pairs)
+
+
+# ------------------------------------------------------------------ #
+# Instrumentation
+# ------------------------------------------------------------------ #
+
+class _FailingRenderer(MathJaxRenderer):
+    """Fails every expression containing "FAIL" (noerrors hides TeX ones)."""
+
+    def _render(self, latex, display, timeout=None, kind="svg"):
+        if "FAIL" in latex:
+            raise MathJaxRenderError("boom")
+        return super()._render(latex, display, timeout, kind)
+
+    def _render_many(self, latexes, display, timeout=None, kind="svg"):
+        results = super()._render_many(latexes, display, timeout, kind)
+        return [
+            MathJaxRenderError("boom") if "FAIL" in latex else result
+            for latex, result in zip(latexes, results)
+        ]
+
+
+class TestMetrics:
+    def test_disabled_by_default(self, renderer):
+        assert renderer.stats() == {}
+        assert "render" not in vars(renderer)
+
+    def test_events_and_totals(self):
+        events = []
+        r = MathJaxRenderer(cache=True, metrics=events.append)
+        svg = r.render(r"\frac{a}{b}")
+        r.render(r"\frac{a}{b}")
+        first, hit = events
+        assert first["kind"] == "render" and first["display"] is True
+        assert first["count"] == 1 and first["cache_hits"] == 0
+        assert first["input_chars"] == len(r"\frac{a}{b}")
+        assert first["output_chars"] == len(svg)
+        assert 0 < first["js"] <= first["total"]
+        assert first["parse"] + first["layout"] + first["serialize"] > 0
+        assert first["parse"] + first["layout"] + first["serialize"] \
+            <= first["js"]
+        assert hit["cache_hits"] == 1 and hit["js"] == 0
+
+        stats = r.stats()
+        assert stats["calls"] == stats["renders"] == 2
+        assert stats["cache_hits"] == 1
+        assert stats["output_chars"] == 2 * len(svg)
+        assert stats["time_total"] >= first["total"] + hit["total"]
+
+    def test_batch_counts_errors(self):
+        events = []
+        r = _FailingRenderer(metrics=events.append)
+        r.render_batch(["x", "FAIL", "y"], display=False)
+        (event,) = events
+        assert event["kind"] == "render_batch"
+        assert event["display"] is False
+        assert event["count"] == 3
+        assert event["errors"] == 1
+
+    def test_render_error_counted(self):
+        r = _FailingRenderer(metrics=True)
+        with pytest.raises(MathJaxRenderError):
+            r.render("FAIL")
+        assert r.stats()["errors"] == 1
+        assert r.stats()["calls"] == 1
+
+    def test_timings_never_mask_render_errors(self):
+        events = []
+        r = MathJaxRenderer(fastpath=False, metrics=events.append)
+        r.render("x")
+        r._ctx.eval(
+            "globalThis.render = function () "
+            "{ throw new Error('MathJax render error: bad'); };"
+            "globalThis.takeTimings = function () "
+            "{ throw new Error('no timings'); };"
+        )
+        r._functions.clear()
+        with pytest.raises(MathJaxRenderError, match="bad"):
+            r.render("y")
+        assert events[-1]["errors"] == 1
+        assert events[-1]["parse"] == events[-1]["layout"] == 0
+
+
+# ------------------------------------------------------------------ #
+# Context start-up
+# ------------------------------------------------------------------ #
+
+class TestWarmUp:
+    def test_context_created_lazily(self):
+        fresh = MathJaxRenderer(fastpath=False)
+        assert fresh.init_time is None
+        fresh.render(r"x")
+        assert fresh.init_time > 0
+
+    def test_background_warm_up(self):
+        fresh = MathJaxRenderer()
+        fresh.warm_up(background=True)
+        svg = fresh.render(r"\frac{1}{2}")
+        assert "<svg" in svg
+        assert fresh.init_time > 0
+
+
+class TestRecycling:
+    @staticmethod
+    def _render_until_recycled(r, timeout=60):
+        deadline = time.monotonic() + timeout
+        while r.recycle_count == 0 and time.monotonic() < deadline:
+            assert r.render(r"\sqrt{x}").startswith("<svg")
+        return r.recycle_count
+
+    def test_after_render_count(self):
+        r = MathJaxRenderer(recycle_after=5)
+        assert self._render_until_recycled(r) == 1
+
+    def test_above_heap_size(self):
+        r = MathJaxRenderer(max_heap=1)
+        assert self._render_until_recycled(r) >= 1
+
+    def test_not_inside_font_scope(self):
+        r = MathJaxRenderer(recycle_after=1)
+        with r.font_scope() as scope:
+            for _ in range(5):
+                scope.render("x")
+            assert r.recycle_count == 0
+        assert self._render_until_recycled(r) == 1
+
+    def test_out_of_memory_retried_on_fresh_context(self):
+        r = MathJaxRenderer(fastpath=False)
+        r.render("x")
+        r._ctx.set_memory_limit(1)
+        assert r.render(r"\frac{1}{2}").startswith("<svg")
+        assert r.recycle_count == 1
+        r._ctx.set_memory_limit(1)
+        assert all(
+            svg.startswith("<svg") for svg in r.render_batch(["a", "b"])
+        )
+        assert r.recycle_count == 2
+
+
+class TestLimits:
+    @staticmethod
+    def _hang(r, name):
+        """Make the JS function *name* spin forever in r's context."""
+        r.render("x")
+        r._ctx.eval(f"globalThis.{name} = function () {{ for (;;) {{}} }}")
+        r._functions.clear()
+
+    def test_timeout_replaces_context(self):
+        r = MathJaxRenderer(fastpath=False)
+        self._hang(r, "render")
+        start = time.monotonic()
+        with pytest.raises(MathJaxLimitError, match="timed out"):
+            r.render("y", timeout=0.2)
+        assert time.monotonic() - start < 5
+        assert r.recycle_count == 1
+        assert r.render("y").startswith("<svg")
+
+    def test_batch_timeout_renders_one_by_one(self):
+        r = MathJaxRenderer(timeout=0.2, fastpath=False)
+        self._hang(r, "renderBatch")
+        results = r.render_batch(["a", "b"])
+        assert all(svg.startswith("<svg") for svg in results)
+        assert r.recycle_count == 1
+
+    def test_max_length(self):
+        r = MathJaxRenderer(max_length=10)
+        assert r.render("x^2").startswith("<svg")
+        with pytest.raises(MathJaxLimitError, match="characters"):
+            r.render("x" * 11)
+        ok, too_long = r.render_batch(["y", "y" * 11])
+        assert ok.startswith("<svg")
+        assert isinstance(too_long, MathJaxLimitError)
+
+    def test_max_depth(self):
+        r = MathJaxRenderer(max_depth=3)
+        assert r.render(r"\left( \frac{\{a\}}{b} \right)").startswith("<svg")
+        with pytest.raises(MathJaxLimitError, match="nested 4 levels"):
+            r.render("{{{{x}}}}")
+        with pytest.raises(MathJaxLimitError):
+            r.render(r"\begin{matrix} {{{x}}} \end{matrix}")
+
+    @pytest.mark.parametrize(
+        "text", ["interrupted", "stack overflow", "out of memory"]
+    )
+    def test_tex_error_text_is_not_a_limit(self, text):
+        r = MathJaxRenderer(fastpath=False, timeout=5)
+        r.render("x")
+        ctx = r._ctx
+        for name in ("render", "renderBatch"):
+            ctx.eval(
+                f"globalThis.{name} = function () "
+                f"{{ throw new Error('MathJax render error: \\\\{text}'); }}"
+            )
+        r._functions.clear()
+        with pytest.raises(MathJaxRenderError) as info:
+            r.render("y")
+        assert not isinstance(info.value, MathJaxLimitError)
+        with pytest.raises(MathJaxRenderError) as info:
+            r.render_batch(["y"])
+        assert not isinstance(info.value, MathJaxLimitError)
+        assert r._ctx is ctx and r.recycle_count == 0
+
+
+class TestConfiguration:
+    def test_macros_and_preamble(self):
+        r = MathJaxRenderer(
+            macros={"vA": "A"}, preamble=r"\newcommand{\vB}{B}"
+        )
+        svg = r.render(r"\vA \vB")
+        assert 'data-c="41"' in svg and 'data-c="42"' in svg
+        r.reset()
+        assert 'data-c="42"' in r.render(r"\vB")
+
+    def test_packages(self, renderer):
+        assert renderer.render(r"\ce{H2O}").startswith("<svg")
+        with pytest.raises(MathJaxRenderError):
+            MathJaxRenderer(packages=["base"]).render(r"\ce{H2O}")
+
+    def test_options_in_cache_key(self):
+        cache = RenderCache()
+        a = MathJaxRenderer(cache=cache, macros={"v": "A"})
+        b = MathJaxRenderer(cache=cache, macros={"v": "B"})
+        assert 'data-c="41"' in a.render(r"\v")
+        assert 'data-c="42"' in b.render(r"\v")
+
+    def test_close_hands_on_reset_context(self):
+        options = {"macros": {"handedOn": "x"}}
+        with MathJaxRenderer(**options) as first:
+            first.render(r"\newcommand{\leak}{A} \leak")
+            ctx = first._ctx
+        second = MathJaxRenderer(**options)
+        assert 'data-c="41"' not in second.render(r"\leak")
+        assert second._ctx is ctx
+        other = MathJaxRenderer(macros={"handedOn": "y"})
+        other.warm_up()
+        assert other._ctx is not ctx
+
+    def test_spare_contexts_bounded_across_configurations(self, monkeypatch):
+        monkeypatch.setattr(backend, "_SPARE_CONTEXTS", OrderedDict())
+        monkeypatch.setattr(backend, "_MAX_SPARE_TOTAL", 2)
+        keys = []
+        for name in ("docA", "docB", "docC"):
+            with MathJaxRenderer(macros={name: "x"}) as r:
+                r.warm_up()
+                keys.append(r._context_key)
+        assert list(backend._SPARE_CONTEXTS) == keys[1:]
+        reused = MathJaxRenderer(macros={"docB": "x"})
+        reused.warm_up()
+        assert list(backend._SPARE_CONTEXTS) == keys[2:]
+
+
+class TestReset:
+    def test_forgets_macros(self):
+        r = MathJaxRenderer()
+        r.render(r"\newcommand{\tenant}{A} \tenant")
+        assert 'data-c="41"' in r.render(r"\tenant")
+        r.reset()
+        assert 'data-c="41"' not in r.render(r"\tenant")
+
+    def test_before_first_render(self):
+        r = MathJaxRenderer()
+        r.reset()
+        assert r.init_time is None
+
+    def test_not_inside_font_scope(self, renderer):
+        with renderer.font_scope():
+            with pytest.raises(MathJaxRenderError):
+                renderer.reset()
+
+
+# ------------------------------------------------------------------ #
+# Precomputed fast path
+# ------------------------------------------------------------------ #
+
+@pytest.fixture
+def fastpath_table(tmp_path, monkeypatch):
+    path = tmp_path / "fastpath.json"
+    path.write_text(json.dumps(build_table(("x", r"\alpha"))), "utf-8")
+    monkeypatch.setattr(MathJaxRenderer, "_FASTPATH", path)
+    yield path
+    load_table.cache_clear()
+
+
+class TestFastPath:
+    def test_table_hit_skips_js_context(self, fastpath_table, renderer):
+        r = MathJaxRenderer()
+        assert r.render("x") == renderer.render("x")
+        assert r.render(r"\alpha", display=False) == \
+            renderer.render(r"\alpha", display=False)
+        assert r.render_batch(["x", r"\alpha"]) == \
+            renderer.render_batch(["x", r"\alpha"])
+        assert r._ctx is None
+        r.render("y")
+        assert r._ctx is not None
+
+    def test_only_for_default_options(self, fastpath_table):
+        for r in (
+            MathJaxRenderer(fastpath=False),
+            MathJaxRenderer(compact=True),
+            MathJaxRenderer(macros={"v": "A"}),
+        ):
+            r.render("x")
+            assert r._ctx is not None
+
+    def test_definitions_turn_table_off(self, fastpath_table):
+        r = MathJaxRenderer()
+        fresh = MathJaxRenderer(fastpath=False)
+        for latex in (r"\newcommand{\alpha}{\beta}", r"\alpha"):
+            assert r.render(latex) == fresh.render(latex)
+        assert r.render_batch([r"\alpha"]) == fresh.render_batch([r"\alpha"])
+        r.close()
+        table = json.loads(fastpath_table.read_text("utf-8"))
+        assert r.render(r"\alpha") == table["display"][r"\alpha"]
+        assert r._ctx is None
+
+    def test_stale_table_ignored(self, fastpath_table):
+        table = json.loads(fastpath_table.read_text("utf-8"))
+        table["bundle"] = "other"
+        fastpath_table.write_text(json.dumps(table), "utf-8")
+        r = MathJaxRenderer()
+        r.render("x")
+        assert r._ctx is not None
+
+
+# ------------------------------------------------------------------ #
+# MathML input and output
+# ------------------------------------------------------------------ #
+
+class TestMathML:
+    def test_to_mathml(self, renderer):
+        mathml = renderer.to_mathml(r"x^2")
+        assert mathml.startswith("<math") and 'display="block"' in mathml
+        assert "<svg" not in mathml
+        assert 'display="block"' not in renderer.to_mathml(
+            r"x", display=False
+        )
+
+    def test_cached_apart_from_svg(self):
+        r = MathJaxRenderer(cache=True)
+        svg = r.render(r"y")
+        mathml = r.to_mathml(r"y")
+        assert mathml != svg and r.to_mathml(r"y") is mathml
+        assert r.render(r"y") is svg
+
+    def test_to_mathml_batch(self, renderer):
+        results = renderer.to_mathml_batch([r"a", r"b"], display=False)
+        assert results == [
+            renderer.to_mathml(r"a", display=False),
+            renderer.to_mathml(r"b", display=False),
+        ]
+
+    def test_render_mathml(self, renderer):
+        mathml = renderer.to_mathml(r"x")
+        svg = renderer.render_mathml(mathml)
+        assert svg.startswith("<svg")
+        assert svg == renderer.render_mathml(mathml, display=True)
+
+    def test_render_mathml_batch(self, renderer):
+        sources = [renderer.to_mathml(r"x"), renderer.to_mathml(r"z")]
+        results = renderer.render_mathml_batch(sources)
+        assert all(isinstance(s, str) and "<svg" in s for s in results)
+
+
+# ------------------------------------------------------------------ #
+# On-demand font loading
+# ------------------------------------------------------------------ #
+
+@pytest.mark.skipif(
+    not MathJaxRenderer._JS_CORE_BUNDLE.exists(),
+    reason="core bundle not built (run build_bundle.sh)",
+)
+class TestLazyFonts:
+    @pytest.mark.parametrize("latex", [
+        r"\mathfrak{g} \oplus \mathcal{L}",
+        r"\mathbb{R}^n \to \mathscr{F}",
+        r"\texttt{code} + \mathsf{S}",
+    ])
+    def test_matches_eager_output(self, latex):
+        eager = MathJaxRenderer().render(latex)
+        assert MathJaxRenderer(fonts="lazy").render(latex) == eager
+
+    def test_batch_loads_fonts(self):
+        results = MathJaxRenderer(fonts="lazy").render_batch(
+            [r"\mathfrak{a}", r"\mathbb{Z}", r"x"]
+        )
+        assert all(isinstance(r, str) and "<svg" in r for r in results)
+
+
+def test_invalid_fonts_mode():
+    with pytest.raises(ValueError):
+        MathJaxRenderer(fonts="sometimes")
+
+
+# ------------------------------------------------------------------ #
+# Shared glyph definitions (font scope)
+# ------------------------------------------------------------------ #
+
+class TestFontScope:
+    def test_scope_uses_shared_defs(self, renderer):
+        with renderer.font_scope() as scope:
+            first = scope.render(r"x + y")
+            second = scope.render(r"x - y", display=False)
+            defs = scope.defs()
+        assert "<defs" not in first and "<use" in first
+        assert "<use" in second
+        assert defs.count("<defs") == 1
+        assert 'style="display: none"' in defs
+
+    def test_scope_smaller_than_local(self, renderer):
+        expressions = [rf"\alpha_{{{i}}} + \beta^{{{i}}}" for i in range(20)]
+        local = sum(len(renderer.render(e)) for e in expressions)
+        with renderer.font_scope() as scope:
+            scoped = sum(len(s) for s in scope.render_batch(expressions))
+            scoped += len(scope.defs())
+        assert scoped < local
+
+    def test_renderer_locked_during_scope(self, renderer):
+        with renderer.font_scope() as scope:
+            with pytest.raises(MathJaxRenderError):
+                renderer.render(r"x")
+        assert "<defs" in renderer.render(r"x")
+        with pytest.raises(MathJaxRenderError):
+            scope.render(r"x")
@@ -0,0 +1,154 @@
+"""Tests for the local HTTP render service."""
+
+import http.client
+import json
+import socket
+import threading
+import urllib.parse
+
+import pytest
+
+from quickjax import MathJaxRenderer
+from quickjax.server import MathJaxServer
+
+
+# ------------------------------------------------------------------ #
+# Fixture: one server for the module (contexts are expensive)
+# ------------------------------------------------------------------ #
+
+@pytest.fixture(scope="module")
+def server():
+    server = MathJaxServer(("127.0.0.1", 0), contexts=2, max_batch=8)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, method, path, body=None, headers=None):
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        payload = None if body is None else json.dumps(body)
+        conn.request(method, path, payload, headers or {})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+# ------------------------------------------------------------------ #
+# Rendering
+# ------------------------------------------------------------------ #
+
+class TestRender:
+    def test_post(self, server):
+        status, headers, body = _request(
+            server, "POST", "/render", {"tex": r"x^2", "display": False}
+        )
+        assert status == 200
+        assert headers["Content-Type"].startswith("image/svg+xml")
+        assert body.startswith(b"<svg")
+        assert headers["ETag"].startswith('"')
+
+    def test_get_and_conditional_get(self, server):
+        path = "/render?" + urllib.parse.urlencode({"tex": r"\frac{a}{b}"})
+        status, headers, body = _request(server, "GET", path)
+        assert status == 200 and body.startswith(b"<svg")
+        status, again, body = _request(
+            server, "GET", path, headers={"If-None-Match": headers["ETag"]}
+        )
+        assert status == 304 and body == b""
+        assert again["ETag"] == headers["ETag"]
+
+    def test_mathml_output(self, server):
+        status, headers, body = _request(
+            server, "POST", "/render", {"tex": "y", "output": "mathml"}
+        )
+        assert status == 200
+        assert headers["Content-Type"].startswith("application/mathml+xml")
+        assert body.startswith(b"<math")
+
+    def test_batch(self, server):
+        status, _, body = _request(
+            server, "POST", "/batch", {"tex": ["a", "b", "c"]}
+        )
+        results = json.loads(body)["results"]
+        assert status == 200 and len(results) == 3
+        assert all(r["svg"].startswith("<svg") for r in results)
+
+    @pytest.mark.parametrize("path, body, status", [
+        ("/render", {"display": True}, 400),
+        ("/render", {"tex": "x", "output": "png"}, 400),
+        ("/batch", {"tex": "x"}, 400),
+        ("/batch", {"tex": ["x"] * 9}, 413),
+        ("/nowhere", {"tex": "x"}, 404),
+    ])
+    def test_bad_requests(self, server, path, body, status):
+        assert _request(server, "POST", path, body)[0] == status
+
+    def test_invalid_json(self, server):
+        host, port = server.server_address[:2]
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request("POST", "/render", b"{nope")
+        assert conn.getresponse().status == 400
+        conn.close()
+
+    def test_negative_content_length(self, server):
+        with socket.create_connection(server.server_address, 10) as sock:
+            sock.sendall(
+                b"POST /render HTTP/1.1\r\nHost: x\r\n"
+                b"Content-Length: -1\r\n\r\n"
+            )
+            assert sock.recv(4096).startswith(b"HTTP/1.1 400")
+
+    def test_keep_alive_after_not_found(self, server):
+        host, port = server.server_address[:2]
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request("POST", "/nope", json.dumps({"tex": "x"}))
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 404
+        conn.request("GET", "/health")
+        assert conn.getresponse().status == 200
+        conn.close()
+
+    def test_macros_do_not_leak_between_requests(self, server):
+        _request(server, "POST", "/batch", {
+            "tex": [r"\newcommand{\leak}{A}", r"\leak"],
+        })
+        clean = MathJaxRenderer(fastpath=False)
+        # More requests than contexts, each uncached but the first.
+        for tex in [r"\leak"] + [rf"\leak + {i}" for i in range(4)]:
+            body = _request(server, "POST", "/render", {"tex": tex})[2]
+            assert body.decode("utf-8") == clean.render(tex)
+
+    def test_unexpected_error_is_500(self, server, monkeypatch):
+        def broken(*args):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(server, "_render", broken)
+        status, _, body = _request(server, "POST", "/render", {"tex": "x"})
+        assert status == 500
+        assert json.loads(body) == {"error": "internal server error"}
+
+
+# ------------------------------------------------------------------ #
+# Health and metrics
+# ------------------------------------------------------------------ #
+
+class TestMetrics:
+    def test_health(self, server):
+        status, _, body = _request(server, "GET", "/health")
+        assert status == 200 and json.loads(body)["status"] == "ok"
+
+    def test_metrics(self, server):
+        _request(server, "POST", "/render", {"tex": "z"})
+        status, _, body = _request(server, "GET", "/metrics")
+        stats = json.loads(body)
+        assert status == 200
+        assert stats["requests"] >= 1 and stats["queue_depth"] == 0
+        assert stats["latency_ms"]["count"] >= 1
+        assert stats["contexts"]["contexts"] == 2
+        assert "hits" in stats["cache"]
@@ -0,0 +1,225 @@
+"""Tests for the output sinks (no JS involved)."""
+
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import zipfile
+
+import pytest
+
+from quickjax import (
+    DirectorySink,
+    HashedDirectorySink,
+    MathJaxRenderError,
+    PackReader,
+    PackSink,
+    TarSink,
+    ZipSink,
+)
+
+SVGS = {
+    "a": '<svg id="a"></svg>',
+    "b/c": '<svg id="c">π</svg>',
+    "dup": '<svg id="a"></svg>',
+}
+
+
+# ------------------------------------------------------------------ #
+# Directories
+# ------------------------------------------------------------------ #
+
+class TestDirectorySink:
+    @pytest.mark.parametrize("background", [True, False])
+    def test_writes_files(self, tmp_path, background):
+        with DirectorySink(tmp_path, background=background) as sink:
+            keys = sink.write_many(SVGS.items())
+        assert keys == ["a.svg", "b/c.svg", "dup.svg"]
+        assert (tmp_path / "b" / "c.svg").read_text("utf-8") == SVGS["b/c"]
+        assert "b/c" in sink and "missing" not in sink
+
+    def test_names_stay_inside(self, tmp_path):
+        with DirectorySink(tmp_path / "out") as sink:
+            assert sink.write("../../x", "<svg/>") == "x.svg"
+        assert (tmp_path / "out" / "x.svg").exists()
+
+    def test_errors_skipped(self, tmp_path):
+        with DirectorySink(tmp_path) as sink:
+            keys = sink.write_many([
+                ("ok", "<svg/>"), ("bad", MathJaxRenderError("boom")),
+            ])
+        assert keys == ["ok.svg", None]
+        assert sink.written == 1
+
+    def test_write_after_close(self, tmp_path):
+        sink = DirectorySink(tmp_path)
+        sink.close()
+        with pytest.raises(ValueError):
+            sink.write("a", "<svg/>")
+
+
+class TestHashedDirectorySink:
+    def test_identical_svgs_stored_once(self, tmp_path):
+        with HashedDirectorySink(tmp_path) as sink:
+            sink.write_many(SVGS.items())
+        assert sink.files["a"] == sink.files["dup"]
+        assert len(list(tmp_path.glob("*/*.svg"))) == 2
+        assert (tmp_path / sink.files["b/c"]).read_text("utf-8") == \
+            SVGS["b/c"]
+
+    def test_manifest_reloaded(self, tmp_path):
+        with HashedDirectorySink(tmp_path) as sink:
+            sink.write("a", SVGS["a"])
+        with HashedDirectorySink(tmp_path) as again:
+            assert "a" in again and "b/c" not in again
+
+
+# ------------------------------------------------------------------ #
+# Archives
+# ------------------------------------------------------------------ #
+
+def test_zip_sink(tmp_path):
+    path = tmp_path / "out.zip"
+    with ZipSink(path) as sink:
+        sink.write_many(SVGS.items())
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["a.svg", "b/c.svg", "dup.svg"]
+        assert archive.read("b/c.svg").decode("utf-8") == SVGS["b/c"]
+
+
+def test_zip_sink_resumes(tmp_path):
+    path = tmp_path / "out.zip"
+    with ZipSink(path) as sink:
+        sink.write("a", SVGS["a"])
+    with ZipSink(path) as sink:
+        assert "a" in sink and "b/c" not in sink
+        sink.write("b/c", SVGS["b/c"])
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["a.svg", "b/c.svg"]
+
+
+def test_zip_sink_refuses_truncated_archive(tmp_path):
+    path = tmp_path / "out.zip"
+    with ZipSink(path) as sink:
+        sink.write_many(SVGS.items())
+    path.write_bytes(path.read_bytes()[:-22])
+    with pytest.raises(ValueError, match="not a complete zip archive"):
+        ZipSink(path)
+
+
+@pytest.mark.parametrize("name", ["out.tar", "out.tar.gz"])
+def test_tar_sink_resumes(tmp_path, name):
+    path = tmp_path / name
+    with TarSink(path) as sink:
+        sink.write("a", SVGS["a"])
+    with TarSink(path) as sink:
+        assert "a" in sink and "b/c" not in sink
+        sink.write("b/c", SVGS["b/c"])
+    with tarfile.open(path) as archive:
+        assert archive.getnames() == ["a.svg", "b/c.svg"]
+        assert archive.extractfile("a.svg").read().decode() == SVGS["a"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_tar_sink_salvages_truncated_archive(tmp_path):
+    path = tmp_path / "out.tar"
+    with TarSink(path) as sink:
+        sink.write_many(SVGS.items())
+    path.write_bytes(path.read_bytes()[:3000])
+    with TarSink(path) as sink:
+        assert "a" in sink and "dup" not in sink
+
+
+_CRASH = """
+import os, sys
+from quickjax import TarSink
+sink = TarSink(sys.argv[1], background=False)
+for i in range(100):
+    sink.write(f"f{i}", "<svg>" + "x" * 1000 + "</svg>")
+os._exit(1)
+"""
+
+
+def test_tar_sink_recovers_after_crash(tmp_path):
+    path = tmp_path / "out.tar"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", _CRASH, str(path)], env=env)
+    assert not path.exists()
+    with TarSink(path) as sink:
+        assert "f0" in sink and "f99" not in sink
+        sink.write("new", SVGS["a"])
+    with tarfile.open(path) as archive:
+        names = archive.getnames()
+    assert names[0] == "f0.svg" and names[-1] == "new.svg"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_tar_sink_keeps_archive_after_write_error(tmp_path):
+    path = tmp_path / "out.tar"
+    with TarSink(path) as sink:
+        sink.write("a", SVGS["a"])
+
+    class Full(io.BytesIO):
+        def read(self, *args):
+            raise OSError("disk full")
+
+    sink = TarSink(path, background=False)
+    addfile = sink._tar.addfile
+    # The header reaches the stream, the data does not.
+    sink._tar.addfile = lambda info, fileobj: addfile(info, Full())
+    with pytest.raises(OSError):
+        sink.write("b/c", SVGS["b/c"])
+    sink.close()
+    with tarfile.open(path) as archive:
+        assert archive.getnames() == ["a.svg"]
+    with TarSink(path) as sink:
+        assert "a" in sink and "b/c" not in sink
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.parametrize("name", ["out.tar", "out.tar.gz"])
+def test_tar_sink(tmp_path, name):
+    path = tmp_path / name
+    with TarSink(path) as sink:
+        sink.write_many(SVGS.items())
+    with tarfile.open(path) as archive:
+        assert archive.getnames() == ["a.svg", "b/c.svg", "dup.svg"]
+        member = archive.extractfile("b/c.svg")
+        assert member.read().decode("utf-8") == SVGS["b/c"]
+
+
+# ------------------------------------------------------------------ #
+# Packed file
+# ------------------------------------------------------------------ #
+
+class TestPack:
+    def test_random_access(self, tmp_path):
+        path = tmp_path / "out.pack"
+        with PackSink(path) as sink:
+            sink.write_many(SVGS.items())
+        with PackReader(path) as pack:
+            assert len(pack) == 3 and list(pack) == list(SVGS)
+            assert pack["b/c"] == SVGS["b/c"]
+            assert pack.get("missing") is None
+            with pytest.raises(KeyError):
+                pack["missing"]
+
+    def test_reopen_appends(self, tmp_path):
+        path = tmp_path / "out.pack"
+        with PackSink(path) as sink:
+            sink.write("a", SVGS["a"])
+        with PackSink(path) as sink:
+            assert "a" in sink
+            sink.write("b/c", SVGS["b/c"])
+        with PackReader(path) as pack:
+            assert pack["a"] == SVGS["a"] and pack["b/c"] == SVGS["b/c"]
+
+    def test_index_written_after_data(self, tmp_path):
+        path = tmp_path / "out.pack"
+        sink = PackSink(path, background=False)
+        sink.write("a", SVGS["a"])
+        assert path.with_name("out.pack.idx").read_text() == ""
+        sink.flush()
+        assert PackReader(path)["a"] == SVGS["a"]
+        sink.close()